@@ -12,6 +12,8 @@ from pydantic import BaseModel
 from src.schemas.response_models import AnalysisResponse, HealthResponse, AnalysisMode
 from src.utils.analyzer import analyze_pdf, query_vector_store, ingest_pdf_to_vector_store
 from src.utils.utils import _validate_file_async, _save_uploaded_file_async, _cleanup_temp_files_async
+from src.utils.timing import instrument_app
+from src.utils.server import run_server
 
 load_dotenv()
 
@@ -30,6 +32,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+instrument_app(app, service="analyzer")
+
 
 class QueryRequest(BaseModel):
     query: str
@@ -121,12 +125,4 @@ async def root() -> HealthResponse:
 
 
 if __name__ == "__main__":
-    import uvicorn
-    port = int(os.environ.get("PORT", 8000))
-    uvicorn.run(
-        app,
-        host="0.0.0.0",
-        port=port,
-        reload=True,
-        loop="asyncio"
-    )
+    run_server("main:app", default_port=8000, reload=True, loop="asyncio")
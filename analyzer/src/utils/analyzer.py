@@ -18,6 +18,8 @@ import tempfile
 from ..config.llm_config import get_llm
 from ..config.prompts import get_multimodal_prompt, get_text_analysis_prompt
 from ..schemas.llm_response_models import LLMResponse
+from .timing import span, record_size
+from .vector_index import add_to_index, get_read_only_store
 
 
 async def _create_embeddings_async() -> GoogleGenerativeAIEmbeddings:
@@ -46,7 +48,8 @@ async def _create_embeddings_async() -> GoogleGenerativeAIEmbeddings:
 async def _load_pdf_async(file_path: str) -> List[Document]:
     try:
         loader = PyPDFLoader(file_path)
-        docs = await asyncio.to_thread(loader.load)
+        with span("pdf_load"):
+            docs = await asyncio.to_thread(loader.load)
         if all(not doc.page_content.strip() for doc in docs):
             images = await asyncio.to_thread(convert_from_path, file_path)
             ocr_docs = []
@@ -68,7 +71,8 @@ async def _load_pdf_async(file_path: str) -> List[Document]:
 
 
 async def _split_documents_async(pages: List[Document], text_splitter: RecursiveCharacterTextSplitter, file_path: str = None) -> List[Document]:
-    chunks = await asyncio.to_thread(text_splitter.split_documents, pages)
+    with span("text_split"):
+        chunks = await asyncio.to_thread(text_splitter.split_documents, pages)
     if file_path:
         for chunk in chunks:
             chunk.metadata["source_path"] = file_path
@@ -84,7 +88,8 @@ async def _create_vector_store_async(chunks: List[Document], embeddings: GoogleG
 
 
 async def _similarity_search_async(vector_store: FAISS, search_query: str, k: int = 4) -> List[Document]:
-    return await asyncio.to_thread(vector_store.similarity_search, search_query, k)
+    with span("similarity_search"):
+        return await asyncio.to_thread(vector_store.similarity_search, search_query, k)
 
 
 async def _read_file_async(file_path: str) -> bytes:
@@ -113,8 +118,10 @@ async def analyze_pdf_multimodal(file_path: str, search_query: str = "Analyze th
         raise FileNotFoundError("File not found")
 
     pdf_bytes = await _read_file_async(file_path)
-    pdf_base64 = await asyncio.to_thread(base64.b64encode, pdf_bytes)
-    pdf_base64_str = await asyncio.to_thread(pdf_base64.decode, "utf-8")
+    with span("pdf_encode"):
+        pdf_base64 = await asyncio.to_thread(base64.b64encode, pdf_bytes)
+        pdf_base64_str = await asyncio.to_thread(pdf_base64.decode, "utf-8")
+    record_size("pdf_payload", len(pdf_base64_str))
 
     system_prompt = get_multimodal_prompt()
 
@@ -146,7 +153,8 @@ async def analyze_pdf_multimodal(file_path: str, search_query: str = "Analyze th
     ]
 
     try:
-        structured_response = await llm.ainvoke(messages)
+        with span("multimodal_llm"):
+            structured_response = await llm.ainvoke(messages)
         return {
             "response": structured_response.response,
             "analysis_type": "multimodal",
@@ -176,7 +184,8 @@ async def analyze_pdf_text_based(file_path: str, search_query: str = "Summarize
 
     chunks = await _split_documents_async(pages, text_splitter, file_path)
 
-    vector_store = await asyncio.to_thread(FAISS.from_documents, chunks, embeddings)
+    with span("vector_index"):
+        vector_store = await asyncio.to_thread(FAISS.from_documents, chunks, embeddings)
 
     system_prompt = get_text_analysis_prompt()
 
@@ -205,7 +214,9 @@ async def analyze_pdf_text_based(file_path: str, search_query: str = "Summarize
         SystemMessage(content=system_prompt),
         HumanMessage(content=prompt)
     ]
-    structured_response = await llm.ainvoke(messages)
+    record_size("text_prompt", len(prompt))
+    with span("text_llm"):
+        structured_response = await llm.ainvoke(messages)
 
     return {
         "response": structured_response.response,
@@ -223,17 +234,15 @@ async def analyze_pdf(file_path: str = "demo.pdf", search_query: str = "Summariz
         return await analyze_pdf_text_based(file_path, search_query)
 
 async def query_vector_store(search_query: str, k: int = 4, index_path: str = "faiss_index") -> dict:
-    if not os.path.exists(index_path):
-        raise FileNotFoundError("Vector store index not found.")
     embeddings = await _create_embeddings_async()
-    vector_store = await asyncio.to_thread(FAISS.load_local, index_path, embeddings, allow_dangerous_deserialization=True)
+    with span("index_load"):
+        vector_store = await asyncio.to_thread(get_read_only_store, index_path, embeddings)
     docs = await _similarity_search_async(vector_store, search_query, k)
     return {
         "results": _format_retrieved_vectors(docs)
     }
 
 async def ingest_pdf_to_vector_store(file_path: str, index_path: str = "faiss_index") -> dict:
-    os.makedirs(index_path, exist_ok=True)
     pages = await _load_pdf_async(file_path)
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=10000,
@@ -242,11 +251,9 @@ async def ingest_pdf_to_vector_store(file_path: str, index_path: str = "faiss_in
     )
     chunks = await _split_documents_async(pages, text_splitter, file_path)
     embeddings = await _create_embeddings_async()
-    index_file = os.path.join(index_path, "index.faiss")
-    if os.path.exists(index_file):
-        vector_store = await asyncio.to_thread(FAISS.load_local, index_path, embeddings, allow_dangerous_deserialization=True)
-        await asyncio.to_thread(vector_store.add_documents, chunks)
-    else:
-        vector_store = await asyncio.to_thread(FAISS.from_documents, chunks, embeddings)
-    await asyncio.to_thread(vector_store.save_local, index_path)
+    texts = [chunk.page_content for chunk in chunks]
+    with span("chunk_embedding"):
+        vectors = await asyncio.to_thread(embeddings.embed_documents, texts)
+    with span("index_write"):
+        await add_to_index(index_path, list(zip(texts, vectors)), [chunk.metadata for chunk in chunks])
     return {"message": "PDF ingested and index updated."}
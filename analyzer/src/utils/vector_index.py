@@ -0,0 +1,137 @@
+import asyncio
+import fcntl
+import multiprocessing
+import os
+import pickle
+import shutil
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+
+CURRENT_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+WRITE_LOCK_FILE = ".write.lock"
+KEEP_VERSIONS = 3
+
+# IO_FLAG_MMAP_IFC maps the flat vectors straight from the page cache, so every
+# worker shares one copy. Older faiss builds only have IO_FLAG_MMAP.
+MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+_readers: Dict[str, Tuple[Path, FAISS]] = {}
+_writer: Optional[ProcessPoolExecutor] = None
+
+
+# Layout: <index_path>/versions/<version>/{index.faiss,index.pkl} plus a CURRENT
+# file naming the live version. Writers publish a new version and swap CURRENT
+# atomically; readers keep their mapping of the old one until they notice.
+# An index saved directly into <index_path> by FAISS.save_local is still read.
+def current_index_dir(index_path: str) -> Optional[Path]:
+    root = Path(index_path)
+    try:
+        return root / VERSIONS_DIR / (root / CURRENT_FILE).read_text().strip()
+    except FileNotFoundError:
+        return root if (root / "index.faiss").exists() else None
+
+
+def _load_index(index_dir: Path, io_flags: int = 0) -> Tuple[faiss.Index, InMemoryDocstore, Dict[int, str]]:
+    index = faiss.read_index(str(index_dir / "index.faiss"), io_flags)
+    with open(index_dir / "index.pkl", "rb") as docstore_file:
+        docstore, index_to_docstore_id = pickle.load(docstore_file)
+    return index, docstore, index_to_docstore_id
+
+
+def open_read_only_store(index_dir: Path, embeddings: Embeddings) -> FAISS:
+    return FAISS(embeddings, *_load_index(index_dir, MMAP_FLAGS))
+
+
+def get_read_only_store(index_path: str, embeddings: Embeddings) -> FAISS:
+    index_dir = current_index_dir(index_path)
+    if index_dir is None:
+        raise FileNotFoundError("Vector store index not found.")
+
+    cached = _readers.get(index_path)
+    if cached and cached[0] == index_dir:
+        return cached[1]
+
+    store = open_read_only_store(index_dir, embeddings)
+    _readers[index_path] = (index_dir, store)
+    return store
+
+
+@contextmanager
+def _write_lock(root: Path) -> Iterator[None]:
+    root.mkdir(parents=True, exist_ok=True)
+    with open(root / WRITE_LOCK_FILE, "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _prune_versions(root: Path, keep: int) -> None:
+    versions = sorted((root / VERSIONS_DIR).iterdir(), key=lambda path: path.name)
+    for version_dir in versions[:-keep]:
+        shutil.rmtree(version_dir, ignore_errors=True)
+
+
+# Writes the same files as FAISS.save_local, working on the faiss index and
+# docstore directly: the vectors are already computed, so no embedding model
+# is needed in the writer process.
+def write_index_version(index_path: str, text_embeddings: List[Tuple[str, List[float]]], metadatas: List[dict]) -> str:
+    root = Path(index_path)
+    with _write_lock(root):
+        vectors = np.array([vector for _, vector in text_embeddings], dtype=np.float32)
+        current = current_index_dir(index_path)
+        if current:
+            index, docstore, index_to_docstore_id = _load_index(current)
+        else:
+            index, docstore, index_to_docstore_id = faiss.IndexFlatL2(vectors.shape[1]), InMemoryDocstore(), {}
+
+        start = index.ntotal
+        index.add(vectors)
+        ids = [str(uuid.uuid4()) for _ in text_embeddings]
+        docstore.add({
+            doc_id: Document(page_content=text, metadata=metadata or {})
+            for doc_id, (text, _), metadata in zip(ids, text_embeddings, metadatas)
+        })
+        index_to_docstore_id.update({start + offset: doc_id for offset, doc_id in enumerate(ids)})
+
+        version = str(time.time_ns())
+        version_dir = root / VERSIONS_DIR / version
+        version_dir.mkdir(parents=True)
+        faiss.write_index(index, str(version_dir / "index.faiss"))
+        with open(version_dir / "index.pkl", "wb") as docstore_file:
+            pickle.dump((docstore, index_to_docstore_id), docstore_file)
+
+        pending_current = root / f"{CURRENT_FILE}.tmp"
+        pending_current.write_text(version)
+        os.replace(pending_current, root / CURRENT_FILE)
+        _prune_versions(root, KEEP_VERSIONS)
+    return version
+
+
+# Index updates run in a short-lived child process, so the full writable copy
+# of the index never lands in a query worker's heap. The file lock keeps
+# writers from different workers in order.
+async def add_to_index(index_path: str, text_embeddings: List[Tuple[str, List[float]]], metadatas: List[dict]) -> str:
+    global _writer
+    if _writer is None:
+        _writer = ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context("spawn"),
+            max_tasks_per_child=1
+        )
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_writer, write_index_version, index_path, text_embeddings, metadatas)
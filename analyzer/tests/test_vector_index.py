@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import FakeEmbeddings
+
+from src.utils import vector_index
+from src.utils.vector_index import (
+    CURRENT_FILE,
+    VERSIONS_DIR,
+    add_to_index,
+    current_index_dir,
+    get_read_only_store,
+    write_index_version,
+)
+
+EMBEDDINGS = FakeEmbeddings(size=8)
+
+
+def embedded(*texts):
+    return list(zip(texts, EMBEDDINGS.embed_documents(list(texts)))), [{"source": text} for text in texts]
+
+
+def nearest(store, text):
+    vector = store.index.reconstruct(next(
+        position for position, doc_id in store.index_to_docstore_id.items()
+        if store.docstore.search(doc_id).page_content == text))
+    return store.similarity_search_by_vector(vector, k=1)[0]
+
+
+@pytest.fixture(autouse=True)
+def no_cached_readers(monkeypatch):
+    monkeypatch.setattr(vector_index, "_readers", {})
+
+
+def test_missing_index(tmp_path):
+    assert current_index_dir(str(tmp_path)) is None
+    with pytest.raises(FileNotFoundError):
+        get_read_only_store(str(tmp_path), EMBEDDINGS)
+
+
+def test_versions_append_and_swap_current(tmp_path):
+    index_path = str(tmp_path)
+    first = write_index_version(index_path, *embedded("alpha", "beta"))
+    assert (tmp_path / CURRENT_FILE).read_text() == first
+    store = get_read_only_store(index_path, EMBEDDINGS)
+    assert store.index.ntotal == 2
+    assert get_read_only_store(index_path, EMBEDDINGS) is store
+
+    second = write_index_version(index_path, *embedded("gamma"))
+    assert second != first
+    updated = get_read_only_store(index_path, EMBEDDINGS)
+    assert updated is not store
+    assert updated.index.ntotal == 3
+    assert nearest(updated, "gamma").metadata == {"source": "gamma"}
+    assert nearest(updated, "alpha").page_content == "alpha"
+    # A reader that still holds the previous version keeps working.
+    assert nearest(store, "beta").page_content == "beta"
+
+
+def test_prunes_old_versions(tmp_path, monkeypatch):
+    monkeypatch.setattr(vector_index, "KEEP_VERSIONS", 2)
+    versions = [write_index_version(str(tmp_path), *embedded(f"text {i}")) for i in range(4)]
+
+    assert sorted(path.name for path in (tmp_path / VERSIONS_DIR).iterdir()) == versions[-2:]
+    assert get_read_only_store(str(tmp_path), EMBEDDINGS).index.ntotal == 4
+
+
+def test_reads_and_extends_a_save_local_index(tmp_path):
+    texts, metadatas = embedded("legacy")
+    FAISS.from_embeddings(texts, EMBEDDINGS, metadatas=metadatas).save_local(str(tmp_path))
+    assert current_index_dir(str(tmp_path)) == tmp_path
+
+    write_index_version(str(tmp_path), *embedded("new"))
+    store = get_read_only_store(str(tmp_path), EMBEDDINGS)
+    assert store.index.ntotal == 2
+    assert nearest(store, "legacy").metadata == {"source": "legacy"}
+
+
+def test_add_to_index_writes_in_a_child_process(tmp_path):
+    version = asyncio.run(add_to_index(str(tmp_path), *embedded("alpha")))
+    assert (tmp_path / CURRENT_FILE).read_text() == version
+    assert get_read_only_store(str(tmp_path), EMBEDDINGS).index.ntotal == 1
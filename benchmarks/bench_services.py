@@ -0,0 +1,264 @@
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+from corpus import write_corpus
+from fake_llm import FakeLLMSettings, LatencyProfile, install_fake_llm
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+RESULT_MARKER = "BENCH_RESULT "
+EXTRACTOR_BENCH_DATABASE = "image_extractor_bench"
+EXTRACTOR_SCHEMA_FIXTURE = REPO_ROOT / "image-data-extractor" / "benchmarks" / "fixtures" / "residence_card_schema.txt"
+
+
+@dataclass
+class Scenario:
+    service: str
+    path: str
+    corpus: str
+    content_type: str
+    file_field: str = "file"
+    form: Dict[str, str] = field(default_factory=dict)
+
+
+SCENARIOS = {
+    "analyze": Scenario("analyzer", "/analyze", "report_pdf", "application/pdf",
+                        form={"search_query": "What are the main risks?", "mode": "vector"}),
+    "analyze-multimodal": Scenario("analyzer", "/analyze", "report_pdf", "application/pdf",
+                                   form={"search_query": "What are the main risks?", "mode": "multimodal"}),
+    "summarize": Scenario("summarizer", "/summarize", "report_pdf", "application/pdf",
+                          form={"summary_type": "brief", "mode": "vector"}),
+    "sentiment-pdf": Scenario("sentiment", "/sentiment-pdf", "report_pdf", "application/pdf",
+                              form={"mode": "multimodal"}),
+    "classify-pdf": Scenario("doc-classify", "/classify-pdf", "report_pdf", "application/pdf"),
+    "extract-pdf": Scenario("image-data-extractor", "/extract", "residence_card_pdf", "application/pdf",
+                            file_field="document"),
+    "extract-image": Scenario("image-data-extractor", "/extract", "document_photo", "image/jpeg",
+                              file_field="document"),
+}
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def configure_extractor(settings: FakeLLMSettings) -> Dict:
+    from src.utils.parsing import parse_llm_string_to_dict
+
+    settings.text_response = EXTRACTOR_SCHEMA_FIXTURE.read_text()
+    generated = parse_llm_string_to_dict(settings.text_response)
+    settings.field_values = {
+        field_name: definition.get("example")
+        for field_name, definition in generated["document_schema"].items()
+    }
+    return generated
+
+
+async def _seed_extractor_schema(generated: Dict) -> None:
+    from src.db.models import DocumentSchema, SchemaStatus
+    from src.db.registry import schema_registry
+
+    await DocumentSchema.find({"document_type": generated["document_type"], "country": generated["country"]}).delete()
+    await DocumentSchema(
+        document_type=generated["document_type"],
+        country=generated["country"],
+        document_schema=generated["document_schema"],
+        status=SchemaStatus.ACTIVE
+    ).insert()
+    await schema_registry.invalidate()
+
+
+async def _drop_extractor_database() -> None:
+    from src.db.connection import db
+
+    await db.client.drop_database(EXTRACTOR_BENCH_DATABASE)
+
+
+async def drive_load(transport: httpx.AsyncBaseTransport, base_url: str, scenario: Scenario, uploads: List[bytes],
+                     requests: int, concurrency: int, warmup: int) -> Dict:
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    next_request = 0
+
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=None) as client:
+        async def send(request_number: int) -> None:
+            upload = uploads[request_number % len(uploads)]
+            suffix = ".pdf" if scenario.content_type == "application/pdf" else ".jpg"
+            start = time.perf_counter()
+            response = await client.post(
+                scenario.path,
+                data=scenario.form,
+                files=[(scenario.file_field, (f"document_{request_number}{suffix}", upload, scenario.content_type))]
+            )
+            if request_number >= warmup:
+                latencies.append(time.perf_counter() - start)
+                statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+
+        for request_number in range(warmup):
+            await send(request_number)
+
+        async def worker() -> None:
+            nonlocal next_request
+            while next_request < requests:
+                request_number = warmup + next_request
+                next_request += 1
+                await send(request_number)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "statuses": statuses,
+        "errors": sum(count for status, count in statuses.items() if not status.startswith("2")),
+        "elapsed_seconds": elapsed,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+async def run_worker(args: argparse.Namespace) -> Dict:
+    scenario = SCENARIOS[args.worker]
+    service_dir = REPO_ROOT / scenario.service
+    os.chdir(service_dir)
+    sys.path.insert(0, str(service_dir))
+    os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+    os.environ["MONGODB_DATABASE"] = EXTRACTOR_BENCH_DATABASE
+
+    main = importlib.import_module("main")
+    settings = FakeLLMSettings(
+        latency=LatencyProfile.parse(args.latency, args.latency_per_mb),
+        failure_rate=args.failure_rate,
+        seed=args.seed
+    )
+    patched = install_fake_llm(settings)
+
+    corpus_dir = Path(args.corpus_dir)
+    uploads = [path.read_bytes() for path in sorted(corpus_dir.glob(f"{scenario.corpus}_*"))]
+    rss_before_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    is_extractor = scenario.service == "image-data-extractor"
+    generated = configure_extractor(settings) if is_extractor else None
+
+    async with main.app.router.lifespan_context(main.app):
+        try:
+            if is_extractor:
+                await _seed_extractor_schema(generated)
+            result = await drive_load(httpx.ASGITransport(app=main.app), "http://bench", scenario, uploads,
+                                      args.requests, args.concurrency, args.warmup)
+        finally:
+            if is_extractor:
+                await _drop_extractor_database()
+
+    result.update({
+        "scenario": args.worker,
+        "service": scenario.service,
+        "concurrency": args.concurrency,
+        "llm_calls": settings.calls,
+        "llm_failures": settings.failures,
+        "peak_rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "import_rss_mib": rss_before_kib / 1024,
+        "patched": patched,
+    })
+    return result
+
+
+def run_scenario_process(name: str, corpus_dir: Path, args: argparse.Namespace) -> Dict:
+    command = [
+        sys.executable, str(Path(__file__).resolve()),
+        "--worker", name,
+        "--corpus-dir", str(corpus_dir),
+        "--requests", str(args.requests),
+        "--concurrency", str(args.concurrency),
+        "--warmup", str(args.warmup),
+        "--latency", args.latency,
+        "--latency-per-mb", str(args.latency_per_mb),
+        "--failure-rate", str(args.failure_rate),
+        "--seed", str(args.seed),
+    ]
+    completed = subprocess.run(command, capture_output=True, text=True)
+    for line in completed.stdout.splitlines():
+        if line.startswith(RESULT_MARKER):
+            return json.loads(line[len(RESULT_MARKER):])
+
+    error_lines = (completed.stderr or completed.stdout).strip().splitlines()
+    return {"scenario": name, "service": SCENARIOS[name].service, "skipped": error_lines[-1] if error_lines else "no output"}
+
+
+def print_report(results: List[Dict]) -> None:
+    print(f"{'scenario':<20} {'service':<22} {'reqs':>5} {'errors':>6} {'rps':>8} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'peak RSS':>10} {'LLM calls':>10}")
+    for result in results:
+        if "skipped" in result:
+            print(f"{result['scenario']:<20} {result['service']:<22} skipped: {result['skipped']}")
+            continue
+        print(f"{result['scenario']:<20} {result['service']:<22} {result['requests']:>5} {result['errors']:>6} "
+              f"{result['throughput_rps']:>8.1f} {result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f} "
+              f"{result['p99_ms']:>9.1f} {result['peak_rss_mib']:>7.0f} MiB {result['llm_calls']:>10}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline load benchmark of the FastAPI services with a fake LLM")
+    parser.add_argument("scenarios", nargs="*", default=list(SCENARIOS),
+                        help=f"Scenarios to run: {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--documents", type=int, default=8, help="Corpus documents per kind")
+    parser.add_argument("--pages", type=int, default=6, help="Pages per generated PDF")
+    parser.add_argument("--latency", default="lognormal:0.4,0.35",
+                        help="fixed:SECONDS, uniform:LOW,HIGH or lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--latency-per-mb", type=float, default=0.5,
+                        help="Extra fake LLM latency per MB of prompt payload")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of LLM calls that raise")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=Path, help="Also write the results to this file")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--corpus-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+    return args
+
+
+def main() -> None:
+    args = parse_args()
+    if args.worker:
+        result = asyncio.run(run_worker(args))
+        print(RESULT_MARKER + json.dumps(result), flush=True)
+        return
+
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        write_corpus(Path(corpus_dir), args.documents, args.pages)
+        results = []
+        for name in args.scenarios:
+            print(f"Running {name}...", file=sys.stderr, flush=True)
+            results.append(run_scenario_process(name, Path(corpus_dir), args))
+
+    print_report(results)
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import io
+import random
+from pathlib import Path
+from typing import Dict, List
+
+from PIL import Image, ImageDraw, ImageFilter
+
+
+WORDS = (
+    "account balance statement period revenue operating margin customer payment invoice contract "
+    "agreement party clause liability quarter growth compliance review policy holder address issued "
+    "expiry number reference transaction summary risk outlook management report annual total"
+).split()
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842
+LINES_PER_PAGE = 52
+
+
+def _escape_pdf_text(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _random_line(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 13))).capitalize() + "."
+
+
+def build_text_pdf(pages: List[List[str]]) -> bytes:
+    objects = [b"", b"", b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for lines in pages:
+        text = " ".join(f"({_escape_pdf_text(line)}) '" for line in lines)
+        stream = f"BT /F1 10 Tf 14 TL 50 {PAGE_HEIGHT - 50} Td {text} ET".encode("latin-1", "replace")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>".encode()
+        )
+        page_ids.append(len(objects))
+
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{page_id} 0 R' for page_id in page_ids)}] /Count {len(page_ids)} >>".encode()
+
+    output = io.BytesIO()
+    output.write(b"%PDF-1.4\n")
+    offsets = []
+    for object_id, body in enumerate(objects, start=1):
+        offsets.append(output.tell())
+        output.write(b"%d 0 obj\n" % object_id + body + b"\nendobj\n")
+
+    xref_offset = output.tell()
+    output.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        output.write(b"%010d 00000 n \n" % offset)
+    output.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset))
+    return output.getvalue()
+
+
+def build_report_pdf(seed: int, page_count: int) -> bytes:
+    rng = random.Random(seed)
+    return build_text_pdf([
+        [f"Quarterly report {seed} - page {page + 1}"] + [_random_line(rng) for _ in range(LINES_PER_PAGE)]
+        for page in range(page_count)
+    ])
+
+
+def build_residence_card_pdf(seed: int, page_count: int) -> bytes:
+    rng = random.Random(seed)
+    card_page = [
+        "RESIDENCE CARD",
+        f"Document number: DOC{rng.randint(100000, 999999)}",
+        "Surname: SURNAME",
+        "Given names: GIVEN NAMES",
+        f"Date of birth: {rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/19{rng.randint(50, 99)}",
+        "Nationality: XX",
+    ]
+    cover_pages = [[_random_line(rng) for _ in range(LINES_PER_PAGE)] for _ in range(page_count - 1)]
+    return build_text_pdf([card_page] + cover_pages)
+
+
+def build_document_photo(seed: int, size=(3000, 2250)) -> bytes:
+    rng = random.Random(seed)
+    photo = Image.effect_noise(size, 24).convert("RGB")
+    photo = Image.blend(photo, Image.new("RGB", size, (90, 70, 50)), 0.6)
+
+    draw = ImageDraw.Draw(photo)
+    left, top = rng.randint(200, 500), rng.randint(200, 400)
+    right, bottom = size[0] - rng.randint(200, 500), size[1] - rng.randint(200, 400)
+    draw.rectangle((left, top, right, bottom), fill=(236, 232, 220))
+    for line in range(10):
+        y = top + 150 + line * 120
+        draw.rectangle((left + 100, y, left + 100 + rng.randint(600, right - left - 300), y + 40), fill=(30, 30, 40))
+
+    buffer = io.BytesIO()
+    photo.filter(ImageFilter.GaussianBlur(1)).save(buffer, format="JPEG", quality=92)
+    return buffer.getvalue()
+
+
+def write_corpus(output_dir: Path, documents: int, pages: int) -> Dict[str, List[Path]]:
+    corpus = {"report_pdf": [], "residence_card_pdf": [], "document_photo": []}
+    for seed in range(documents):
+        for kind, suffix, content in (
+            ("report_pdf", ".pdf", build_report_pdf(seed, pages)),
+            ("residence_card_pdf", ".pdf", build_residence_card_pdf(seed, pages)),
+            ("document_photo", ".jpg", build_document_photo(seed)),
+        ):
+            path = output_dir / f"{kind}_{seed}{suffix}"
+            path.write_bytes(content)
+            corpus[kind].append(path)
+    return corpus
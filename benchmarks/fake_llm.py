@@ -0,0 +1,226 @@
+import asyncio
+import random
+import sys
+import typing
+import zlib
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Dict, List, Optional, Type
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import AIMessage, AIMessageChunk
+from pydantic import BaseModel
+
+
+STRUCTURED_FIXTURES: Dict[str, Dict[str, Any]] = {
+    "LLMResponse": {
+        "response": "The document describes the quarterly operating results and the main risks identified by management."
+    },
+    "LLMSummaryResponse": {
+        "summary": "The document reports steady revenue growth, lower operating costs and two open compliance items.",
+        "summary_type": "comprehensive",
+        "key_points": ["Revenue grew 8%", "Operating costs fell 3%", "Two compliance items remain open"]
+    },
+    "LLMSentimentResponse": {
+        "sentiment": "positive",
+        "score": 0.82,
+        "summary": "The tone is confident and the outlook is described favourably."
+    },
+    "ClassificationResponse": {
+        "page_classifications": [
+            {"page": 1, "document_type": "Bank Statement", "confidence": 0.93, "reasoning": "Account summary table"},
+            {"page": 2, "document_type": "Bank Statement", "confidence": 0.91, "reasoning": "Transaction listing"}
+        ]
+    },
+    "DocumentTypeClassification": {
+        "document_type": "residence_card",
+        "country": "XX",
+        "confidence": 0.95,
+        "alternative_types": []
+    },
+    "ExtractedFields": {
+        "field_names": ["document_number", "surname", "given_names", "date_of_birth", "date_of_expiry"]
+    },
+}
+
+
+class FakeLLMError(RuntimeError):
+    pass
+
+
+@dataclass
+class LatencyProfile:
+    distribution: str = "fixed"
+    parameters: List[float] = field(default_factory=lambda: [0.2])
+    seconds_per_mb: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str, seconds_per_mb: float = 0.0) -> "LatencyProfile":
+        distribution, _, raw_parameters = spec.partition(":")
+        parameters = [float(value) for value in raw_parameters.split(",") if value]
+        expected = {"fixed": 1, "uniform": 2, "lognormal": 2}
+        if distribution not in expected or len(parameters) != expected[distribution]:
+            raise ValueError(
+                f"Invalid latency '{spec}'. Use fixed:SECONDS, uniform:LOW,HIGH or lognormal:MEDIAN,SIGMA")
+        return cls(distribution, parameters, seconds_per_mb)
+
+    def sample(self, rng: random.Random, payload_bytes: int) -> float:
+        if self.distribution == "fixed":
+            base = self.parameters[0]
+        elif self.distribution == "uniform":
+            base = rng.uniform(*self.parameters)
+        else:
+            median, sigma = self.parameters
+            base = median * rng.lognormvariate(0.0, sigma)
+        return base + self.seconds_per_mb * payload_bytes / (1024 * 1024)
+
+
+@dataclass
+class FakeLLMSettings:
+    latency: LatencyProfile = field(default_factory=LatencyProfile)
+    failure_rate: float = 0.0
+    seed: int = 0
+    structured_fixtures: Dict[str, Dict[str, Any]] = field(default_factory=lambda: dict(STRUCTURED_FIXTURES))
+    field_values: Dict[str, Any] = field(default_factory=dict)
+    text_response: str = "{}"
+
+    def __post_init__(self):
+        self.rng = random.Random(self.seed)
+        self.calls = 0
+        self.failures = 0
+
+
+def _payload_bytes(messages: Any) -> int:
+    if isinstance(messages, str):
+        return len(messages)
+    total = 0
+    for message in messages:
+        content = getattr(message, "content", message)
+        if isinstance(content, str):
+            total += len(content)
+            continue
+        for part in content:
+            if isinstance(part, str):
+                total += len(part)
+            elif isinstance(part, dict):
+                total += len(part.get("text") or part.get("data") or part.get("image_url") or "")
+    return total
+
+
+def _placeholder_value(annotation: Any, field_name: str, settings: FakeLLMSettings) -> Any:
+    if field_name in settings.field_values:
+        return settings.field_values[field_name]
+
+    origin = typing.get_origin(annotation)
+    arguments = typing.get_args(annotation)
+    if origin is typing.Union:
+        inner = [argument for argument in arguments if argument is not type(None)]
+        return _placeholder_value(inner[0], field_name, settings) if inner else None
+    if origin is typing.Literal:
+        return arguments[0]
+    if origin in (list, List):
+        return []
+    if origin in (dict, Dict):
+        return {}
+    if isinstance(annotation, type):
+        if issubclass(annotation, BaseModel):
+            return build_structured_fixture(annotation, settings).model_dump()
+        if issubclass(annotation, Enum):
+            return next(iter(annotation)).value
+        if issubclass(annotation, bool):
+            return False
+        if issubclass(annotation, int):
+            return 1
+        if issubclass(annotation, float):
+            return 0.9
+    return field_name.upper()
+
+
+def build_structured_fixture(schema: Type[BaseModel], settings: FakeLLMSettings) -> BaseModel:
+    values = dict(settings.structured_fixtures.get(schema.__name__, {}))
+    for field_name, field_info in schema.model_fields.items():
+        if field_name not in values:
+            values[field_name] = _placeholder_value(field_info.annotation, field_name, settings)
+    return schema.model_validate(values)
+
+
+# Stands in for a LangChain chat model (and its with_structured_output runnable):
+# sleeps for a sampled latency, fails at the configured rate and answers with
+# fixtures, so the services run end to end without calling Gemini.
+class FakeChatModel:
+    def __init__(self, settings: FakeLLMSettings, structured_schema: Optional[Type[BaseModel]] = None,
+                 include_raw: bool = False):
+        self.settings = settings
+        self.structured_schema = structured_schema
+        self.include_raw = include_raw
+
+    def with_structured_output(self, schema: Type[BaseModel], include_raw: bool = False, **kwargs) -> "FakeChatModel":
+        return FakeChatModel(self.settings, schema, include_raw)
+
+    async def _simulate_call(self, messages: Any) -> None:
+        settings = self.settings
+        settings.calls += 1
+        await asyncio.sleep(settings.latency.sample(settings.rng, _payload_bytes(messages)))
+        if settings.rng.random() < settings.failure_rate:
+            settings.failures += 1
+            raise FakeLLMError("Injected LLM failure")
+
+    async def ainvoke(self, messages: Any, *args, **kwargs) -> Any:
+        await self._simulate_call(messages)
+        if self.structured_schema is None:
+            return AIMessage(content=self.settings.text_response)
+
+        parsed = build_structured_fixture(self.structured_schema, self.settings)
+        if self.include_raw:
+            return {"raw": AIMessage(content=""), "parsed": parsed, "parsing_error": None}
+        return parsed
+
+    async def astream(self, messages: Any, *args, **kwargs):
+        await self._simulate_call(messages)
+        text = self.settings.text_response
+        for start in range(0, len(text), 64):
+            await asyncio.sleep(0)
+            yield AIMessageChunk(content=text[start:start + 64])
+
+
+class FakeEmbeddings(Embeddings):
+    def __init__(self, *args, dimensions: int = 256, **kwargs):
+        self.dimensions = dimensions
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.random.default_rng(zlib.crc32(text.encode("utf-8"))).standard_normal(self.dimensions)
+        return (vector / np.linalg.norm(vector)).astype(np.float32).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+def install_fake_llm(settings: FakeLLMSettings) -> List[str]:
+    async def fake_get_llm(model_name: str = None, model_provider: str = None, temperature: float = 0.0,
+                           structured_schema: type = None, include_raw: bool = False, **kwargs):
+        model = FakeChatModel(settings)
+        if structured_schema:
+            return model.with_structured_output(structured_schema, include_raw=include_raw)
+        return model
+
+    def fake_chat_model(*args, **kwargs) -> FakeChatModel:
+        return FakeChatModel(settings)
+
+    replacements = {
+        "get_llm": fake_get_llm,
+        "ChatGoogleGenerativeAI": fake_chat_model,
+        "GoogleGenerativeAIEmbeddings": FakeEmbeddings,
+    }
+    patched = []
+    for module_name, module in list(sys.modules.items()):
+        if module is None or not (module_name == "main" or module_name.startswith("src.")):
+            continue
+        for attribute, replacement in replacements.items():
+            if hasattr(module, attribute):
+                setattr(module, attribute, replacement)
+                patched.append(f"{module_name}.{attribute}")
+    return patched
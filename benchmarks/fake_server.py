@@ -0,0 +1,40 @@
+import importlib
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_services import EXTRACTOR_BENCH_DATABASE, REPO_ROOT, configure_extractor
+from fake_llm import FakeLLMSettings, LatencyProfile, install_fake_llm
+
+# Imported by every uvicorn worker as "fake_server:app": loads the service named
+# by BENCH_SERVICE and swaps in the fake LLM before the worker starts serving.
+SERVICE = os.environ["BENCH_SERVICE"]
+SERVICE_DIR = REPO_ROOT / SERVICE
+SERVER_MODULES = {"doc-classify": "src.server"}
+DEFAULT_PORTS = {"analyzer": 8000, "sentiment": 8002, "summarizer": 8003, "doc-classify": 8004,
+                 "image-data-extractor": 8005}
+
+os.chdir(SERVICE_DIR)
+sys.path.insert(0, str(SERVICE_DIR))
+os.environ.setdefault("GOOGLE_API_KEY", "offline-benchmark")
+os.environ["MONGODB_DATABASE"] = EXTRACTOR_BENCH_DATABASE
+
+main = importlib.import_module("main")
+settings = FakeLLMSettings(
+    latency=LatencyProfile.parse(os.environ.get("BENCH_LATENCY", "fixed:0.2"),
+                                 float(os.environ.get("BENCH_LATENCY_PER_MB", "0"))),
+    failure_rate=float(os.environ.get("BENCH_FAILURE_RATE", "0")),
+    seed=os.getpid()
+)
+if SERVICE == "image-data-extractor":
+    configure_extractor(settings)
+install_fake_llm(settings)
+
+app = main.app
+
+
+if __name__ == "__main__":
+    server = importlib.import_module(SERVER_MODULES.get(SERVICE, "src.utils.server"))
+    server.run_server("fake_server:app", default_port=DEFAULT_PORTS[SERVICE])
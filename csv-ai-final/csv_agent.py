@@ -1,13 +1,30 @@
 from langchain_core.messages import HumanMessage, AIMessage
 from dotenv import load_dotenv
-from src.agent import create_csv_agent
+from src.agent import AgentLoop, create_csv_agent, create_llm, stream_agent
+from src.history import ChatHistory
+from src.tools import analyzer
 
 load_dotenv()
 
 
+async def print_response(agent_executor, inputs):
+    output = ""
+    print("Agent: ", end="", flush=True)
+    async for kind, payload in stream_agent(agent_executor, inputs):
+        if kind == "token":
+            print(payload, end="", flush=True)
+        elif kind == "tool_start":
+            print(f"\n[{payload[0]}]", flush=True)
+        elif kind == "output":
+            output = payload
+    print()
+    return output
+
+
 def main():
     agent_executor = create_csv_agent()
-    context = []
+    history = ChatHistory(create_llm())
+    agent_loop = AgentLoop()
 
     while True:
         try:
@@ -18,17 +35,17 @@ def main():
             if not user_input:
                 continue
 
-            response = agent_executor.invoke(
-                {"input": user_input, "chat_history": context}
-            )
-            print(f"Agent: {response['output']}")
-            context.append(HumanMessage(content=user_input))
-            context.append(AIMessage(content=response["output"]))
+            output = agent_loop.run(print_response(
+                agent_executor, {"input": user_input, "chat_history": history.messages(analyzer.schema_text())}
+            ))
+            history.add_turn([HumanMessage(content=user_input), AIMessage(content=output)])
         except KeyboardInterrupt:
             break
         except Exception as e:
             print(f"Error: {e}")
 
+    agent_loop.close()
+
 
 if __name__ == "__main__":
     main()
@@ -1,25 +1,41 @@
+import asyncio
 import os
+import queue
+import threading
+from typing import Any, AsyncIterable, AsyncIterator, Coroutine, Dict, Iterator, Tuple, TypeVar
+
 from langchain.agents import AgentExecutor, create_tool_calling_agent
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_google_genai import ChatGoogleGenerativeAI
 
 from .tools import (
     load_csv_tool,
+    list_datasets_tool,
     get_data_info_tool,
     describe_data_tool,
     create_visualization_tool,
     execute_pandas_code_tool,
 )
 
+# Console logging of every agent step, for local debugging only.
+AGENT_VERBOSE = os.getenv("CSV_AGENT_VERBOSE", "0") == "1"
 
-def create_csv_agent() -> AgentExecutor:
-    llm = ChatGoogleGenerativeAI(
+T = TypeVar("T")
+
+
+def create_llm() -> ChatGoogleGenerativeAI:
+    return ChatGoogleGenerativeAI(
         model="gemini-2.5-flash",
         temperature=0.1,
         google_api_key=os.getenv("GOOGLE_API_KEY"),
     )
+
+
+def create_csv_agent() -> AgentExecutor:
+    llm = create_llm()
     tools = [
         load_csv_tool,
+        list_datasets_tool,
         get_data_info_tool,
         describe_data_tool,
         create_visualization_tool,
@@ -37,6 +53,8 @@ You have access to powerful tools for:
 - Creating various types of visualizations
 - Executing custom pandas code for advanced operations
 
+Several CSV files can be loaded at once. Each one is a named dataset (see list_datasets). Every tool takes an optional dataset name and defaults to the most recently loaded dataset.
+
 Code Execution Options:
 1. execute_pandas_code: Secure execution with safety restrictions (good for basic operations)
 
@@ -51,9 +69,10 @@ The execute_pandas_code tool allows you to run custom pandas operations when the
 
 When using execute_pandas_code:
 - Always use 'df' to reference the DataFrame
+- Use dfs['name'] to reach any other loaded dataset, e.g. to merge or join datasets
 - Provide clear, well-commented code
 - Use descriptive variable names
-- Include print statements to show results
+- Include print statements to show results (the value of a final expression is shown as well)
 - Be aware that the original data is protected (you work with a copy)
 - For plotting: Use plt.figure(), plt.bar(), plt.plot(), etc. - plots will be automatically saved
 - You can create complex visualizations by combining data aggregation with plotting in the same code block
@@ -87,9 +106,102 @@ Guidelines:
     agent_executor = AgentExecutor(
         agent=agent,
         tools=tools,
-        verbose=True,
+        verbose=AGENT_VERBOSE,
         handle_parsing_errors=True,
         max_iterations=15,
     )
 
     return agent_executor
+
+
+def _chunk_text(content: Any) -> str:
+    if isinstance(content, str):
+        return content
+    # Gemini may return content as a list of parts.
+    return "".join(
+        part if isinstance(part, str) else part.get("text", "")
+        for part in content
+        if isinstance(part, (str, dict))
+    )
+
+
+async def stream_agent(agent_executor: AgentExecutor, inputs: Dict[str, Any]) -> AsyncIterator[Tuple[str, Any]]:
+    """Run the agent and yield its progress as it happens
+
+    Args:
+        agent_executor (AgentExecutor): Agent from create_csv_agent
+        inputs (Dict[str, Any]): input and chat_history
+
+    Yields:
+        Tuple[str, Any]: One of ("token", text), ("tool_start", (name, input)),
+        ("tool_end", (name, output)) and finally ("output", answer)
+    """
+    async for event in agent_executor.astream_events(inputs, version="v2"):
+        kind = event["event"]
+        if kind == "on_chat_model_stream":
+            text = _chunk_text(event["data"]["chunk"].content)
+            if text:
+                yield "token", text
+        elif kind == "on_tool_start":
+            yield "tool_start", (event["name"], event["data"].get("input"))
+        elif kind == "on_tool_end":
+            yield "tool_end", (event["name"], event["data"].get("output"))
+        elif kind == "on_chain_end" and not event["parent_ids"]:
+            yield "output", event["data"]["output"]["output"]
+
+
+# The LLM client and the agent are created once and reused for every turn,
+# and their async clients stay bound to the event loop they first ran on.
+# asyncio.run per turn would start a new loop each time, so every turn is
+# submitted to one loop running on a background thread instead.
+class AgentLoop:
+    def __init__(self):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="agent-loop", daemon=True)
+        self._thread.start()
+
+    def run(self, coroutine: Coroutine[Any, Any, T]) -> T:
+        """Run a coroutine on the loop and wait for its result
+
+        Context variables of the calling thread (such as the session's
+        workspace) are visible to the coroutine.
+
+        Args:
+            coroutine (Coroutine[Any, Any, T]): Coroutine to run
+
+        Returns:
+            T: The coroutine's result
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def iterate(self, items: AsyncIterable[T]) -> Iterator[T]:
+        """Consume an async iterable on the loop, yielding its items in the calling thread
+
+        Args:
+            items (AsyncIterable[T]): Async iterable, e.g. stream_agent(...)
+
+        Yields:
+            T: Each item as soon as the loop produces it
+        """
+        received: "queue.Queue" = queue.Queue()
+        done = object()
+
+        async def pump():
+            try:
+                async for item in items:
+                    received.put(item)
+            finally:
+                received.put(done)
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self._loop)
+        try:
+            while (item := received.get()) is not done:
+                yield item
+            future.result()
+        finally:
+            future.cancel()
+
+    def close(self) -> None:
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
@@ -1,22 +1,591 @@
+import hashlib
+import importlib.util
+import os
+import re
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
 import pandas as pd
-from typing import Dict, Any, Optional
 
+from .profiler import DatasetProfile, estimate_memory_bytes, get_profile, profile_in_background
+
+# Agent code runs on a shallow copy of the loaded frame. With Copy-on-Write a
+# write to that copy duplicates only the touched columns, never the original.
+# pandas >= 3 always behaves this way and deprecates the option.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+LARGE_FILE_BYTES = int(os.getenv("CSV_LARGE_FILE_MB", "256")) * 1024 * 1024
+CACHE_DIR = Path(os.getenv("CSV_CACHE_DIR", ".csv_cache"))
+CACHE_MAX_BYTES = int(os.getenv("CSV_CACHE_MAX_MB", "10240")) * 1024 * 1024
+SESSION_MEMORY_BYTES = int(os.getenv("CSV_SESSION_MEMORY_MB", "2048")) * 1024 * 1024
+# Bump when dtype inference changes so older cache entries are not reused.
+CACHE_FORMAT_VERSION = "2"
+DTYPE_SAMPLE_ROWS = 100_000
+CHUNK_ROWS = 500_000
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+LOAD_WORKERS = int(os.getenv("CSV_LOAD_WORKERS", "4"))
+HASH_INDEX_SIZE = 1024
+
+# Content hash by (path, size, mtime), so a file loaded again is not re-read
+# just to find its cache entry.
+_hashes: "OrderedDict[tuple, str]" = OrderedDict()
+# Cache entries being read or written, by number of users; pruning skips them.
+_pinned: Dict[Path, int] = {}
+_cache_lock = threading.Lock()
+
+
+def infer_category_columns(sample: pd.DataFrame) -> List[str]:
+    """Find string columns with few enough distinct values to store as category
+
+    Args:
+        sample (pd.DataFrame): Leading rows of the file
+
+    Returns:
+        List[str]: Names of the columns to load as category
+    """
+    category_columns = []
+    for column in sample.select_dtypes(include=["object", "string"]).columns:
+        values = sample[column].dropna()
+        if len(values) and values.nunique() / len(values) <= CATEGORY_MAX_UNIQUE_RATIO:
+            category_columns.append(column)
+    return category_columns
+
+
+def optimize_dtypes(frame: pd.DataFrame, category_columns: List[str]) -> pd.DataFrame:
+    """Narrow float columns and convert low-cardinality strings to category
+
+    Floats are only narrowed to float32 when no value changes. Integer columns
+    stay int64: narrower integers overflow silently in the agent's arithmetic
+    (an int16 column times 1000 wraps around).
+
+    Args:
+        frame (pd.DataFrame): Frame to optimize in place
+        category_columns (List[str]): Columns to convert to category
+
+    Returns:
+        pd.DataFrame: The optimized frame
+    """
+    for column in frame.columns:
+        series = frame[column]
+        if column in category_columns:
+            frame[column] = series.astype("category")
+        elif pd.api.types.is_float_dtype(series.dtype) and series.dtype != np.float32:
+            narrowed = series.astype(np.float32)
+            if np.array_equal(narrowed.to_numpy(dtype=np.float64), series.to_numpy(), equal_nan=True):
+                frame[column] = narrowed
+    return frame
+
+
+def _concat_chunks(chunks: List[pd.DataFrame]) -> pd.DataFrame:
+    # Chunk categories only ever grow, so the last chunk's cover all of them;
+    # chunks only stay categorical through concat when they share categories.
+    for column, dtype in chunks[-1].dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype):
+            for chunk in chunks:
+                chunk[column] = chunk[column].cat.set_categories(dtype.categories)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def _content_hash(file_path: str) -> str:
+    # Keyed by content rather than path: uploads are re-saved under new temp
+    # names, so the same data must still hit the cache.
+    stat = os.stat(file_path)
+    key = (os.path.realpath(file_path), stat.st_size, stat.st_mtime_ns)
+    with _cache_lock:
+        digest = _hashes.get(key)
+        if digest is not None:
+            _hashes.move_to_end(key)
+            return digest
+    with open(file_path, "rb") as csv_file:
+        digest = hashlib.file_digest(csv_file, "sha1").hexdigest()
+    with _cache_lock:
+        _hashes[key] = digest
+        while len(_hashes) > HASH_INDEX_SIZE:
+            _hashes.popitem(last=False)
+    return digest
+
+
+@contextmanager
+def _pinned_entry(cache_path: Path):
+    with _cache_lock:
+        _pinned[cache_path] = _pinned.get(cache_path, 0) + 1
+    try:
+        yield
+    finally:
+        with _cache_lock:
+            _pinned[cache_path] -= 1
+            if not _pinned[cache_path]:
+                del _pinned[cache_path]
+
+
+def _remove_files(paths: List[Path]) -> None:
+    for path in paths:
+        path.unlink(missing_ok=True)
+
+
+def dataset_name_for(file_path: str) -> str:
+    """Derive a dataset name usable as a Python identifier from a file path
+
+    Args:
+        file_path (str): Path to the CSV file
+
+    Returns:
+        str: Dataset name
+    """
+    name = re.sub(r"\W+", "_", Path(file_path).stem).strip("_").lower() or "dataset"
+    return f"d_{name}" if name[0].isdigit() else name
+
+
+def dataset_names_for(file_paths: List[str]) -> List[str]:
+    """Derive distinct dataset names for files loaded together, suffixing repeated names
+
+    "sales.csv" and "Sales.csv" become "sales" and "sales_2".
+
+    Args:
+        file_paths (List[str]): Paths or names of the CSV files
+
+    Returns:
+        List[str]: Dataset name for each file, in the same order
+    """
+    names = []
+    for file_path in file_paths:
+        name = base = dataset_name_for(file_path)
+        suffix = 2
+        while name in names:
+            name = f"{base}_{suffix}"
+            suffix += 1
+        names.append(name)
+    return names
+
+
+def _read_cache(cache_path: Path, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    from pyarrow import feather
+    table = feather.read_table(cache_path, columns=columns, memory_map=True)
+    return table.to_pandas(split_blocks=True)
+
+
+def _write_cache(cache_path: Path, data: pd.DataFrame) -> None:
+    from pyarrow import feather
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    # Identical files loaded in parallel write the same entry, so each write
+    # gets its own pending file.
+    pending_path = cache_path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+    feather.write_feather(data, pending_path, compression="uncompressed")
+    os.replace(pending_path, cache_path)
+    _prune_cache()
+
+
+def _prune_cache() -> None:
+    current_prefix = f"v{CACHE_FORMAT_VERSION}_"
+    for stale in CACHE_DIR.glob("v*_*.arrow"):
+        if not stale.name.startswith(current_prefix):
+            stale.unlink(missing_ok=True)
+    with _cache_lock:
+        pinned = set(_pinned)
+    entries = []
+    for entry in CACHE_DIR.glob(f"{current_prefix}*.arrow"):
+        try:
+            entries.append((entry.stat(), entry))
+        except FileNotFoundError:
+            pass
+    total = 0
+    for stat, entry in sorted(entries, key=lambda item: item[0].st_mtime, reverse=True):
+        total += stat.st_size
+        if total > CACHE_MAX_BYTES and entry not in pinned:
+            entry.unlink(missing_ok=True)
+
+
+def _write_chunked_cache(cache_path: Path, chunks: Iterable[pd.DataFrame]) -> None:
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    pending_path = cache_path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+    writer = _ArrowChunkWriter(pending_path)
+    try:
+        for chunk in chunks:
+            writer.write(chunk)
+        writer.close()
+    except BaseException:
+        writer.close()
+        pending_path.unlink(missing_ok=True)
+        raise
+    os.replace(pending_path, cache_path)
+    _prune_cache()
+
+
+def _widen_type(current, incoming):
+    import pyarrow as pa
+    if current.equals(incoming) or pa.types.is_null(incoming):
+        return current
+    if pa.types.is_null(current):
+        return incoming
+    numeric = [pa.types.is_integer(t) or pa.types.is_floating(t) for t in (current, incoming)]
+    if all(numeric):
+        return pa.int64() if all(pa.types.is_integer(t) for t in (current, incoming)) else pa.float64()
+    return pa.large_string()
+
+
+# Appends chunks to an Arrow IPC file as record batches, so a large CSV is
+# never held in memory as a whole. pandas infers dtypes per chunk: when a
+# later chunk needs a wider type (an int column that now has gaps, a float
+# that no longer fits float32), the batches written so far are rewritten
+# with the wider schema from the file itself.
+class _ArrowChunkWriter:
+    def __init__(self, path: Path):
+        self.path = path
+        self.schema = None
+        self._writer = None
+
+    def _open(self, schema) -> None:
+        import pyarrow as pa
+        self.schema = schema
+        # Categories grow from chunk to chunk; deltas append the new values
+        # to the dictionary instead of repeating it.
+        options = pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+        self._writer = pa.ipc.new_file(str(self.path), schema, options=options)
+
+    def write(self, chunk: pd.DataFrame) -> None:
+        import pyarrow as pa
+        table = pa.Table.from_pandas(chunk, preserve_index=False).replace_schema_metadata(None)
+        if self._writer is None:
+            self._open(table.schema)
+        elif not table.schema.equals(self.schema):
+            fields = []
+            for field in self.schema:
+                column = table.column(field.name)
+                # A chunk with no values in a column says nothing about its type.
+                if column.null_count < len(column):
+                    field = field.with_type(_widen_type(field.type, column.type))
+                fields.append(field)
+            schema = pa.schema(fields)
+            if not schema.equals(self.schema):
+                self._rewrite(schema)
+            table = table.cast(schema)
+        self._writer.write_table(table)
 
+    def _rewrite(self, schema) -> None:
+        import pyarrow as pa
+        self._writer.close()
+        previous = self.path.with_suffix(".widen")
+        os.replace(self.path, previous)
+        try:
+            self._open(schema)
+            with pa.memory_map(str(previous)) as source:
+                reader = pa.ipc.open_file(source)
+                for index in range(reader.num_record_batches):
+                    self._writer.write_table(pa.Table.from_batches([reader.get_batch(index)]).cast(schema))
+        finally:
+            previous.unlink(missing_ok=True)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+class Dataset:
+    def __init__(self, name: str, file_path: str, version: str, frame: pd.DataFrame, cache_path: Optional[Path]):
+        self.name = name
+        self.file_path = file_path
+        self.version = version
+        self.frame: Optional[pd.DataFrame] = frame
+        self.cache_path = cache_path
+        self.spill_path: Optional[Path] = None
+        self.memory_bytes = estimate_memory_bytes(frame)
+
+    @property
+    def in_memory(self) -> bool:
+        return self.frame is not None
+
+
+# A workspace of named datasets for one session. Datasets are kept in LRU
+# order; when the loaded ones exceed the memory budget, the least recently
+# used are dropped from memory and mapped back from disk on next use.
 class CSVDataAnalyzer:
-    def __init__(self):
-        self.data: Optional[pd.DataFrame] = None
-        self.file_path: Optional[str] = None
+    def __init__(self, memory_budget_bytes: int = SESSION_MEMORY_BYTES):
+        self.datasets: "OrderedDict[str, Dataset]" = OrderedDict()
+        self.active: Optional[str] = None
+        self.memory_budget_bytes = memory_budget_bytes
+        self._spill_paths: List[Path] = []
+        self._schema_cache: Tuple[tuple, str] = ((), "")
+        weakref.finalize(self, _remove_files, self._spill_paths)
+
+    @property
+    def data(self) -> Optional[pd.DataFrame]:
+        return self.get() if self.active else None
+
+    @property
+    def file_path(self) -> Optional[str]:
+        return self.datasets[self.active].file_path if self.active else None
+
+    def _read_small(self, file_path: str) -> pd.DataFrame:
+        engine = "pyarrow" if HAS_PYARROW else "c"
+        data = pd.read_csv(file_path, engine=engine)
+        return optimize_dtypes(data, infer_category_columns(data.head(DTYPE_SAMPLE_ROWS)))
+
+    def _read_chunks(self, file_path: str) -> Iterator[pd.DataFrame]:
+        sample = pd.read_csv(file_path, nrows=DTYPE_SAMPLE_ROWS)
+        category_columns = infer_category_columns(sample)
+        # Each chunk's categories extend the previous chunk's, in order of
+        # first appearance, so chunks can be written as one dictionary.
+        categories = {column: pd.Index(sample[column].dropna().unique()) for column in category_columns}
+        chunks = pd.read_csv(file_path, chunksize=CHUNK_ROWS, low_memory=False,
+                             dtype={column: str for column in category_columns})
+        for chunk in chunks:
+            for column, known in categories.items():
+                values = chunk[column]
+                known = categories[column] = known.append(pd.Index(values.dropna().unique()).difference(known))
+                chunk[column] = pd.Categorical(values, categories=known)
+            yield optimize_dtypes(chunk, [])
+
+    def _parse_csv(self, file_path: str, cache_path: Optional[Path] = None) -> pd.DataFrame:
+        # Large files are written to the cache chunk by chunk and mapped back
+        # from it, instead of being concatenated in memory.
+        if os.path.getsize(file_path) < LARGE_FILE_BYTES:
+            data = self._read_small(file_path)
+            if cache_path is not None:
+                _write_cache(cache_path, data)
+            return data
+        if cache_path is None:
+            return _concat_chunks(list(self._read_chunks(file_path)))
+        _write_chunked_cache(cache_path, self._read_chunks(file_path))
+        return _read_cache(cache_path)
 
-    def load_csv(self, file_path: str) -> Dict[str, Any]:
+    def load_csv(self, file_path: str, name: Optional[str] = None, optimize: bool = True) -> Dict[str, Any]:
+        """Load a CSV file into the workspace as a named dataset, inferring compact dtypes
+
+        Files above CSV_LARGE_FILE_MB are parsed in chunks. With pyarrow
+        installed, the parsed data is cached as uncompressed Arrow IPC under
+        the hash of the file contents, so loading the same data again maps
+        the cache instead of parsing the CSV. Chunks of large files are
+        written straight to the cache, which is then memory-mapped.
+
+        The loaded dataset becomes the active one. Loading under an existing
+        name replaces that dataset.
+
+        Args:
+            file_path (str): Path to the CSV file
+            name (Optional[str], optional): Dataset name. Defaults to one derived from the file name.
+            optimize (bool, optional): Infer compact dtypes. Defaults to True.
+
+        Returns:
+            Dict[str, Any]: Load result with shape, columns, dtypes, sample, timing and memory
+        """
         try:
-            self.data = pd.read_csv(file_path)
-            self.file_path = file_path
-            return {
-                "success": True,
-                "shape": self.data.shape,
-                "columns": list(self.data.columns),
-                "dtypes": self.data.dtypes.to_dict(),
-                "sample": self.data.head().to_dict(),
-            }
+            start = time.perf_counter()
+            return self._add(name or dataset_name_for(file_path), file_path, *self._read(file_path, optimize), start)
         except Exception as e:
             return {"success": False, "error": str(e)}
+
+    def load_csvs(self, files: Dict[str, str], optimize: bool = True) -> Dict[str, Dict[str, Any]]:
+        """Load several CSV files at once, parsing them in parallel
+
+        Args:
+            files (Dict[str, str]): CSV file path by dataset name
+            optimize (bool, optional): Infer compact dtypes. Defaults to True.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Load result (as returned by load_csv) by dataset name
+        """
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, min(len(files), LOAD_WORKERS))) as executor:
+            reads = {name: executor.submit(self._read, file_path, optimize) for name, file_path in files.items()}
+        results = {}
+        for name, read in reads.items():
+            try:
+                results[name] = self._add(name, files[name], *read.result(), start)
+            except Exception as e:
+                results[name] = {"success": False, "error": str(e)}
+        return results
+
+    def _read(self, file_path: str, optimize: bool) -> Tuple[pd.DataFrame, str, Optional[Path], str]:
+        # Touches no workspace state, so several files can be read at once.
+        source = "csv"
+        cache_path = None
+        version = f"{file_path}:{os.stat(file_path).st_mtime_ns}"
+        if not optimize:
+            data = pd.read_csv(file_path)
+        elif not HAS_PYARROW:
+            data = self._parse_csv(file_path)
+        else:
+            version = _content_hash(file_path)
+            cache_path = CACHE_DIR / f"v{CACHE_FORMAT_VERSION}_{version}.arrow"
+            with _pinned_entry(cache_path):
+                if cache_path.exists():
+                    data = _read_cache(cache_path)
+                    cache_path.touch()
+                    source = "arrow cache"
+                else:
+                    data = self._parse_csv(file_path, cache_path)
+        return data, version, cache_path, source
+
+    def _add(self, name: str, file_path: str, data: pd.DataFrame, version: str,
+             cache_path: Optional[Path], source: str, start: float) -> Dict[str, Any]:
+        self.remove(name)
+        dataset = Dataset(name, file_path, version, data, cache_path)
+        self.datasets[name] = dataset
+        self.active = name
+        profile_in_background(version, data)
+        self._enforce_budget(keep=name)
+        return {
+            "success": True,
+            "name": name,
+            "shape": data.shape,
+            "columns": list(data.columns),
+            "dtypes": data.dtypes.to_dict(),
+            "sample": data.head().to_dict(),
+            "source": source,
+            "load_seconds": round(time.perf_counter() - start, 2),
+            "memory_mb": round(dataset.memory_bytes / 1024 ** 2, 1),
+        }
+
+    def resolve(self, name: Optional[str] = None) -> Dataset:
+        """Look up a dataset by name
+
+        Args:
+            name (Optional[str], optional): Dataset name. Defaults to the active dataset.
+
+        Raises:
+            KeyError: If no dataset with that name is loaded
+
+        Returns:
+            Dataset: The dataset
+        """
+        name = name or self.active
+        if name not in self.datasets:
+            loaded = ", ".join(self.datasets) or "none"
+            raise KeyError(f"Dataset '{name}' is not loaded. Loaded datasets: {loaded}")
+        return self.datasets[name]
+
+    def get(self, name: Optional[str] = None) -> pd.DataFrame:
+        """Return a dataset's frame, reading it back from disk if it was evicted
+
+        Args:
+            name (Optional[str], optional): Dataset name. Defaults to the active dataset.
+
+        Returns:
+            pd.DataFrame: The dataset's frame
+        """
+        dataset = self.resolve(name)
+        self.datasets.move_to_end(dataset.name)
+        if dataset.frame is None:
+            dataset.frame = _read_cache(dataset.spill_path)
+            self._enforce_budget(keep=dataset.name)
+        return dataset.frame
+
+    def profile(self, name: Optional[str] = None) -> DatasetProfile:
+        """Return the cached profile of a dataset
+
+        Args:
+            name (Optional[str], optional): Dataset name. Defaults to the active dataset.
+
+        Returns:
+            DatasetProfile: Profile computed when the dataset was loaded
+        """
+        dataset = self.resolve(name)
+        return get_profile(dataset.version, lambda: self.get(dataset.name))
+
+    def schema_text(self) -> str:
+        """Describe every loaded dataset's shape, columns and dtypes, for the agent's context
+
+        Returns:
+            str: One line per dataset
+        """
+        key = tuple((dataset.name, dataset.version) for dataset in self.datasets.values())
+        if self._schema_cache[0] != key:
+            lines = []
+            for dataset in self.datasets.values():
+                profile = self.profile(dataset.name)
+                columns = ", ".join(f"{column} ({dtype})" for column, dtype in profile.dtypes.items())
+                lines.append(f"- {dataset.name}: {profile.shape[0]} rows; columns: {columns}")
+            self._schema_cache = (key, "\n".join(lines))
+        return self._schema_cache[1]
+
+    def list_datasets(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "name": dataset.name,
+                "file_path": dataset.file_path,
+                "active": dataset.name == self.active,
+                "in_memory": dataset.in_memory,
+                "memory_mb": round(dataset.memory_bytes / 1024 ** 2, 1),
+            }
+            for dataset in self.datasets.values()
+        ]
+
+    def remove(self, name: str) -> None:
+        dataset = self.datasets.pop(name, None)
+        if dataset is None:
+            return
+        if dataset.spill_path is not None:
+            dataset.spill_path.unlink(missing_ok=True)
+            self._spill_paths.remove(dataset.spill_path)
+        if self.active == name:
+            self.active = next(reversed(self.datasets), None)
+
+    def _enforce_budget(self, keep: str) -> None:
+        resident = sum(dataset.memory_bytes for dataset in self.datasets.values() if dataset.in_memory)
+        for dataset in list(self.datasets.values()):
+            if resident <= self.memory_budget_bytes:
+                break
+            if dataset.name != keep and dataset.in_memory:
+                self._evict(dataset)
+                resident -= dataset.memory_bytes
+
+    def _evict(self, dataset: Dataset) -> None:
+        self._ensure_spill_file(dataset)
+        dataset.frame = None
+
+    def _ensure_spill_file(self, dataset: Dataset) -> Path:
+        if dataset.spill_path is None:
+            # The content cache can be pruned, so datasets get their own file:
+            # a hard link to the cache entry when there is one.
+            spill_path = CACHE_DIR / f"spill_{uuid.uuid4().hex}.arrow"
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            if dataset.cache_path is not None and dataset.cache_path.exists():
+                os.link(dataset.cache_path, spill_path)
+            else:
+                from pyarrow import feather
+                feather.write_feather(dataset.frame, spill_path, compression="uncompressed")
+            dataset.spill_path = spill_path
+            self._spill_paths.append(spill_path)
+        return dataset.spill_path
+
+    def arrow_path(self, name: Optional[str] = None) -> str:
+        """Return an Arrow file holding a dataset, for processes that map the data themselves
+
+        Args:
+            name (Optional[str], optional): Dataset name. Defaults to the active dataset.
+
+        Returns:
+            str: Path of the Arrow file
+        """
+        return str(self._ensure_spill_file(self.resolve(name)))
+
+    def read_columns(self, columns: List[str], name: Optional[str] = None) -> pd.DataFrame:
+        """Read only the given columns of a dataset, from disk when it has a cache or spill file
+
+        Args:
+            columns (List[str]): Columns to read
+            name (Optional[str], optional): Dataset name. Defaults to the active dataset.
+
+        Returns:
+            pd.DataFrame: Frame with the requested columns
+        """
+        dataset = self.resolve(name)
+        for path in (dataset.spill_path, dataset.cache_path):
+            if path is None:
+                continue
+            with _pinned_entry(path):
+                if path.exists():
+                    return _read_cache(path, columns)
+        return self.get(dataset.name)[columns]
@@ -0,0 +1,141 @@
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
+
+logger = logging.getLogger(__name__)
+
+HISTORY_TOKEN_BUDGET = int(os.getenv("CSV_HISTORY_TOKENS", "6000"))
+# Rough token estimate: no tokenizer call per turn, and close enough for a budget.
+CHARS_PER_TOKEN = 4
+SUMMARY_MAX_CHARS = 4000
+
+SUMMARY_PROMPT = """Update the running summary of a data analysis conversation between a user and an assistant.
+Keep the questions asked, the datasets and columns involved, the findings with their key numbers, and the names of any generated plot files.
+Reply with the updated summary only.
+
+Current summary:
+{summary}
+
+New conversation to add:
+{conversation}"""
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="history-summary")
+
+
+def _message_text(message: BaseMessage) -> str:
+    content = message.content if isinstance(message.content, str) else str(message.content)
+    if isinstance(message, HumanMessage):
+        return f"User: {content}"
+    if isinstance(message, ToolMessage):
+        return f"Tool result ({message.name}): {content}"
+    if isinstance(message, AIMessage) and message.tool_calls:
+        calls = ", ".join(f"{call['name']}({call['args']})" for call in message.tool_calls)
+        return f"Assistant called: {calls}"
+    return f"Assistant: {content}"
+
+
+def _turn_tokens(turn: List[BaseMessage]) -> int:
+    return sum(len(_message_text(message)) for message in turn) // CHARS_PER_TOKEN + 1
+
+
+class ChatHistory:
+    """Chat history for the CSV agent, bounded by a token budget
+
+    Recent turns are kept verbatim. Once they exceed the budget, the oldest
+    ones are folded into a running summary by the LLM on a background thread;
+    until that finishes they are still sent verbatim. Without an LLM the
+    oldest turns are dropped instead. The summary and the dataset schema go
+    into one system message at the start of the history.
+    """
+
+    def __init__(self, llm: Optional[BaseChatModel] = None, token_budget: int = HISTORY_TOKEN_BUDGET):
+        self.llm = llm
+        self.token_budget = token_budget
+        self.summary = ""
+        self._turns: List[List[BaseMessage]] = []
+        self._summarizing: List[List[BaseMessage]] = []
+        self._summary_future: Optional[Future] = None
+        self._lock = threading.Lock()
+
+    def add_turn(self, messages: List[BaseMessage]) -> None:
+        """Record one exchange: a user message and everything the agent answered with
+
+        Args:
+            messages (List[BaseMessage]): Messages of the exchange, in order
+        """
+        with self._lock:
+            self._turns.append(list(messages))
+            self._apply_finished_summary()
+            self._start_summary_if_needed()
+
+    def messages(self, dataset_schema: Optional[str] = None) -> List[BaseMessage]:
+        """Build the chat_history to send with the next agent call
+
+        Args:
+            dataset_schema (Optional[str], optional): Current datasets and their columns
+
+        Returns:
+            List[BaseMessage]: Context message followed by the turns kept verbatim
+        """
+        with self._lock:
+            self._apply_finished_summary()
+            context = []
+            if dataset_schema:
+                context.append(f"Loaded datasets:\n{dataset_schema}")
+            if self.summary:
+                context.append(f"Summary of the earlier conversation:\n{self.summary}")
+            history: List[BaseMessage] = [SystemMessage(content="\n\n".join(context))] if context else []
+            for turn in self._summarizing + self._turns:
+                history.extend(turn)
+            return history
+
+    def clear(self) -> None:
+        with self._lock:
+            self.summary = ""
+            self._turns = []
+            self._summarizing = []
+            self._summary_future = None
+
+    def _apply_finished_summary(self) -> None:
+        future = self._summary_future
+        if future is None or not future.done():
+            return
+        try:
+            self.summary = future.result()
+        except Exception as e:
+            logger.warning("History summary failed, keeping a truncated transcript: %s", e)
+            transcript = "\n".join(_message_text(message) for turn in self._summarizing for message in turn)
+            self.summary = f"{self.summary}\n{transcript}"[-SUMMARY_MAX_CHARS:]
+        self._summarizing = []
+        self._summary_future = None
+
+    def _start_summary_if_needed(self) -> None:
+        if self._summary_future is not None:
+            return
+        total = sum(_turn_tokens(turn) for turn in self._turns)
+        if total <= self.token_budget:
+            return
+        if self.llm is None:
+            while len(self._turns) > 1 and total > self.token_budget:
+                total -= _turn_tokens(self._turns.pop(0))
+            return
+        # Roll down to half the budget so the next summary is several turns away.
+        rolled = []
+        while len(self._turns) > 1 and total > self.token_budget // 2:
+            turn = self._turns.pop(0)
+            total -= _turn_tokens(turn)
+            rolled.append(turn)
+        self._summarizing = rolled
+        self._summary_future = _executor.submit(self._summarize, self.summary, rolled)
+
+    def _summarize(self, summary: str, turns: List[List[BaseMessage]]) -> str:
+        conversation = "\n".join(_message_text(message) for turn in turns for message in turn)
+        prompt = SUMMARY_PROMPT.format(summary=summary or "(none yet)", conversation=conversation)
+        response = self.llm.invoke([HumanMessage(content=prompt)])
+        text = response.content if isinstance(response.content, str) else str(response.content)
+        return text[:SUMMARY_MAX_CHARS]
@@ -2,18 +2,29 @@ from pydantic import BaseModel, Field
 from typing import List, Optional
 
 
+DATASET_DESCRIPTION = "Name of the dataset to use (optional, defaults to the most recently loaded dataset)"
+
+
 class LoadCSVInput(BaseModel):
     file_path: str = Field(description="Path to the CSV file to load")
+    name: Optional[str] = Field(
+        default=None, description="Name for the dataset (optional, defaults to one derived from the file name)"
+    )
 
 
-class DataInfoInput(BaseModel):
+class ListDatasetsInput(BaseModel):
     pass
 
 
+class DataInfoInput(BaseModel):
+    dataset: Optional[str] = Field(default=None, description=DATASET_DESCRIPTION)
+
+
 class DescribeDataInput(BaseModel):
     columns: Optional[List[str]] = Field(
         default=None, description="Specific columns to describe (optional)"
     )
+    dataset: Optional[str] = Field(default=None, description=DATASET_DESCRIPTION)
 
 
 class VisualizationInput(BaseModel):
@@ -23,12 +34,17 @@ class VisualizationInput(BaseModel):
     x_column: Optional[str] = Field(default=None, description="X-axis column")
     y_column: Optional[str] = Field(default=None, description="Y-axis column")
     title: Optional[str] = Field(default=None, description="Plot title")
+    dataset: Optional[str] = Field(default=None, description=DATASET_DESCRIPTION)
 
 
 class PandasCodeInput(BaseModel):
     code: str = Field(
-        description="Pandas code to execute. Use 'df' to reference the loaded DataFrame. Code should be safe and not modify the original data permanently."
+        description="Pandas code to execute. Use 'df' to reference the selected DataFrame and dfs['name'] for any loaded dataset. Code should be safe and not modify the original data permanently."
     )
     description: Optional[str] = Field(
         default=None, description="Brief description of what this code does"
     )
+    dataset: Optional[str] = Field(
+        default=None,
+        description="Name of the dataset available as 'df' (optional, defaults to the most recently loaded dataset)",
+    )
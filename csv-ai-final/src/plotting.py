@@ -0,0 +1,154 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np
+import pandas as pd
+import seaborn as sns
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+PLOT_DPI = int(os.getenv("CSV_PLOT_DPI", "120"))
+# Above this many points a scatter plot becomes a hexbin density plot (or a
+# random sample when a column is not numeric), and box plot outliers are
+# drawn from a sample.
+SCATTER_MAX_POINTS = int(os.getenv("CSV_PLOT_MAX_POINTS", "50000"))
+PLOT_CACHE_SIZE = 128
+
+_figures = threading.local()
+_rendered: "OrderedDict[Hashable, Tuple[str, Optional[str]]]" = OrderedDict()
+_rendered_lock = threading.Lock()
+
+
+def _figure() -> Figure:
+    # One figure per thread, cleared between plots, instead of a new pyplot
+    # figure (and its global-state bookkeeping) for every call.
+    figure = getattr(_figures, "figure", None)
+    if figure is None:
+        figure = _figures.figure = Figure(figsize=(10, 6))
+        FigureCanvasAgg(figure)
+    figure.clear()
+    return figure
+
+
+def _sample(frame, limit: int):
+    return frame.sample(limit, random_state=0) if len(frame) > limit else frame
+
+
+def render_plot(
+    data: pd.DataFrame,
+    plot_type: str,
+    x_column: Optional[str],
+    y_column: Optional[str],
+    title: Optional[str],
+    filename: str,
+) -> Optional[str]:
+    """Render a plot of a dataset to a PNG file
+
+    Args:
+        data (pd.DataFrame): Dataset to plot
+        plot_type (str): histogram, scatter, bar, box or heatmap
+        x_column (Optional[str]): X-axis column
+        y_column (Optional[str]): Y-axis column
+        title (Optional[str]): Plot title
+        filename (str): Path of the PNG to write
+
+    Raises:
+        ValueError: If the plot type is unknown or its columns are missing
+
+    Returns:
+        Optional[str]: Note on how the data was reduced for plotting, if it was
+    """
+    figure = _figure()
+    ax = figure.add_subplot()
+    note = None
+    if plot_type == "histogram":
+        if not x_column:
+            raise ValueError("Histogram requires x_column parameter")
+        ax.hist(data[x_column].dropna(), bins=30, alpha=0.7)
+        ax.set_xlabel(x_column)
+        ax.set_ylabel("Frequency")
+    elif plot_type == "scatter":
+        if not (x_column and y_column):
+            raise ValueError("Scatter plot requires both x_column and y_column parameters")
+        points = data[[x_column, y_column]].dropna()
+        numeric = all(pd.api.types.is_numeric_dtype(points[column]) for column in points.columns)
+        if len(points) > SCATTER_MAX_POINTS and numeric:
+            hexbin = ax.hexbin(points[x_column], points[y_column], gridsize=80, mincnt=1, bins="log", cmap="viridis")
+            figure.colorbar(hexbin, ax=ax, label="Count (log)")
+            note = f"{len(points)} points drawn as a hexbin density plot"
+        else:
+            if len(points) > SCATTER_MAX_POINTS:
+                note = f"random sample of {SCATTER_MAX_POINTS} of {len(points)} points"
+            points = _sample(points, SCATTER_MAX_POINTS)
+            ax.scatter(points[x_column], points[y_column], alpha=0.6, s=8 if note else None)
+        ax.set_xlabel(x_column)
+        ax.set_ylabel(y_column)
+    elif plot_type == "bar":
+        if not x_column:
+            raise ValueError("Bar plot requires x_column parameter")
+        value_counts = data[x_column].value_counts().head(10)
+        ax.bar(range(len(value_counts)), value_counts.values)
+        ax.set_xticks(range(len(value_counts)), [str(value) for value in value_counts.index], rotation=45)
+        ax.set_xlabel(x_column)
+        ax.set_ylabel("Count")
+    elif plot_type == "box":
+        if not x_column:
+            raise ValueError("Box plot requires x_column parameter")
+        values = data[x_column].dropna()
+        if len(values) > SCATTER_MAX_POINTS:
+            note = f"outliers drawn from a random sample of {SCATTER_MAX_POINTS} of {len(values)} values"
+            q1, median, q3 = values.quantile([0.25, 0.5, 0.75])
+            low, high = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+            inside = values[(values >= low) & (values <= high)]
+            sampled = _sample(values, SCATTER_MAX_POINTS)
+            ax.bxp([{
+                "med": median, "q1": q1, "q3": q3, "whislo": inside.min(), "whishi": inside.max(),
+                "fliers": sampled[(sampled < low) | (sampled > high)].to_numpy(),
+            }])
+        else:
+            ax.boxplot(values)
+        ax.set_xticks([1], [x_column])
+        ax.grid(True)
+        ax.set_ylabel(x_column)
+    elif plot_type == "heatmap":
+        numeric_data = data.select_dtypes(include=[np.number])
+        if numeric_data.empty:
+            raise ValueError("No numeric columns found for heatmap")
+        sns.heatmap(numeric_data.corr(), annot=True, cmap="coolwarm", center=0, ax=ax)
+    else:
+        raise ValueError(f"Unsupported plot type: {plot_type}")
+    if title:
+        ax.set_title(title)
+    figure.tight_layout()
+    figure.savefig(filename, dpi=PLOT_DPI)
+    return note
+
+
+def cached_plot(key: Hashable) -> Optional[Tuple[str, Optional[str]]]:
+    """Return a plot already rendered for this key, if its file still exists
+
+    Args:
+        key (Hashable): Dataset version and plot spec
+
+    Returns:
+        Optional[Tuple[str, Optional[str]]]: Path of the rendered PNG and the render note
+    """
+    with _rendered_lock:
+        rendered = _rendered.get(key)
+        if rendered is None or not os.path.exists(rendered[0]):
+            return None
+        _rendered.move_to_end(key)
+        return rendered
+
+
+def remember_plot(key: Hashable, filename: str, note: Optional[str]) -> None:
+    with _rendered_lock:
+        _rendered[key] = (filename, note)
+        while len(_rendered) > PLOT_CACHE_SIZE:
+            _rendered.popitem(last=False)
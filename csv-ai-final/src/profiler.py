@@ -0,0 +1,154 @@
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+# Above this many rows, quantiles, string memory and top values of string
+# columns are estimated from a random sample instead of a full scan.
+PROFILE_SAMPLE_ROWS = 200_000
+TOP_VALUES = 5
+PROFILE_CACHE_SIZE = 32
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dataset-profile")
+_profiles: "OrderedDict[str, Future]" = OrderedDict()
+_profiles_lock = Lock()
+
+
+class DatasetProfile:
+    def __init__(
+        self,
+        shape: tuple,
+        dtypes: Dict[str, Any],
+        null_counts: Dict[str, int],
+        memory_bytes: int,
+        numeric_summary: pd.DataFrame,
+        top_values: Dict[str, Dict[Any, int]],
+        approximate: bool,
+    ):
+        self.shape = shape
+        self.columns = list(dtypes)
+        self.dtypes = dtypes
+        self.null_counts = null_counts
+        self.memory_bytes = memory_bytes
+        self.numeric_summary = numeric_summary
+        self.top_values = top_values
+        self.approximate = approximate
+
+
+def _sample(frame: pd.DataFrame) -> pd.DataFrame:
+    if len(frame) <= PROFILE_SAMPLE_ROWS:
+        return frame
+    return frame.sample(PROFILE_SAMPLE_ROWS, random_state=0)
+
+
+def _string_columns(frame: pd.DataFrame) -> List[str]:
+    return list(frame.select_dtypes(include=["object", "string"]).columns)
+
+
+def estimate_memory_bytes(frame: pd.DataFrame) -> int:
+    """Estimate the deep memory use of a frame
+
+    Strings are only measured on a sample for large frames, since a deep scan
+    visits every Python string.
+
+    Args:
+        frame (pd.DataFrame): Frame to measure
+
+    Returns:
+        int: Estimated size in bytes
+    """
+    string_columns = _string_columns(frame)
+    if len(frame) <= PROFILE_SAMPLE_ROWS or not string_columns:
+        return int(frame.memory_usage(deep=True).sum())
+    shallow = frame.memory_usage(deep=False)
+    sample_usage = _sample(frame[string_columns]).memory_usage(deep=True, index=False)
+    scale = len(frame) / PROFILE_SAMPLE_ROWS
+    return int(shallow.drop(string_columns).sum() + (sample_usage * scale).sum())
+
+
+def _numeric_summary(numeric: pd.DataFrame, sample: pd.DataFrame) -> pd.DataFrame:
+    if numeric.empty:
+        return pd.DataFrame()
+    exact = numeric.agg(["count", "mean", "std", "min", "max"])
+    quantiles = sample[numeric.columns].quantile([0.25, 0.5, 0.75])
+    quantiles.index = ["25%", "50%", "75%"]
+    return pd.concat([exact.loc[["count", "mean", "std", "min"]], quantiles, exact.loc[["max"]]])
+
+
+def _top_values(frame: pd.DataFrame, sample: pd.DataFrame) -> Dict[str, Dict[Any, int]]:
+    top_values = {}
+    scale = len(frame) / len(sample) if len(sample) else 1.0
+    for column in frame.select_dtypes(include=["object", "string", "category"]).columns:
+        if isinstance(frame[column].dtype, pd.CategoricalDtype):
+            # Counting category codes is cheap, so these stay exact.
+            counts = frame[column].value_counts().head(TOP_VALUES)
+        else:
+            counts = sample[column].value_counts().head(TOP_VALUES)
+            if scale > 1 and counts.max() <= 1:
+                # Every sampled value is distinct: scaling up says nothing useful.
+                counts = counts.iloc[:0]
+            counts = (counts * scale).round().astype(int)
+        top_values[column] = counts.to_dict()
+    return top_values
+
+
+def profile_dataset(frame: pd.DataFrame) -> DatasetProfile:
+    """Compute everything get_data_info and describe_data report, once per dataset version
+
+    Args:
+        frame (pd.DataFrame): Frame to profile
+
+    Returns:
+        DatasetProfile: The profile
+    """
+    sample = _sample(frame)
+    numeric = frame.select_dtypes(include=[np.number])
+    return DatasetProfile(
+        shape=frame.shape,
+        dtypes=frame.dtypes.to_dict(),
+        null_counts={column: int(count) for column, count in frame.isnull().sum().items()},
+        memory_bytes=estimate_memory_bytes(frame),
+        numeric_summary=_numeric_summary(numeric, sample),
+        top_values=_top_values(frame, sample),
+        approximate=sample is not frame,
+    )
+
+
+def profile_in_background(version: str, frame: pd.DataFrame) -> Future:
+    """Start profiling a dataset version, or return the profile already computed for it
+
+    Args:
+        version (str): Dataset version (content hash) the profile is cached under
+        frame (pd.DataFrame): Frame to profile
+
+    Returns:
+        Future: Resolves to the DatasetProfile
+    """
+    with _profiles_lock:
+        future = _profiles.get(version)
+        if future is None or (future.done() and future.exception() is not None):
+            future = _profiles[version] = _executor.submit(profile_dataset, frame)
+        _profiles.move_to_end(version)
+        while len(_profiles) > PROFILE_CACHE_SIZE:
+            _profiles.popitem(last=False)
+        return future
+
+
+def get_profile(version: str, load_frame: Callable[[], pd.DataFrame]) -> DatasetProfile:
+    """Return the profile of a dataset version, waiting for a background run in progress
+
+    Args:
+        version (str): Dataset version
+        load_frame (Callable[[], pd.DataFrame]): Returns the frame to profile if no profile is cached
+
+    Returns:
+        DatasetProfile: The profile
+    """
+    with _profiles_lock:
+        future = _profiles.get(version)
+    if future is None or (future.done() and future.exception() is not None):
+        future = profile_in_background(version, load_frame())
+    return future.result()
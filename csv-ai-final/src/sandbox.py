@@ -0,0 +1,312 @@
+import ast
+import io
+import multiprocessing
+import os
+import queue
+import resource
+import signal
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Mapping
+from contextlib import redirect_stdout
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+CODE_WORKERS = int(os.getenv("CSV_CODE_WORKERS", "2"))
+CODE_CPU_SECONDS = int(os.getenv("CSV_CODE_CPU_SECONDS", "60"))
+CODE_TIMEOUT_SECONDS = float(os.getenv("CSV_CODE_TIMEOUT_SECONDS", "120"))
+CODE_MEMORY_BYTES = int(os.getenv("CSV_CODE_MEMORY_MB", "4096")) * 1024 * 1024
+WORKER_FRAME_CACHE_SIZE = 4
+POLL_SECONDS = 0.1
+
+_worker_frames: "OrderedDict[str, Any]" = OrderedDict()
+
+SAFE_BUILTINS = {
+    "len": len,
+    "str": str,
+    "int": int,
+    "float": float,
+    "bool": bool,
+    "list": list,
+    "dict": dict,
+    "tuple": tuple,
+    "set": set,
+    "min": min,
+    "max": max,
+    "sum": sum,
+    "abs": abs,
+    "round": round,
+    "sorted": sorted,
+    "range": range,
+    "enumerate": enumerate,
+    "zip": zip,
+    "print": print,
+    "type": type,
+}
+
+
+class CodeLimitExceeded(Exception):
+    pass
+
+
+def run_snippet(code: str, namespace: Dict[str, Any]) -> Tuple[str, Any]:
+    """Run a code snippet once, capturing stdout and the value of a trailing expression
+
+    Args:
+        code (str): Python code to run
+        namespace (Dict[str, Any]): Globals the code runs with
+
+    Returns:
+        Tuple[str, Any]: Captured output and the value of the last expression (None if the code ends with a statement)
+    """
+    module = ast.parse(code, mode="exec")
+    last_expression = None
+    if module.body and isinstance(module.body[-1], ast.Expr):
+        last_expression = ast.Expression(module.body.pop().value)
+
+    captured_output = io.StringIO()
+    with redirect_stdout(captured_output):
+        exec(compile(module, "<pandas_code>", "exec"), namespace)
+        value = eval(compile(last_expression, "<pandas_code>", "eval"), namespace) if last_expression else None
+    return captured_output.getvalue(), value
+
+
+class _WorkerFrames(Mapping):
+    # Datasets arrive as Arrow files and are memory-mapped, so every worker
+    # shares the parent's page cache instead of holding its own copy. A
+    # dataset's path is only asked from the parent when the code uses it, so
+    # datasets the code never touches are not written to disk.
+    def __init__(self, names: List[str], connection):
+        self._names = names
+        self._connection = connection
+
+    def _path(self, name: str) -> str:
+        self._connection.send({"arrow_path": name})
+        reply = self._connection.recv()
+        if "error" in reply:
+            raise KeyError(reply["error"])
+        return reply["path"]
+
+    def __getitem__(self, name: str):
+        if name not in self._names:
+            raise KeyError(f"Dataset '{name}' is not loaded. Loaded datasets: {', '.join(self._names)}")
+        path = self._path(name)
+        frame = _worker_frames.get(path)
+        if frame is None:
+            from pyarrow import feather
+            frame = _worker_frames[path] = feather.read_table(path, memory_map=True).to_pandas(split_blocks=True)
+            while len(_worker_frames) > WORKER_FRAME_CACHE_SIZE:
+                _worker_frames.popitem(last=False)
+        _worker_frames.move_to_end(path)
+        return frame.copy(deep=False)
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+
+def _raise_cpu_limit(signum, frame):
+    raise CodeLimitExceeded("CPU time limit exceeded")
+
+
+def _format_value(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    return value.to_string() if hasattr(value, "to_string") else str(value)
+
+
+def _execute(task: Dict[str, Any], connection) -> Dict[str, Any]:
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import numpy as np
+    import pandas as pd
+    import seaborn as sns
+
+    frames = _WorkerFrames(task["datasets"], connection)
+    namespace = {
+        "df": frames[task["dataset"]],
+        "dfs": frames,
+        "pd": pd,
+        "np": np,
+        "plt": plt,
+        "sns": sns,
+        "__builtins__": SAFE_BUILTINS,
+    }
+
+    used = resource.getrusage(resource.RUSAGE_SELF)
+    cpu_limit = int(used.ru_utime + used.ru_stime) + task["cpu_seconds"]
+    hard_limit = resource.getrlimit(resource.RLIMIT_CPU)[1]
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_limit, hard_limit))
+    try:
+        output, value = run_snippet(task["code"], namespace)
+        result = {"output": output, "value": _format_value(value), "plot": None, "plot_error": None}
+        if task["save_plot"] and plt.get_fignums():
+            try:
+                timestamp = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
+                filename = f"custom_plot_{timestamp}_{uuid.uuid4().hex[:6]}.png"
+                plt.tight_layout()
+                plt.savefig(filename, dpi=task["dpi"])
+                result["plot"] = filename
+            except Exception as plot_error:
+                result["plot_error"] = str(plot_error)
+        return result
+    finally:
+        resource.setrlimit(resource.RLIMIT_CPU, (resource.RLIM_INFINITY, hard_limit))
+        plt.close("all")
+
+
+def _worker_main(connection) -> None:
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGXCPU, _raise_cpu_limit)
+    while True:
+        task = connection.recv()
+        if task is None:
+            return
+        try:
+            connection.send(_execute(task, connection))
+        except MemoryError:
+            connection.send({"error": "Out of memory while running the code"})
+        except Exception as e:
+            connection.send({"error": str(e) or type(e).__name__})
+
+
+def _private_rss_bytes(pid: int) -> int:
+    # RssAnon leaves out the memory-mapped Arrow files, which are shared
+    # page cache rather than memory the snippet allocated.
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("RssAnon:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+class _Worker:
+    def __init__(self, context):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_connection,), daemon=True)
+        self.process.start()
+        child_connection.close()
+
+    def run(self, task: Dict[str, Any], resolve_path: Callable[[str], str],
+            timeout: float, memory_bytes: int) -> Dict[str, Any]:
+        self.connection.send(task)
+        deadline = time.monotonic() + timeout
+        while True:
+            if self.connection.poll(POLL_SECONDS):
+                message = self._receive(memory_bytes)
+                if "arrow_path" not in message:
+                    return message
+                try:
+                    self.connection.send({"path": resolve_path(message["arrow_path"])})
+                except Exception as e:
+                    self.connection.send({"error": str(e)})
+                continue
+            if not self.process.is_alive():
+                raise CodeLimitExceeded(self._exit_reason(memory_bytes))
+            if time.monotonic() > deadline:
+                raise CodeLimitExceeded(f"Time limit of {timeout:.0f}s exceeded")
+            if _private_rss_bytes(self.process.pid) > memory_bytes:
+                raise CodeLimitExceeded(f"Memory limit of {memory_bytes // (1024 * 1024)} MB exceeded")
+
+    def _receive(self, memory_bytes: int) -> Dict[str, Any]:
+        # poll() also reports a closed pipe, so a worker that died (usually
+        # killed by the kernel for running out of memory) shows up here.
+        try:
+            return self.connection.recv()
+        except (EOFError, OSError):
+            self.process.join(timeout=1)
+            raise CodeLimitExceeded(self._exit_reason(memory_bytes))
+
+    def _exit_reason(self, memory_bytes: int) -> str:
+        if self.process.exitcode == -signal.SIGKILL:
+            return (f"Memory limit exceeded: the worker was killed for running out of memory "
+                    f"(limit {memory_bytes // (1024 * 1024)} MB)")
+        return f"Code execution worker exited unexpectedly (exit code {self.process.exitcode})"
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+
+class CodeRunnerPool:
+    """Pool of worker processes that run agent pandas code with CPU time, wall time and memory limits
+
+    Workers start on first use. A worker that breaks a limit is killed and
+    replaced, so a runaway snippet never blocks other sessions.
+    """
+
+    def __init__(self, workers: int = CODE_WORKERS, cpu_seconds: int = CODE_CPU_SECONDS,
+                 timeout: float = CODE_TIMEOUT_SECONDS, memory_bytes: int = CODE_MEMORY_BYTES):
+        self.size = workers
+        self.cpu_seconds = cpu_seconds
+        self.timeout = timeout
+        self.memory_bytes = memory_bytes
+        self._context = multiprocessing.get_context("spawn")
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._started = 0
+        self._lock = threading.Lock()
+
+    def _acquire(self) -> _Worker:
+        with self._lock:
+            if self._idle.empty() and self._started < self.size:
+                self._started += 1
+                return _Worker(self._context)
+        return self._idle.get()
+
+    def run(self, code: str, datasets: List[str], arrow_path: Callable[[str], str], dataset: str,
+            save_plot: bool, dpi: int) -> Dict[str, Any]:
+        """Run a snippet in a worker
+
+        Args:
+            code (str): Pandas code to run
+            datasets (List[str]): Names of the datasets available as dfs
+            arrow_path (Callable[[str], str]): Returns the Arrow file of a dataset, called only for the datasets the code uses
+            dataset (str): Dataset available as df
+            save_plot (bool): Save open matplotlib figures after the run
+            dpi (int): Resolution of saved plots
+
+        Raises:
+            CodeLimitExceeded: If the snippet broke a limit and its worker was replaced
+
+        Returns:
+            Dict[str, Any]: output, value, plot and plot_error, or error if the code raised
+        """
+        task = {"code": code, "datasets": datasets, "dataset": dataset, "save_plot": save_plot,
+                "dpi": dpi, "cpu_seconds": self.cpu_seconds}
+        worker = self._acquire()
+        try:
+            result = worker.run(task, arrow_path, self.timeout, self.memory_bytes)
+        except BaseException:
+            worker.kill()
+            self._idle.put(_Worker(self._context))
+            raise
+        self._idle.put(worker)
+        return result
+
+    def close(self) -> None:
+        with self._lock:
+            while not self._idle.empty():
+                worker = self._idle.get()
+                worker.connection.send(None)
+                worker.process.join(timeout=5)
+            self._started = 0
+
+
+_pool: Optional[CodeRunnerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_code_runner() -> CodeRunnerPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = CodeRunnerPool()
+        return _pool
@@ -1,91 +1,181 @@
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import numpy as np
-from typing import List, Optional
-import sys
-import io
-from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
 from langchain_core.tools import tool
 
 from .models import (
-    LoadCSVInput, DataInfoInput, DescribeDataInput,
+    LoadCSVInput, ListDatasetsInput, DataInfoInput, DescribeDataInput,
     VisualizationInput, PandasCodeInput
 )
 from .csv_analyzer import CSVDataAnalyzer
+from .plotting import PLOT_DPI, cached_plot, remember_plot, render_plot
+from .profiler import DatasetProfile
+from .sandbox import CodeLimitExceeded, get_code_runner
 
+# Workspace used when no session has set one (e.g. the CLI agent).
 analyzer = CSVDataAnalyzer()
+_current_workspace: ContextVar[Optional[CSVDataAnalyzer]] = ContextVar("csv_workspace", default=None)
+
+NO_DATA_MESSAGE = "No data loaded. Please load a CSV file first."
+
+
+def get_workspace() -> CSVDataAnalyzer:
+    return _current_workspace.get() or analyzer
+
+
+@contextmanager
+def use_workspace(workspace: CSVDataAnalyzer) -> Iterator[CSVDataAnalyzer]:
+    """Make the tools operate on a session's workspace for the duration of the block
+
+    Args:
+        workspace (CSVDataAnalyzer): The session's workspace
+
+    Yields:
+        CSVDataAnalyzer: The same workspace
+    """
+    token = _current_workspace.set(workspace)
+    try:
+        yield workspace
+    finally:
+        _current_workspace.reset(token)
+
+
+def _dataset_frame(dataset: Optional[str]) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+    workspace = get_workspace()
+    if not workspace.datasets:
+        return None, NO_DATA_MESSAGE
+    try:
+        return workspace.get(dataset), None
+    except KeyError as e:
+        return None, e.args[0]
+
+
+def _dataset_profile(dataset: Optional[str]) -> Tuple[Optional[DatasetProfile], Optional[str]]:
+    workspace = get_workspace()
+    if not workspace.datasets:
+        return None, NO_DATA_MESSAGE
+    try:
+        return workspace.profile(dataset), None
+    except KeyError as e:
+        return None, e.args[0]
+
+
+def format_load_result(result: Dict[str, Any]) -> str:
+    if result["success"]:
+        return (
+            f"Successfully loaded CSV as dataset '{result['name']}' with shape {result['shape']} from {result['source']} "
+            f"in {result['load_seconds']}s ({result['memory_mb']} MB in memory). Columns: {result['columns']}"
+        )
+    else:
+        return f"Error loading CSV: {result['error']}"
+
+
+def load_result_messages(file_name: str, result: Dict[str, Any]) -> List[BaseMessage]:
+    """Chat history for an uploaded CSV, telling the agent which dataset it was loaded as
+
+    Uploads are only on disk while they are loaded, so the history refers to
+    the dataset by name rather than to the file path.
+
+    Args:
+        file_name (str): Name of the uploaded file
+        result (Dict[str, Any]): Result of CSVDataAnalyzer.load_csv or load_csvs
+
+    Returns:
+        List[BaseMessage]: User message and assistant reply with the load result
+    """
+    return [
+        HumanMessage(content=f"I uploaded {file_name}, loaded as dataset '{result['name']}'"),
+        AIMessage(content=format_load_result(result)),
+    ]
 
 
 # need docstring for each tool, so LLM can understand what the tool does
 @tool("load_csv", args_schema=LoadCSVInput)
-def load_csv_tool(file_path: str) -> str:
-    """Load a CSV file for analysis
+def load_csv_tool(file_path: str, name: Optional[str] = None) -> str:
+    """Load a CSV file for analysis as a named dataset
 
     Args:
         file_path (str): Path to the CSV file to load
+        name (Optional[str], optional): Name for the dataset. Defaults to one derived from the file name.
 
     Returns:
         str: Success or error message
     """
-    result = analyzer.load_csv(file_path)
-    if result["success"]:
-        return f"Successfully loaded CSV with shape {result['shape']}. Columns: {result['columns']}"
-    else:
-        return f"Error loading CSV: {result['error']}"
+    return format_load_result(get_workspace().load_csv(file_path, name))
+
+
+@tool("list_datasets", args_schema=ListDatasetsInput)
+def list_datasets_tool() -> str:
+    """List the loaded datasets
+
+    Returns:
+        str: One line per dataset with its name, source file and memory use
+    """
+    datasets = get_workspace().list_datasets()
+    if not datasets:
+        return NO_DATA_MESSAGE
+    lines = []
+    for dataset in datasets:
+        marker = " (active)" if dataset["active"] else ""
+        location = f"{dataset['memory_mb']} MB in memory" if dataset["in_memory"] else "evicted to disk"
+        lines.append(f"- {dataset['name']}{marker}: {dataset['file_path']}, {location}")
+    return "Loaded datasets:\n" + "\n".join(lines)
 
 
 @tool("get_data_info", args_schema=DataInfoInput)
-def get_data_info_tool() -> str:
-    """Get basic information about the loaded dataset
+def get_data_info_tool(dataset: Optional[str] = None) -> str:
+    """Get basic information about a loaded dataset
+
+    Args:
+        dataset (Optional[str], optional): Dataset name. Defaults to the most recently loaded dataset.
 
     Returns:
         str: Dataset information
     """
-    if analyzer.data is None:
-        return "No data loaded. Please load a CSV file first."
-    info = {
-        "shape": analyzer.data.shape,
-        "columns": list(analyzer.data.columns),
-        "dtypes": analyzer.data.dtypes.to_dict(),
-        "null_counts": analyzer.data.isnull().sum().to_dict(),
-        "memory_usage": f"{analyzer.data.memory_usage(deep=True).sum() / 1024:.2f} KB",
-    }
+    profile, error = _dataset_profile(dataset)
+    if error:
+        return error
+    approximate = " (estimated)" if profile.approximate else ""
     return f"""Dataset Information:
-- Shape: {info["shape"]} (rows x columns)
-- Columns: {info["columns"]}
-- Data Types: {info["dtypes"]}
-- Null Values: {info["null_counts"]}
-- Memory Usage: {info["memory_usage"]}"""
+- Shape: {profile.shape} (rows x columns)
+- Columns: {profile.columns}
+- Data Types: {profile.dtypes}
+- Null Values: {profile.null_counts}
+- Memory Usage: {profile.memory_bytes / 1024:.2f} KB{approximate}"""
 
 
 @tool("describe_data", args_schema=DescribeDataInput)
-def describe_data_tool(columns: Optional[List[str]] = None) -> str:
+def describe_data_tool(columns: Optional[List[str]] = None, dataset: Optional[str] = None) -> str:
     """Describe the data
 
     Args:
         columns (Optional[List[str]], optional): _description_. Defaults to None.
+        dataset (Optional[str], optional): Dataset name. Defaults to the most recently loaded dataset.
 
     Returns:
         str: _description_
     """
-    if analyzer.data is None:
-        return "No data loaded. Please load a CSV file first."
+    profile, error = _dataset_profile(dataset)
+    if error:
+        return error
     if columns:
-        data_subset = analyzer.data[columns]
-    else:
-        data_subset = analyzer.data
-    numeric_desc = data_subset.select_dtypes(include=[np.number]).describe()
-    categorical_info = {}
-    categorical_cols = data_subset.select_dtypes(include=["object"]).columns
-    for col in categorical_cols[:5]:
-        categorical_info[col] = data_subset[col].value_counts(
-        ).head().to_dict()
+        missing = [col for col in columns if col not in profile.columns]
+        if missing:
+            return f"Columns not found: {missing}. Available columns: {profile.columns}"
+    selected = columns or profile.columns
+    numeric_desc = profile.numeric_summary[[col for col in profile.numeric_summary.columns if col in selected]]
+    categorical_info = {col: profile.top_values[col] for col in selected if col in profile.top_values}
     result = f"Numeric Data Description:\n{numeric_desc.to_string()}\n\n"
+    if profile.approximate:
+        result += "(Quartiles are estimated from a sample of the rows.)\n\n"
     if categorical_info:
-        result += "Categorical Data (Top 5 values per column):\n"
-        for col, counts in categorical_info.items():
-            result += f"{col}: {counts}\n"
+        approximate = ", string column counts estimated from a sample" if profile.approximate else ""
+        result += f"Categorical Data (Top 5 values per column{approximate}):\n"
+        for col, counts in list(categorical_info.items())[:5]:
+            result += f"{col}: {counts or 'all sampled values are distinct'}\n"
     return result
 
 
@@ -95,6 +185,7 @@ def create_visualization_tool(
     x_column: Optional[str] = None,
     y_column: Optional[str] = None,
     title: Optional[str] = None,
+    dataset: Optional[str] = None,
 ) -> str:
     """Create a visualization
 
@@ -103,80 +194,51 @@ def create_visualization_tool(
         x_column (Optional[str], optional): _description_. Defaults to None.
         y_column (Optional[str], optional): Column to use for y-axis. Defaults to None.
         title (Optional[str], optional): Title of the plot. Defaults to None.
+        dataset (Optional[str], optional): Dataset name. Defaults to the most recently loaded dataset.
 
     Returns:
         str: Path to the saved visualization or error message
     """
-    if analyzer.data is None:
-        return "No data loaded. Please load a CSV file first."
+    data, error = _dataset_frame(dataset)
+    if error:
+        return error
+    key = (get_workspace().resolve(dataset).version, plot_type, x_column, y_column, title, PLOT_DPI)
     try:
-        plt.figure(figsize=(10, 6))
-        if plot_type == "histogram":
-            if x_column:
-                plt.hist(analyzer.data[x_column].dropna(), bins=30, alpha=0.7)
-                plt.xlabel(x_column)
-                plt.ylabel("Frequency")
-            else:
-                return "Histogram requires x_column parameter"
-        elif plot_type == "scatter":
-            if x_column and y_column:
-                plt.scatter(analyzer.data[x_column],
-                            analyzer.data[y_column], alpha=0.6)
-                plt.xlabel(x_column)
-                plt.ylabel(y_column)
-            else:
-                return "Scatter plot requires both x_column and y_column parameters"
-        elif plot_type == "bar":
-            if x_column:
-                value_counts = analyzer.data[x_column].value_counts().head(10)
-                plt.bar(range(len(value_counts)), value_counts.values)
-                plt.xticks(range(len(value_counts)),
-                           value_counts.index, rotation=45)
-                plt.xlabel(x_column)
-                plt.ylabel("Count")
-            else:
-                return "Bar plot requires x_column parameter"
-        elif plot_type == "box":
-            if x_column:
-                analyzer.data.boxplot(column=x_column)
-                plt.ylabel(x_column)
-            else:
-                return "Box plot requires x_column parameter"
-        elif plot_type == "heatmap":
-            numeric_data = analyzer.data.select_dtypes(include=[np.number])
-            if not numeric_data.empty:
-                correlation_matrix = numeric_data.corr()
-                sns.heatmap(correlation_matrix, annot=True,
-                            cmap="coolwarm", center=0)
-            else:
-                return "No numeric columns found for heatmap"
+        rendered = cached_plot(key)
+        if rendered:
+            filename, note = rendered
         else:
-            return f"Unsupported plot type: {plot_type}"
-        if title:
-            plt.title(title)
-        timestamp = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{plot_type}_plot_{timestamp}.png"
-        plt.tight_layout()
-        plt.savefig(filename, dpi=300, bbox_inches="tight")
-        plt.close()
-        return f"Visualization created and saved as {filename}"
+            timestamp = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"{plot_type}_plot_{timestamp}_{uuid.uuid4().hex[:6]}.png"
+            note = render_plot(data, plot_type, x_column, y_column, title, filename)
+            remember_plot(key, filename, note)
+        note_text = f" ({note})" if note else ""
+        return f"Visualization created and saved as {filename}{note_text}"
+    except ValueError as e:
+        return str(e)
     except Exception as e:
         return f"Error creating visualization: {str(e)}"
 
 
 @tool("execute_pandas_code", args_schema=PandasCodeInput)
-def execute_pandas_code_tool(code: str, description: Optional[str] = None) -> str:
-    """Execute custom pandas code on the loaded dataset
+def execute_pandas_code_tool(code: str, description: Optional[str] = None, dataset: Optional[str] = None) -> str:
+    """Execute custom pandas code on the loaded datasets
 
     Args:
         code (str): Pandas code to execute
         description (Optional[str], optional): Brief description of what this code does
+        dataset (Optional[str], optional): Dataset available as df. Defaults to the most recently loaded dataset.
 
     Returns:
         str: Result of the code execution or error message
     """
-    if analyzer.data is None:
-        return "No data loaded. Please load a CSV file first."
+    workspace = get_workspace()
+    if not workspace.datasets:
+        return NO_DATA_MESSAGE
+    try:
+        selected = workspace.resolve(dataset).name
+    except KeyError as e:
+        return e.args[0]
     dangerous_patterns = [
         "import os",
         "import sys",
@@ -207,16 +269,13 @@ def execute_pandas_code_tool(code: str, description: Optional[str] = None) -> st
         "analyzer.file_path =",
         "analyzer.load_csv(",
         "analyzer.data.to_csv(",
+        "_workspace",
     ]
     code_lower = code.lower()
     for pattern in dangerous_patterns:
         if pattern in code_lower:
             return f"Blocked: Code contains potentially dangerous operation: '{pattern}'. Please use safe pandas operations only."
     try:
-        df = analyzer.data.copy()
-        old_stdout = sys.stdout
-        sys.stdout = captured_output = io.StringIO()
-
         plotting_keywords = [
             "plt.",
             "sns.",
@@ -244,68 +303,29 @@ def execute_pandas_code_tool(code: str, description: Optional[str] = None) -> st
         has_plotting = any(
             keyword in code_lower for keyword in plotting_keywords)
 
-        safe_globals = {
-            "df": df,
-            "pd": pd,
-            "np": np,
-            "plt": plt,
-            "sns": sns,
-            "__builtins__": {
-                "len": len,
-                "str": str,
-                "int": int,
-                "float": float,
-                "bool": bool,
-                "list": list,
-                "dict": dict,
-                "tuple": tuple,
-                "set": set,
-                "min": min,
-                "max": max,
-                "sum": sum,
-                "abs": abs,
-                "round": round,
-                "sorted": sorted,
-                "range": range,
-                "enumerate": enumerate,
-                "zip": zip,
-                "print": print,
-                "type": type,
-            },
-        }
-        exec(code, safe_globals)
-        sys.stdout = old_stdout
-        output = captured_output.getvalue()
-
-        if has_plotting:
-            try:
-                if plt.get_fignums():
-                    timestamp = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
-                    filename = f"custom_plot_{timestamp}.png"
-                    plt.tight_layout()
-                    plt.savefig(filename, dpi=300, bbox_inches="tight")
-                    plt.close("all")
-                    if output.strip():
-                        output += f"\n\nVisualization saved as: {filename}"
-                    else:
-                        output = f"Visualization saved as: {filename}"
-            except Exception as plot_error:
-                output += (
-                    f"\n\nNote: Plot generation encountered an issue: {str(plot_error)}"
-                )
-
-        if not output.strip():
-            try:
-                result = eval(code, safe_globals)
-                if result is not None:
-                    if hasattr(result, "to_string"):
-                        output = result.to_string()
-                    else:
-                        output = str(result)
-            except Exception as e:
-                print(f"Error evaluating result: {str(e)}")
+        result = get_code_runner().run(
+            code, list(workspace.datasets), workspace.arrow_path, selected, has_plotting, PLOT_DPI)
+        if "error" in result:
+            return f"Error executing pandas code: {result['error']}"
+        output = result["output"]
+        if result["value"] is not None and not has_plotting:
+            if output and not output.endswith("\n"):
+                output += "\n"
+            output += result["value"]
+
+        if result["plot"]:
+            if output.strip():
+                output += f"\n\nVisualization saved as: {result['plot']}"
+            else:
+                output = f"Visualization saved as: {result['plot']}"
+        elif result["plot_error"]:
+            output += (
+                f"\n\nNote: Plot generation encountered an issue: {result['plot_error']}"
+            )
+
         description_text = f" ({description})" if description else ""
         return f"Pandas code executed successfully{description_text}:\n\n{output}"
+    except CodeLimitExceeded as e:
+        return f"Error executing pandas code: {str(e)}. The code was stopped; try a cheaper operation or work on a sample."
     except Exception as e:
-        sys.stdout = old_stdout
         return f"Error executing pandas code: {str(e)}"
@@ -4,19 +4,32 @@ import glob
 import time
 from langchain_core.messages import HumanMessage, AIMessage
 from dotenv import load_dotenv
-from src.agent import create_csv_agent
+from src.agent import AgentLoop, create_csv_agent, create_llm, stream_agent
+from src.csv_analyzer import CSVDataAnalyzer, dataset_names_for
+from src.history import ChatHistory
+from src.tools import format_load_result, load_result_messages, use_workspace
 
 load_dotenv()
 st.set_page_config(page_title="CSV Analysis Agent")
 
+TOOL_OUTPUT_PREVIEW_CHARS = 2000
+
+
+@st.cache_resource
+def get_agent_loop() -> AgentLoop:
+    # One loop for the whole server: every session's agent runs its turns on it.
+    return AgentLoop()
+
 if "agent_executor" not in st.session_state:
     st.session_state.agent_executor = create_csv_agent()
 if "chat_history" not in st.session_state:
-    st.session_state.chat_history = []
+    st.session_state.chat_history = ChatHistory(create_llm())
 if "messages" not in st.session_state:
     st.session_state.messages = []
 if "loaded_files" not in st.session_state:
     st.session_state.loaded_files = []
+if "workspace" not in st.session_state:
+    st.session_state.workspace = CSVDataAnalyzer()
 
 
 def cleanup_temp_files():
@@ -42,6 +55,42 @@ def extract_plots_from_response(response_text):
     return plots
 
 
+def stream_response(prompt, chat_history):
+    steps_area = st.container()
+    answer = st.empty()
+    answer.markdown("▌")
+    steps = None
+    text = ""
+    # Streamlit elements can only be updated from the script thread, so the
+    # stream runs on the agent loop and its events are rendered here.
+    for kind, payload in get_agent_loop().iterate(stream_agent(st.session_state.agent_executor, {
+        "input": prompt,
+        "chat_history": chat_history
+    })):
+        if kind == "token":
+            text += payload
+            answer.markdown(text + "▌")
+        elif kind == "tool_start":
+            name, tool_input = payload
+            if steps is None:
+                steps = steps_area.status("Analyzing...")
+            steps.update(label=f"Running {name}...")
+            steps.markdown(f"**{name}** `{tool_input}`")
+            # Text streamed before a tool call is the model thinking aloud,
+            # not the answer.
+            text = ""
+            answer.empty()
+        elif kind == "tool_end":
+            name, tool_output = payload
+            steps.text(str(tool_output)[:TOOL_OUTPUT_PREVIEW_CHARS])
+        elif kind == "output":
+            text = payload
+    if steps is not None:
+        steps.update(label="Analysis steps", state="complete", expanded=False)
+    answer.markdown(text)
+    return text
+
+
 def display_message_plots(message_plots):
     if message_plots:
         for plot_file in message_plots:
@@ -61,52 +110,45 @@ with st.sidebar:
         cleanup_temp_files()
 
         with st.spinner("Loading CSV files..."):
-            temp_files = []
             loaded_count = 0
 
             try:
-                for uploaded_file in uploaded_files:
-                    temp_file_path = f"temp_{uploaded_file.name}"
+                # Distinct names, so uploads named alike do not replace each other.
+                names = dataset_names_for([uploaded_file.name for uploaded_file in uploaded_files])
+                files = {}
+                for name, uploaded_file in zip(names, uploaded_files):
+                    temp_file_path = f"temp_{name}.csv"
                     with open(temp_file_path, "wb") as f:
                         f.write(uploaded_file.getbuffer())
-                    temp_files.append(temp_file_path)
-
-                for temp_file_path, uploaded_file in zip(temp_files, uploaded_files):
-                    try:
-                        load_request = f"Please load the CSV file at {temp_file_path}, just load the file and do not do any analysis for now, later we will ask you to analyze the data"
-
-                        response = st.session_state.agent_executor.invoke({
-                            "input": load_request,
-                            "chat_history": st.session_state.chat_history
-                        })
-
-                        new_plots = extract_plots_from_response(
-                            response['output'])
-
-                        user_msg = f"Loaded CSV file: {uploaded_file.name}"
-                        st.session_state.messages.append({
-                            "role": "user",
-                            "content": user_msg,
-                            "plots": []
-                        })
-                        st.session_state.messages.append({
-                            "role": "assistant",
-                            "content": response['output'],
-                            "plots": new_plots
-                        })
-
-                        st.session_state.chat_history.append(
-                            HumanMessage(content=user_msg))
-                        st.session_state.chat_history.append(
-                            AIMessage(content=response['output']))
-
-                        st.session_state.loaded_files.append(
-                            uploaded_file.name)
-                        loaded_count += 1
-
-                    except Exception as e:
+                    files[name] = temp_file_path
+
+                results = st.session_state.workspace.load_csvs(files)
+
+                for name, uploaded_file in zip(names, uploaded_files):
+                    result = results[name]
+                    if not result["success"]:
                         st.error(
-                            f"Failed to load {uploaded_file.name}: {str(e)}")
+                            f"Failed to load {uploaded_file.name}: {result['error']}")
+                        continue
+
+                    user_msg = f"Loaded CSV file: {uploaded_file.name}"
+                    st.session_state.messages.append({
+                        "role": "user",
+                        "content": user_msg,
+                        "plots": []
+                    })
+                    st.session_state.messages.append({
+                        "role": "assistant",
+                        "content": format_load_result(result),
+                        "plots": []
+                    })
+
+                    st.session_state.chat_history.add_turn(
+                        load_result_messages(uploaded_file.name, result))
+
+                    st.session_state.loaded_files.append(
+                        uploaded_file.name)
+                    loaded_count += 1
 
                 if loaded_count > 0:
                     st.success(f"Successfully loaded {loaded_count} file(s)")
@@ -122,8 +164,9 @@ with st.sidebar:
 
     if st.button("Clear Chat History"):
         st.session_state.messages = []
-        st.session_state.chat_history = []
+        st.session_state.chat_history.clear()
         st.session_state.loaded_files = []
+        st.session_state.workspace = CSVDataAnalyzer()
         cleanup_temp_files()
         st.rerun()
 
@@ -146,35 +189,33 @@ if prompt := st.chat_input("Ask about your data..."):
         st.markdown(prompt)
 
     with st.chat_message("assistant"):
-        with st.spinner("Analyzing..."):
-            try:
-                response = st.session_state.agent_executor.invoke({
-                    "input": prompt,
-                    "chat_history": st.session_state.chat_history
-                })
-
-                agent_response = response['output']
-                st.markdown(agent_response)
-
-                new_plots = extract_plots_from_response(agent_response)
-
-                st.session_state.messages.append({
-                    "role": "assistant",
-                    "content": agent_response,
-                    "plots": new_plots
-                })
-                st.session_state.chat_history.append(
-                    HumanMessage(content=prompt))
-                st.session_state.chat_history.append(
-                    AIMessage(content=agent_response))
-
-                display_message_plots(new_plots)
-
-            except Exception as e:
-                error_msg = f"Error: {str(e)}"
-                st.error(error_msg)
-                st.session_state.messages.append({
-                    "role": "assistant",
-                    "content": error_msg,
-                    "plots": []
-                })
+        try:
+            with use_workspace(st.session_state.workspace):
+                agent_response = stream_response(
+                    prompt,
+                    st.session_state.chat_history.messages(
+                        st.session_state.workspace.schema_text())
+                )
+
+            new_plots = extract_plots_from_response(agent_response)
+
+            st.session_state.messages.append({
+                "role": "assistant",
+                "content": agent_response,
+                "plots": new_plots
+            })
+            st.session_state.chat_history.add_turn([
+                HumanMessage(content=prompt),
+                AIMessage(content=agent_response)
+            ])
+
+            display_message_plots(new_plots)
+
+        except Exception as e:
+            error_msg = f"Error: {str(e)}"
+            st.error(error_msg)
+            st.session_state.messages.append({
+                "role": "assistant",
+                "content": error_msg,
+                "plots": []
+            })
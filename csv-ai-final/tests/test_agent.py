@@ -0,0 +1,55 @@
+import asyncio
+from contextvars import ContextVar
+
+import pytest
+
+from src.agent import AgentLoop
+
+session: ContextVar[str] = ContextVar("session", default="none")
+
+
+@pytest.fixture
+def agent_loop():
+    agent_loop = AgentLoop()
+    yield agent_loop
+    agent_loop.close()
+
+
+async def running_loop():
+    return asyncio.get_running_loop()
+
+
+def test_every_turn_runs_on_the_same_loop(agent_loop):
+    assert agent_loop.run(running_loop()) is agent_loop.run(running_loop())
+
+
+def test_run_sees_the_callers_context(agent_loop):
+    async def current_session():
+        await asyncio.sleep(0)
+        return session.get()
+
+    token = session.set("alice")
+    try:
+        assert agent_loop.run(current_session()) == "alice"
+    finally:
+        session.reset(token)
+
+
+def test_iterate_yields_items_and_raises_errors(agent_loop):
+    async def events(fail):
+        for index in range(3):
+            await asyncio.sleep(0)
+            yield index, session.get()
+        if fail:
+            raise ValueError("stream failed")
+
+    token = session.set("bob")
+    try:
+        assert list(agent_loop.iterate(events(fail=False))) == [(0, "bob"), (1, "bob"), (2, "bob")]
+        received = []
+        with pytest.raises(ValueError, match="stream failed"):
+            for item in agent_loop.iterate(events(fail=True)):
+                received.append(item)
+        assert len(received) == 3
+    finally:
+        session.reset(token)
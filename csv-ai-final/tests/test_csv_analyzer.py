@@ -0,0 +1,234 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pyarrow import feather
+
+from src import csv_analyzer
+from src.csv_analyzer import CSVDataAnalyzer
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setattr(csv_analyzer, "CACHE_DIR", cache_dir)
+    return cache_dir
+
+
+@pytest.fixture
+def chunked(monkeypatch):
+    monkeypatch.setattr(csv_analyzer, "LARGE_FILE_BYTES", 0)
+    monkeypatch.setattr(csv_analyzer, "CHUNK_ROWS", 4)
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    # Chunks of 4 rows: "price" stops fitting float32 in the second chunk,
+    # "code" turns into strings and "city" gains a category in the third.
+    frame = pd.DataFrame({
+        "id": range(10),
+        "code": [1, 2, 3, 4, 5, 6, 7, 8, "A9", "B10"],
+        "price": [0.5, 1.5, 2.5, 3.5, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6],
+        "city": ["Oslo", "Rome", "Oslo", "Rome", "Oslo", None, "Rome", "Oslo", "Lima", "Lima"],
+    })
+    path = tmp_path / "sales.csv"
+    frame.to_csv(path, index=False)
+    return path
+
+
+def assert_loaded(data, csv_file):
+    expected = pd.read_csv(csv_file)
+    assert data["id"].dtype == np.int64
+    assert data["price"].dtype == np.float64
+    assert isinstance(data["city"].dtype, pd.CategoricalDtype)
+    assert set(data["city"].cat.categories) == {"Oslo", "Rome", "Lima"}
+    assert data["code"].astype(str).tolist() == expected["code"].tolist()
+    columns = ["id", "price", "city"]
+    pd.testing.assert_frame_equal(data[columns].astype({"city": object}), expected[columns].astype({"city": object}))
+
+
+def test_chunked_load_streams_into_arrow_cache(cache_dir, chunked, csv_file):
+    analyzer = CSVDataAnalyzer()
+    result = analyzer.load_csv(str(csv_file))
+
+    assert result["success"] and result["source"] == "csv"
+    assert_loaded(analyzer.get("sales"), csv_file)
+    entries = list(cache_dir.glob("*.arrow"))
+    assert len(entries) == 1 and not list(cache_dir.glob("*.tmp")) and not list(cache_dir.glob("*.widen"))
+    # Worker processes map the same file and must see the same dtypes.
+    assert_loaded(feather.read_table(entries[0]).to_pandas(), csv_file)
+
+
+def test_chunked_load_without_pyarrow_concatenates(cache_dir, chunked, csv_file, monkeypatch):
+    monkeypatch.setattr(csv_analyzer, "HAS_PYARROW", False)
+    analyzer = CSVDataAnalyzer()
+
+    assert analyzer.load_csv(str(csv_file))["success"]
+    assert_loaded(analyzer.get(), csv_file)
+    assert not cache_dir.exists()
+
+
+def test_chunked_load_keeps_float32_and_int64_when_every_chunk_fits(cache_dir, chunked, tmp_path):
+    path = tmp_path / "narrow.csv"
+    pd.DataFrame({"n": range(10), "x": [i + 0.5 for i in range(10)]}).to_csv(path, index=False)
+    analyzer = CSVDataAnalyzer()
+    analyzer.load_csv(str(path))
+
+    data = analyzer.get()
+    assert data["n"].dtype == np.int64
+    assert data["x"].dtype == np.float32
+    assert data["x"].tolist() == [i + 0.5 for i in range(10)]
+
+
+def test_reload_and_copy_under_another_name_map_the_cache(cache_dir, csv_file, tmp_path):
+    analyzer = CSVDataAnalyzer()
+    first = analyzer.load_csv(str(csv_file))
+    copy = tmp_path / "upload_1234.csv"
+    copy.write_bytes(csv_file.read_bytes())
+
+    again = analyzer.load_csv(str(csv_file))
+    copied = analyzer.load_csv(str(copy))
+
+    assert first["source"] == "csv"
+    assert again["source"] == copied["source"] == "arrow cache"
+    assert len(list(cache_dir.glob("*.arrow"))) == 1
+    pd.testing.assert_frame_equal(analyzer.get("upload_1234"), analyzer.get("sales"))
+
+
+def test_content_hash_is_remembered_per_path_size_and_mtime(csv_file, monkeypatch):
+    digest = csv_analyzer._content_hash(str(csv_file))
+    monkeypatch.setattr(csv_analyzer.hashlib, "file_digest", pytest.fail)
+    assert csv_analyzer._content_hash(str(csv_file)) == digest
+
+
+def test_content_hash_index_is_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(csv_analyzer, "_hashes", csv_analyzer.OrderedDict())
+    monkeypatch.setattr(csv_analyzer, "HASH_INDEX_SIZE", 2)
+    paths = []
+    for index in range(3):
+        path = tmp_path / f"{index}.csv"
+        path.write_text(f"a\n{index}\n")
+        paths.append(path)
+        csv_analyzer._content_hash(str(path))
+
+    assert len(csv_analyzer._hashes) == 2
+    assert [key[0] for key in csv_analyzer._hashes] == [str(path.resolve()) for path in paths[1:]]
+
+
+def make_entry(cache_dir, name, size, mtime):
+    path = cache_dir / name
+    path.write_bytes(b"x" * size)
+    csv_analyzer.os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_prune_keeps_newest_entries_within_budget(cache_dir, monkeypatch):
+    cache_dir.mkdir()
+    monkeypatch.setattr(csv_analyzer, "CACHE_MAX_BYTES", 250)
+    old = make_entry(cache_dir, f"v{csv_analyzer.CACHE_FORMAT_VERSION}_old.arrow", 100, 1000)
+    middle = make_entry(cache_dir, f"v{csv_analyzer.CACHE_FORMAT_VERSION}_middle.arrow", 100, 2000)
+    new = make_entry(cache_dir, f"v{csv_analyzer.CACHE_FORMAT_VERSION}_new.arrow", 100, 3000)
+    spill = make_entry(cache_dir, "spill_abc.arrow", 1000, 500)
+
+    csv_analyzer._prune_cache()
+
+    assert not old.exists()
+    assert middle.exists() and new.exists() and spill.exists()
+
+
+def test_prune_skips_pinned_entries(cache_dir, monkeypatch):
+    cache_dir.mkdir()
+    monkeypatch.setattr(csv_analyzer, "CACHE_MAX_BYTES", 100)
+    old = make_entry(cache_dir, f"v{csv_analyzer.CACHE_FORMAT_VERSION}_old.arrow", 100, 1000)
+    new = make_entry(cache_dir, f"v{csv_analyzer.CACHE_FORMAT_VERSION}_new.arrow", 100, 2000)
+
+    with csv_analyzer._pinned_entry(old):
+        csv_analyzer._prune_cache()
+        assert old.exists() and new.exists()
+    assert old not in csv_analyzer._pinned
+
+    csv_analyzer._prune_cache()
+    assert not old.exists() and new.exists()
+
+
+def test_prune_removes_other_format_versions(cache_dir):
+    cache_dir.mkdir()
+    stale = make_entry(cache_dir, "v1_abc.arrow", 10, 1000)
+    current = make_entry(cache_dir, f"v{csv_analyzer.CACHE_FORMAT_VERSION}_abc.arrow", 10, 1000)
+
+    csv_analyzer._prune_cache()
+
+    assert not stale.exists() and current.exists()
+
+
+def test_dataset_names_for_suffixes_repeated_names():
+    assert csv_analyzer.dataset_name_for("uploads/2024 Sales.csv") == "d_2024_sales"
+    assert csv_analyzer.dataset_names_for(["sales.csv", "Sales.csv", "sales_2.csv", "SALES.csv"]) == [
+        "sales", "sales_2", "sales_2_2", "sales_3"]
+
+
+@pytest.fixture
+def frames(tmp_path):
+    paths = {}
+    for name in ("first", "second", "third"):
+        path = tmp_path / f"{name}.csv"
+        pd.DataFrame({"value": np.arange(20_000, dtype=np.int64)}).to_csv(path, index=False)
+        paths[name] = str(path)
+    return paths
+
+
+def test_workspace_evicts_least_recently_used_and_maps_it_back(cache_dir, frames):
+    analyzer = CSVDataAnalyzer(memory_budget_bytes=400_000)
+    results = analyzer.load_csvs(frames)
+
+    assert all(result["success"] for result in results.values())
+    assert analyzer.active == "third"
+    assert [dataset["in_memory"] for dataset in analyzer.list_datasets()] == [False, True, True]
+    spill_path = analyzer.datasets["first"].spill_path
+    assert spill_path.exists()
+
+    assert analyzer.get("first")["value"].sum() == sum(range(20_000))
+    assert analyzer.datasets["first"].in_memory
+    assert not analyzer.datasets["second"].in_memory
+
+
+def test_workspace_arrow_path_and_remove(cache_dir, frames):
+    analyzer = CSVDataAnalyzer()
+    analyzer.load_csv(frames["first"])
+    analyzer.load_csv(frames["second"])
+
+    arrow_path = analyzer.arrow_path("first")
+    assert feather.read_table(arrow_path).num_rows == 20_000
+    assert analyzer.read_columns(["value"], "first").shape == (20_000, 1)
+
+    analyzer.remove("second")
+    assert analyzer.active == "first"
+    analyzer.remove("first")
+    assert analyzer.active is None
+    assert not csv_analyzer.Path(arrow_path).exists()
+    with pytest.raises(KeyError, match="Loaded datasets: none"):
+        analyzer.resolve("first")
+
+
+def test_workspace_load_failure_is_reported(cache_dir, tmp_path):
+    analyzer = CSVDataAnalyzer()
+    result = analyzer.load_csv(str(tmp_path / "missing.csv"))
+    assert result["success"] is False and "missing.csv" in result["error"]
+
+
+def test_parallel_loads_of_identical_files_share_one_entry(tmp_path, monkeypatch):
+    content = pd.DataFrame({"value": np.arange(20_000)}).to_csv(index=False).encode()
+    files = {}
+    for index in range(3):
+        copy = tmp_path / f"copy_{index}.csv"
+        copy.write_bytes(content)
+        files[f"copy_{index}"] = str(copy)
+
+    # The writes only collide now and then, so race them a number of times.
+    for attempt in range(20):
+        cache_dir = tmp_path / f"cache_{attempt}"
+        monkeypatch.setattr(csv_analyzer, "CACHE_DIR", cache_dir)
+        results = CSVDataAnalyzer().load_csvs(files)
+
+        assert all(result["success"] for result in results.values())
+        assert len(list(cache_dir.glob("*.arrow"))) == 1
+        assert not list(cache_dir.glob("*.tmp"))
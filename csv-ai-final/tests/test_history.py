@@ -0,0 +1,91 @@
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from src.history import ChatHistory
+
+
+def turn(index: int, size: int = 400):
+    return [HumanMessage(content=f"question {index} " + "x" * size), AIMessage(content=f"answer {index}")]
+
+
+def contents(messages):
+    return [message.content for message in messages if not isinstance(message, SystemMessage)]
+
+
+def wait_for_summary(history: ChatHistory) -> None:
+    if history._summary_future is not None:
+        history._summary_future.result(timeout=10)
+
+
+def test_keeps_turns_within_budget_verbatim():
+    history = ChatHistory(token_budget=1000)
+    history.add_turn(turn(1))
+    history.add_turn(turn(2))
+    assert contents(history.messages()) == [m.content for m in turn(1) + turn(2)]
+
+
+def test_schema_goes_into_a_leading_system_message():
+    history = ChatHistory()
+    history.add_turn(turn(1))
+    messages = history.messages("sales: region, amount")
+    assert isinstance(messages[0], SystemMessage)
+    assert "sales: region, amount" in messages[0].content
+    assert history.messages()[0].content.startswith("question 1")
+
+
+def test_without_llm_drops_oldest_turns():
+    history = ChatHistory(token_budget=250)
+    for index in range(1, 6):
+        history.add_turn(turn(index))
+    kept = contents(history.messages())
+    assert kept[-2:] == [m.content for m in turn(5)]
+    assert not any(content.startswith("question 1 ") for content in kept)
+    assert history.summary == ""
+
+
+def test_always_keeps_the_latest_turn():
+    history = ChatHistory(token_budget=10)
+    history.add_turn(turn(1, size=2000))
+    assert contents(history.messages()) == [m.content for m in turn(1, size=2000)]
+
+
+def test_folds_old_turns_into_a_summary():
+    history = ChatHistory(llm=FakeListChatModel(responses=["user asked about questions 1-3"]), token_budget=250)
+    for index in range(1, 5):
+        history.add_turn(turn(index))
+    wait_for_summary(history)
+
+    messages = history.messages("sales: region, amount")
+    assert "Summary of the earlier conversation:\nuser asked about questions 1-3" in messages[0].content
+    assert contents(messages)[-2:] == [m.content for m in turn(4)]
+    assert not any(content.startswith("question 1 ") for content in contents(messages))
+
+
+def test_turns_being_summarized_are_still_sent():
+    history = ChatHistory(llm=FakeListChatModel(responses=["summary"], sleep=0.5), token_budget=250)
+    for index in range(1, 5):
+        history.add_turn(turn(index))
+    assert contents(history.messages())[0].startswith("question 1 ")
+    wait_for_summary(history)
+
+
+def test_failed_summary_keeps_a_truncated_transcript(caplog):
+    history = ChatHistory(llm=FakeListChatModel(responses=[]), token_budget=250)
+    for index in range(1, 5):
+        history.add_turn(turn(index))
+    try:
+        wait_for_summary(history)
+    except Exception:
+        pass
+    history.messages()
+    assert "User: question 1 " in history.summary
+    assert "History summary failed" in caplog.text
+
+
+def test_clear():
+    history = ChatHistory(llm=FakeListChatModel(responses=["summary"]), token_budget=250)
+    for index in range(1, 5):
+        history.add_turn(turn(index))
+    wait_for_summary(history)
+    history.clear()
+    assert history.messages() == []
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import profiler
+from src.profiler import estimate_memory_bytes, get_profile, profile_dataset, profile_in_background
+
+
+@pytest.fixture(autouse=True)
+def profiles(monkeypatch):
+    monkeypatch.setattr(profiler, "_profiles", profiler.OrderedDict())
+
+
+def test_small_frame_profile_is_exact():
+    frame = pd.DataFrame({
+        "amount": [1.0, 2.0, 3.0, None],
+        "city": ["Oslo", "Rome", "Oslo", "Oslo"],
+        "kind": pd.Categorical(["a", "b", "b", "b"]),
+    })
+
+    profile = profile_dataset(frame)
+
+    assert profile.shape == (4, 3)
+    assert profile.columns == ["amount", "city", "kind"]
+    assert profile.null_counts == {"amount": 1, "city": 0, "kind": 0}
+    assert not profile.approximate
+    pd.testing.assert_series_equal(profile.numeric_summary["amount"], frame[["amount"]].describe()["amount"])
+    assert profile.top_values == {"city": {"Oslo": 3, "Rome": 1}, "kind": {"b": 3, "a": 1}}
+    assert profile.memory_bytes == frame.memory_usage(deep=True).sum()
+
+
+def test_large_frame_profile_estimates_from_sample(monkeypatch):
+    monkeypatch.setattr(profiler, "PROFILE_SAMPLE_ROWS", 100)
+    frame = pd.DataFrame({
+        "value": np.arange(1000, dtype=np.int64),
+        "label": ["x" if i % 4 else "y" for i in range(1000)],
+        "id": [f"row-{i}" for i in range(1000)],
+    })
+
+    profile = profile_dataset(frame)
+
+    assert profile.approximate
+    # count, mean, min and max are always exact.
+    summary = profile.numeric_summary["value"]
+    assert (summary["count"], summary["mean"], summary["min"], summary["max"]) == (1000, 499.5, 0, 999)
+    assert sum(profile.top_values["label"].values()) == 1000
+    # A sample of distinct ids says nothing about the full column.
+    assert profile.top_values["id"] == {}
+
+
+def test_estimate_memory_bytes_scales_string_sample(monkeypatch):
+    monkeypatch.setattr(profiler, "PROFILE_SAMPLE_ROWS", 100)
+    frame = pd.DataFrame({"value": np.arange(1000, dtype=np.int64), "label": ["abcdef"] * 1000})
+
+    estimate = estimate_memory_bytes(frame)
+
+    assert estimate == pytest.approx(frame.memory_usage(deep=True).sum(), rel=0.01)
+
+
+def test_profile_is_computed_once_per_version():
+    frame = pd.DataFrame({"value": [1, 2, 3]})
+    first = profile_in_background("v1", frame)
+
+    assert profile_in_background("v1", frame) is first
+    assert get_profile("v1", pytest.fail) is first.result()
+
+
+def test_get_profile_loads_the_frame_when_not_cached():
+    loads = []
+
+    def load_frame():
+        loads.append(1)
+        return pd.DataFrame({"value": [1, 2]})
+
+    assert get_profile("v2", load_frame).shape == (2, 1)
+    assert get_profile("v2", load_frame).shape == (2, 1)
+    assert loads == [1]
+
+
+def test_failed_profile_is_retried():
+    failed = profile_in_background("v3", None)
+    with pytest.raises(Exception):
+        failed.result()
+
+    assert get_profile("v3", lambda: pd.DataFrame({"value": [1]})).shape == (1, 1)
+
+
+def test_profile_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(profiler, "PROFILE_CACHE_SIZE", 2)
+    frame = pd.DataFrame({"value": [1]})
+    for version in ("a", "b", "c"):
+        profile_in_background(version, frame).result()
+
+    assert list(profiler._profiles) == ["b", "c"]
@@ -0,0 +1,86 @@
+import pandas as pd
+import pytest
+from pyarrow import feather
+
+from src.sandbox import CodeLimitExceeded, CodeRunnerPool, run_snippet
+
+
+def test_run_snippet_captures_output_and_last_expression():
+    output, value = run_snippet("print('hi')\nx = 2\nx * 21", {})
+    assert output == "hi\n"
+    assert value == 42
+
+
+def test_run_snippet_statement_has_no_value():
+    assert run_snippet("x = 1", {}) == ("", None)
+
+
+@pytest.fixture
+def datasets(tmp_path):
+    paths = {}
+    for name, frame in {"sales": pd.DataFrame({"amount": [1, 2, 3]}),
+                        "costs": pd.DataFrame({"amount": [10, 20]})}.items():
+        path = tmp_path / f"{name}.arrow"
+        feather.write_feather(frame, path)
+        paths[name] = str(path)
+    return paths
+
+
+@pytest.fixture
+def pool():
+    pool = CodeRunnerPool(workers=1, cpu_seconds=2, timeout=10, memory_bytes=256 * 1024 * 1024)
+    yield pool
+    pool.close()
+
+
+def run(pool, datasets, code, requested=None):
+    def arrow_path(name):
+        if requested is not None:
+            requested.append(name)
+        return datasets[name]
+    return pool.run(code, list(datasets), arrow_path, "sales", False, 100)
+
+
+def test_runs_code_against_the_selected_dataset(pool, datasets):
+    result = run(pool, datasets, "print(len(df))\ndf['amount'].sum()")
+    assert result["output"] == "3\n"
+    assert result["value"] == "6"
+
+
+def test_only_requests_datasets_the_code_uses(pool, datasets):
+    requested = []
+    assert run(pool, datasets, "int(dfs['costs']['amount'].sum())", requested)["value"] == "30"
+    assert requested == ["sales", "costs"]
+
+    requested.clear()
+    run(pool, datasets, "len(df)", requested)
+    assert requested == ["sales"]
+
+
+def test_code_errors_are_returned(pool, datasets):
+    assert "is not loaded" in run(pool, datasets, "dfs['missing']")["error"]
+    assert run(pool, datasets, "open('/etc/passwd')")["error"] == "name 'open' is not defined"
+
+
+def test_cpu_limit_is_reported_and_worker_reused(pool, datasets):
+    result = run(pool, datasets, "while True:\n    pass")
+    assert result["error"] == "CPU time limit exceeded"
+    assert run(pool, datasets, "len(df)")["value"] == "3"
+
+
+def test_wall_time_limit_replaces_the_worker(datasets):
+    pool = CodeRunnerPool(workers=1, cpu_seconds=60, timeout=1, memory_bytes=256 * 1024 * 1024)
+    try:
+        with pytest.raises(CodeLimitExceeded, match="Time limit"):
+            run(pool, datasets, "while True:\n    pass")
+        # The replacement worker imports pandas on its first task.
+        pool.timeout = 60
+        assert run(pool, datasets, "len(df)")["value"] == "3"
+    finally:
+        pool.close()
+
+
+def test_memory_limit_replaces_the_worker(pool, datasets):
+    with pytest.raises(CodeLimitExceeded, match="Memory limit"):
+        run(pool, datasets, "blocks = []\nwhile True:\n    blocks.append(np.ones(16 * 1024 * 1024))")
+    assert run(pool, datasets, "len(df)")["value"] == "3"
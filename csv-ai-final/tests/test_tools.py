@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from src import csv_analyzer, tools
+from src.csv_analyzer import CSVDataAnalyzer
+from src.tools import execute_pandas_code_tool, load_result_messages, use_workspace
+
+
+def test_load_result_messages_name_the_dataset_not_the_upload_path():
+    result = {"success": True, "name": "sales_2", "shape": (3, 1), "source": "csv",
+              "load_seconds": 0.1, "memory_mb": 0.0, "columns": ["amount"]}
+
+    human, reply = load_result_messages("Sales.csv", result)
+
+    assert human.content == "I uploaded Sales.csv, loaded as dataset 'sales_2'"
+    assert "temp_" not in human.content
+    assert reply.content.startswith("Successfully loaded CSV as dataset 'sales_2'")
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    monkeypatch.setattr(csv_analyzer, "CACHE_DIR", tmp_path / "cache")
+    path = tmp_path / "sales.csv"
+    pd.DataFrame({"amount": [1, 2, 3]}).to_csv(path, index=False)
+    workspace = CSVDataAnalyzer()
+    workspace.load_csv(str(path))
+    return workspace
+
+
+@pytest.mark.parametrize("output, expected", [
+    ("", "6"),
+    ("total:\n", "total:\n6"),
+    ("total:", "total:\n6"),
+])
+def test_execute_pandas_code_puts_the_value_on_its_own_line(workspace, monkeypatch, output, expected):
+    runner = SimpleNamespace(run=lambda *args: {"output": output, "value": "6", "plot": None, "plot_error": None})
+    monkeypatch.setattr(tools, "get_code_runner", lambda: runner)
+
+    with use_workspace(workspace):
+        result = execute_pandas_code_tool.invoke({"code": "df['amount'].sum()"})
+
+    assert result == f"Pandas code executed successfully:\n\n{expected}"
@@ -1,6 +1,5 @@
 import os
 import base64
-import uvicorn
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.schema import HumanMessage, SystemMessage
 from dotenv import load_dotenv
@@ -8,6 +7,8 @@ from fastapi import FastAPI, UploadFile, File, HTTPException
 from pydantic import SecretStr
 from src.config import create_classification_prompt
 from src.schemas import ClassificationResponse
+from src.timing import instrument_app, span, record_size
+from src.server import run_server
 
 load_dotenv()
 
@@ -19,6 +20,8 @@ app = FastAPI(
     redoc_url="/redoc",
 )
 
+instrument_app(app, service="doc-classify")
+
 
 class PDFDocumentClassifier:
     def __init__(self):
@@ -34,7 +37,9 @@ class PDFDocumentClassifier:
 
     async def encode_pdf_to_base64(self, pdf_data: bytes) -> str | None:
         try:
-            pdf_base64 = base64.b64encode(pdf_data).decode("utf-8")
+            with span("pdf_encode"):
+                pdf_base64 = base64.b64encode(pdf_data).decode("utf-8")
+            record_size("pdf_payload", len(pdf_base64))
             return pdf_base64
         except Exception as e:
             print(f"Error encoding PDF: {e}")
@@ -59,7 +64,8 @@ class PDFDocumentClassifier:
         message.append(HumanMessage(content=[pdf_part]))
 
         try:
-            response = await self.llm.ainvoke(message)
+            with span("classification_llm"):
+                response = await self.llm.ainvoke(message)
             if isinstance(response, ClassificationResponse):
                 return response
             elif isinstance(response, dict):
@@ -95,5 +101,4 @@ async def health_check():
 
 
 if __name__ == "__main__":
-    port = int(os.environ.get("PORT", 8004))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    run_server("main:app", default_port=8004)
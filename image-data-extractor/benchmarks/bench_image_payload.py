@@ -0,0 +1,63 @@
+import asyncio
+import base64
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image, ImageDraw, ImageFilter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.config import IMAGE_STAGE_MAX_PIXELS
+from src.utils.document_parts import build_document_parts
+
+PHOTO_SIZE = (4000, 3000)
+STAGES = list(IMAGE_STAGE_MAX_PIXELS)
+
+
+def build_phone_photo(seed: int) -> Image.Image:
+    rng = random.Random(seed)
+    photo = Image.effect_noise(PHOTO_SIZE, 24).convert("RGB")
+    photo = Image.blend(photo, Image.new("RGB", PHOTO_SIZE, (90, 70, 50)), 0.6)
+
+    draw = ImageDraw.Draw(photo)
+    left, top = rng.randint(400, 800), rng.randint(300, 600)
+    right, bottom = left + 2600, top + 1650
+    draw.rectangle((left, top, right, bottom), fill=(236, 232, 220))
+    draw.rectangle((left + 100, top + 300, left + 700, top + 1100), fill=(150, 150, 160))
+    for line in range(12):
+        y = top + 250 + line * 110
+        draw.rectangle((left + 850, y, left + 850 + rng.randint(800, 1600), y + 45), fill=(30, 30, 40))
+    return photo.filter(ImageFilter.GaussianBlur(1))
+
+
+def encoded_size(document_parts: list) -> int:
+    return sum(len(part["image_url"]) for part in document_parts)
+
+
+async def main() -> None:
+    with tempfile.TemporaryDirectory() as temp_dir:
+        documents = []
+        for seed, (suffix, content_type, save_options) in enumerate([
+            (".jpg", "image/jpeg", {"format": "JPEG", "quality": 95}),
+            (".png", "image/png", {"format": "PNG"}),
+        ]):
+            path = Path(temp_dir) / f"document_{seed}{suffix}"
+            build_phone_photo(seed).save(path, **save_options)
+            documents.append((path, content_type))
+
+        for path, content_type in documents:
+            raw_size = len(base64.b64encode(path.read_bytes()))
+            print(f"{content_type} {PHOTO_SIZE[0]}x{PHOTO_SIZE[1]}: raw base64 {raw_size / 1024:,.0f} KiB")
+            for stage in STAGES:
+                start = time.perf_counter()
+                document_parts = await build_document_parts([path], [content_type], stage)
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                size = encoded_size(document_parts)
+                print(f"  {stage:<18} {size / 1024:8,.0f} KiB  ({size / raw_size:6.1%} of raw)  {elapsed_ms:7.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
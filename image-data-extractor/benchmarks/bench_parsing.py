@@ -0,0 +1,69 @@
+import ast
+import json
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.utils.parsing import parse_llm_string_to_dict
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+ROUNDS = 200
+
+
+def legacy_parse_llm_string_to_dict(llm_output: str) -> dict:
+    s = llm_output.strip()
+    json_match = re.search(r'\{.*\}', s, re.DOTALL)
+    if not json_match:
+        raise ValueError("No JSON object found in the LLM output")
+    s = json_match.group(0).strip()
+    try:
+        loaded = yaml.safe_load(s)
+        if isinstance(loaded, dict):
+            return loaded
+    except Exception:
+        pass
+    try:
+        loaded = ast.literal_eval(s)
+        if isinstance(loaded, dict):
+            return loaded
+    except (ValueError, SyntaxError):
+        pass
+    s_fixed = re.sub(r'(?<!\\)\\(?=[dswDSW])', r'\\\\', s)
+    return json.loads(s_fixed)
+
+
+def load_outputs() -> dict:
+    clean = (FIXTURES_DIR / "residence_card_schema.txt").read_text()
+    return {
+        "clean JSON": clean,
+        "unescaped regex": clean.replace("\\\\d", "\\d"),
+    }
+
+
+def time_parser(parser, llm_output: str) -> list:
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        parser(llm_output)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main() -> None:
+    for output_name, llm_output in load_outputs().items():
+        assert legacy_parse_llm_string_to_dict(llm_output) == parse_llm_string_to_dict(llm_output)
+        print(f"{output_name} ({len(llm_output)} chars)")
+        for parser_name, parser in [("legacy (yaml first)", legacy_parse_llm_string_to_dict),
+                                    ("tiered (json first)", parse_llm_string_to_dict)]:
+            timings = time_parser(parser, llm_output)
+            print(f"  {parser_name:<20} median={statistics.median(timings):8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
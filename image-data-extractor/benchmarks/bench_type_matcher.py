@@ -0,0 +1,96 @@
+import random
+import statistics
+import sys
+import time
+from difflib import SequenceMatcher
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.extractors.type_matcher import DocumentTypeMatcher
+
+DOCUMENT_TYPES = 5_000
+QUERIES = 200
+QUALIFIERS = ["state", "federal", "municipal", "provincial", "temporary", "permanent", "digital", "commercial",
+              "junior", "senior", "military", "diplomatic", "student", "family", "business", "resident"]
+SUBJECTS = ["driver", "voter", "health", "tax", "residence", "work", "birth", "marriage", "death", "property",
+            "vehicle", "firearm", "fishing", "trade", "pension", "insurance", "utility", "bank", "income", "caste"]
+KINDS = ["card", "license", "certificate", "permit", "statement", "bill", "id", "passport", "record", "letter"]
+
+
+def build_document_types(count: int) -> list:
+    rng = random.Random(7)
+    types = set()
+    while len(types) < count:
+        parts = [rng.choice(QUALIFIERS), rng.choice(SUBJECTS), rng.choice(KINDS)]
+        if rng.random() < 0.3:
+            parts.insert(0, f"region{rng.randint(1, 60)}")
+        types.add("_".join(parts))
+    return sorted(types)
+
+
+def build_queries(document_types: list, count: int) -> list:
+    rng = random.Random(11)
+    queries = []
+    for _ in range(count):
+        document_type = rng.choice(document_types)
+        variant = rng.choice(["exact", "typo", "suffix", "unknown"])
+        if variant == "exact":
+            queries.append(document_type.upper())
+        elif variant == "typo":
+            position = rng.randrange(len(document_type))
+            queries.append(document_type[:position] + document_type[position + 1:])
+        elif variant == "suffix":
+            queries.append(f"{document_type}_front")
+        else:
+            queries.append(f"{rng.choice(SUBJECTS)}_{rng.choice(SUBJECTS)}_document")
+    return queries
+
+
+def linear_scan(classified_type: str, existing_types: list, threshold: float = 0.8):
+    best_match = None
+    best_score = 0.0
+    classified_lower = classified_type.lower().strip()
+    for existing_type in existing_types:
+        existing_lower = existing_type.lower().strip()
+        if classified_lower == existing_lower:
+            return existing_type
+        similarity = SequenceMatcher(None, classified_lower, existing_lower).ratio()
+        if classified_lower in existing_lower or existing_lower in classified_lower:
+            similarity = max(similarity, 0.85)
+        if similarity > best_score and similarity >= threshold:
+            best_score = similarity
+            best_match = existing_type
+    return best_match
+
+
+def time_matches(match, queries: list) -> tuple:
+    timings = []
+    results = []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(match(query))
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings, results
+
+
+def main() -> None:
+    document_types = build_document_types(DOCUMENT_TYPES)
+    queries = build_queries(document_types, QUERIES)
+
+    start = time.perf_counter()
+    matcher = DocumentTypeMatcher(document_types)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    scan_timings, scan_results = time_matches(lambda q: linear_scan(q, document_types), queries)
+    index_timings, index_results = time_matches(matcher.match, queries)
+
+    agreement = sum(a == b for a, b in zip(scan_results, index_results)) / len(queries)
+    print(f"{DOCUMENT_TYPES} document types, {QUERIES} queries, index built in {build_ms:.1f} ms")
+    for name, timings in [("SequenceMatcher scan", scan_timings), ("DocumentTypeMatcher", index_timings)]:
+        print(f"{name:<22} median={statistics.median(timings):8.3f} ms  p95={statistics.quantiles(timings, n=20)[18]:8.3f} ms")
+    print(f"Agreement with linear scan: {agreement:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from bson import ObjectId
 from typing import Optional, List
 from pathlib import Path
 import tempfile
@@ -13,10 +14,19 @@ from dotenv import load_dotenv
 
 from src.db.models import DocumentSchema, SchemaStatus, SchemaModificationRequest, SchemaModificationResponse
 from src.db.connection import init_db
+from src.db.registry import schema_registry
+from src.db.query_plans import report_slow_query_plans
+from src.db.schema_generation import schema_generation_coordinator, SchemaGenerationInProgress
 from src.extractors.universal import extract_with_db_schema
 from src.extractors.schema_generator import generate_schema_from_documents
 from src.extractors.classifier import classify_document_type
-from src.config import MIN_CLASSIFICATION_CONFIDENCE, SUPPORTED_DOCUMENT_TYPES
+from src.config import (
+    MIN_CLASSIFICATION_CONFIDENCE,
+    SUPPORTED_DOCUMENT_TYPES,
+    SCHEMA_LIST_DEFAULT_LIMIT,
+    SCHEMA_LIST_MAX_LIMIT,
+    PDF_CLASSIFICATION_MAX_PAGES
+)
 from src.utils.schema_operations import (
     compare_schemas,
     apply_schema_modifications,
@@ -26,6 +36,20 @@ from src.utils.schema_operations import (
     get_modification_metadata,
     find_latest_schema_version
 )
+from src.utils.pdf_pages import (
+    parse_page_selection,
+    subset_pdf_documents,
+    select_pages_for_document_type
+)
+from src.utils.timing import instrument_app, span, record_size
+from src.utils.server import run_server
+from src.utils.schema_listing import (
+    build_schema_filter,
+    compute_schemas_etag,
+    count_schemas,
+    serialize_schema_document,
+    stream_schema_page
+)
 
 load_dotenv()
 
@@ -33,7 +57,10 @@ load_dotenv()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db()
+    await report_slow_query_plans()
+    await schema_registry.start()
     yield
+    await schema_registry.stop()
 
 
 app = FastAPI(
@@ -44,15 +71,23 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
+instrument_app(app, service="image-data-extractor")
+
 
 @app.post("/extract")
 async def extract_document(
-    document: List[UploadFile] = File(...)
+    document: List[UploadFile] = File(...),
+    pages: Optional[str] = Form(default=None)
 ) -> JSONResponse:
     if not document or len(document) == 0:
         raise HTTPException(
             status_code=400, detail="At least one document file is required")
 
+    try:
+        page_indices = parse_page_selection(pages) if pages else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     for i, doc_file in enumerate(document):
         if doc_file.content_type not in SUPPORTED_DOCUMENT_TYPES:
             raise HTTPException(
@@ -68,21 +103,36 @@ async def extract_document(
         document_paths = []
 
         try:
-            for i, doc_file in enumerate(document):
-                doc_path = temp_path / f"document_{i}_{uuid.uuid4()}"
-                async with aiofiles.open(doc_path, "wb") as buffer:
-                    content = await doc_file.read()
-                    await buffer.write(content)
-                document_paths.append(doc_path)
+            upload_size = 0
+            with span("upload_save"):
+                for i, doc_file in enumerate(document):
+                    doc_path = temp_path / f"document_{i}_{uuid.uuid4()}"
+                    async with aiofiles.open(doc_path, "wb") as buffer:
+                        content = await doc_file.read()
+                        await buffer.write(content)
+                    upload_size += len(content)
+                    document_paths.append(doc_path)
+            record_size("upload", upload_size)
 
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to save documents: {e}")
 
+        content_types = [doc.content_type for doc in document]
+        with span("page_subset"):
+            if page_indices:
+                document_paths = await subset_pdf_documents(
+                    document_paths, content_types, page_indices, temp_path)
+                classification_paths = document_paths
+            else:
+                classification_paths = await subset_pdf_documents(
+                    document_paths, content_types, list(range(PDF_CLASSIFICATION_MAX_PAGES)), temp_path)
+
         try:
-            classification = await asyncio.wait_for(
-                classify_document_type(document_paths, [doc.content_type for doc in document]),
-                timeout=240.0
-            )
+            with span("classification"):
+                classification = await asyncio.wait_for(
+                    classify_document_type(classification_paths, content_types),
+                    timeout=240.0
+                )
         except asyncio.TimeoutError:
             raise HTTPException(
                 status_code=408,
@@ -113,101 +163,150 @@ async def extract_document(
         document_type = classification.document_type
         country = classification.country
 
+        if not page_indices:
+            with span("page_selection"):
+                document_paths = await select_pages_for_document_type(
+                    document_paths, content_types, document_type, temp_path)
+
         try:
-            active_schema_task = DocumentSchema.find_one({
-                "document_type": document_type,
-                "country": country,
-                "status": SchemaStatus.ACTIVE
-            })
-
-            in_review_schema_task = DocumentSchema.find_one({
-                "document_type": document_type,
-                "country": country,
-                "status": SchemaStatus.IN_REVIEW
-            })
-
-            schema, in_review_schema = await asyncio.gather(
-                active_schema_task,
-                in_review_schema_task
-            )
+            active_schema_task = schema_registry.find(
+                document_type, country, SchemaStatus.ACTIVE)
 
-            if schema:
-                extracted_data_json = await extract_with_db_schema(
-                    document_paths=document_paths,
-                    document_types=[doc.content_type for doc in document],
-                    document_schema=schema
+            in_review_schema_task = schema_registry.find(
+                document_type, country, SchemaStatus.IN_REVIEW)
+
+            with span("schema_lookup"):
+                schema, in_review_schema = await asyncio.gather(
+                    active_schema_task,
+                    in_review_schema_task
                 )
 
-                extracted_data = json.loads(extracted_data_json)
+            if schema:
+                with span("extraction"):
+                    extraction = await extract_with_db_schema(
+                        document_paths=document_paths,
+                        document_types=content_types,
+                        document_schema=schema
+                    )
+
+                if extraction is None:
+                    raise HTTPException(status_code=400, detail="No readable document content to extract from")
+
+                extracted_data_json, invalid_fields = extraction
+                with span("serialization"):
+                    extracted_data = json.loads(extracted_data_json)
+
+                    response = JSONResponse(
+                        status_code=200,
+                        content={
+                            "status": "extracted",
+                            "data": extracted_data,
+                            "invalid_fields": invalid_fields,
+                            "classification": {
+                                "document_type": classification.document_type,
+                                "country": classification.country,
+                                "confidence": classification.confidence
+                            },
+                            "schema_used": {
+                                "document_type": schema.document_type,
+                                "country": schema.country,
+                                "version": schema.version
+                            }
+                        }
+                    )
+                return response
 
+            if in_review_schema:
                 return JSONResponse(
-                    status_code=200,
+                    status_code=202,
                     content={
-                        "status": "extracted",
-                        "data": extracted_data,
+                        "status": "pending_review",
+                        "message": "A schema for this document type is already awaiting approval.",
                         "classification": {
                             "document_type": classification.document_type,
                             "country": classification.country,
                             "confidence": classification.confidence
                         },
-                        "schema_used": {
-                            "document_type": schema.document_type,
-                            "country": schema.country,
-                            "version": schema.version
-                        }
+                        "schema_id": str(in_review_schema.id),
+                        "document_type": in_review_schema.document_type,
+                        "country": in_review_schema.country
                     }
                 )
 
-            if in_review_schema:
+            async def generate_and_store_schema():
+                with span("schema_generation"):
+                    generated_schema = await generate_schema_from_documents(
+                        document_paths=document_paths,
+                        document_types=content_types,
+                        document_type=document_type,
+                        country=country
+                    )
+
+                if not generated_schema:
+                    return None, None
+
+                schema_dict = {}
+                for field_name, field_def in generated_schema.document_schema.items():
+                    if isinstance(field_def, dict):
+                        schema_dict[field_name] = field_def
+                    else:
+                        schema_dict[field_name] = {
+                            "type": getattr(field_def, 'type', 'string'),
+                            "description": getattr(field_def, 'description', ''),
+                            "required": getattr(field_def, 'required', True),
+                            "example": getattr(field_def, 'example', None)
+                        }
+
+                new_schema = DocumentSchema(
+                    document_type=document_type,
+                    country=country,
+                    document_schema=schema_dict,
+                    status=SchemaStatus.IN_REVIEW,
+                    created_at=datetime.now(timezone.utc),
+                    updated_at=datetime.now(timezone.utc)
+                )
+
+                await new_schema.insert()
+                await schema_registry.invalidate()
+                return new_schema, generated_schema
+
+            try:
+                (new_schema, generated_schema), generated_here = await schema_generation_coordinator.run(
+                    document_type, country, generate_and_store_schema)
+            except SchemaGenerationInProgress:
                 return JSONResponse(
                     status_code=202,
                     content={
-                        "status": "pending_review",
-                        "message": "A schema for this document type is already awaiting approval.",
+                        "status": "generation_in_progress",
+                        "message": "A schema for this document type is being generated by another request. Retry later.",
                         "classification": {
                             "document_type": classification.document_type,
                             "country": classification.country,
                             "confidence": classification.confidence
-                        },
-                        "schema_id": str(in_review_schema.id),
-                        "document_type": in_review_schema.document_type,
-                        "country": in_review_schema.country
+                        }
                     }
                 )
 
-            generated_schema = await generate_schema_from_documents(
-                document_paths=document_paths,
-                document_types=[doc.content_type for doc in document],
-                document_type=document_type,
-                country=country
-            )
-
-            if not generated_schema:
+            if not new_schema:
                 raise HTTPException(
                     status_code=500, detail="Failed to generate schema")
 
-            schema_dict = {}
-            for field_name, field_def in generated_schema.document_schema.items():
-                if isinstance(field_def, dict):
-                    schema_dict[field_name] = field_def
-                else:
-                    schema_dict[field_name] = {
-                        "type": getattr(field_def, 'type', 'string'),
-                        "description": getattr(field_def, 'description', ''),
-                        "required": getattr(field_def, 'required', True),
-                        "example": getattr(field_def, 'example', None)
+            if not generated_here:
+                return JSONResponse(
+                    status_code=202,
+                    content={
+                        "status": "pending_review",
+                        "message": "A schema for this document type was generated by a concurrent request and is awaiting approval.",
+                        "classification": {
+                            "document_type": classification.document_type,
+                            "country": classification.country,
+                            "confidence": classification.confidence
+                        },
+                        "schema_id": str(new_schema.id),
+                        "document_type": new_schema.document_type,
+                        "country": new_schema.country
                     }
-
-            new_schema = DocumentSchema(
-                document_type=document_type,
-                country=country,
-                document_schema=schema_dict,
-                status=SchemaStatus.IN_REVIEW,
-                created_at=datetime.now(timezone.utc),
-                updated_at=datetime.now(timezone.utc)
-            )
-
-            await new_schema.insert()
+                )
 
             return JSONResponse(
                 status_code=201,
@@ -223,45 +322,79 @@ async def extract_document(
                         "document_type": generated_schema.document_type,
                         "country": generated_schema.country,
                         "confidence": generated_schema.confidence,
-                        "schema": schema_dict
+                        "schema": new_schema.document_schema
                     },
                     "schema_id": str(new_schema.id)
                 }
             )
 
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Extraction failed, {e}")
 
 
 @app.get("/schemas")
-async def get_all_schemas() -> JSONResponse:
+async def get_all_schemas(
+    request: Request,
+    status: Optional[SchemaStatus] = Query(default=None),
+    document_type: Optional[str] = Query(default=None),
+    country: Optional[str] = Query(default=None),
+    include_schema: bool = Query(default=True),
+    cursor: Optional[str] = Query(default=None),
+    limit: int = Query(default=SCHEMA_LIST_DEFAULT_LIMIT, ge=0, le=SCHEMA_LIST_MAX_LIMIT)
+) -> Response:
+    try:
+        query = build_schema_filter(status, document_type, country, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        etag = compute_schemas_etag(
+            await schema_registry.read_version(),
+            status=status,
+            document_type=document_type,
+            country=country,
+            include_schema=include_schema,
+            cursor=cursor,
+            limit=limit
+        )
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+
+        total_count = await count_schemas(query)
+        return StreamingResponse(
+            stream_schema_page(query, limit, include_schema, total_count),
+            media_type="application/json",
+            headers={"ETag": etag}
+        )
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Failed to retrieve schemas: {e}")
+
+
+@app.get("/schemas/{schema_id}")
+async def get_schema(schema_id: str) -> JSONResponse:
+    if not ObjectId.is_valid(schema_id):
+        raise HTTPException(status_code=400, detail=f"Invalid schema id: {schema_id}")
+
     try:
-        schemas = await DocumentSchema.find_all().to_list()
-
-        schema_list = []
-        for schema in schemas:
-            schema_list.append({
-                "id": str(schema.id),
-                "document_type": schema.document_type,
-                "country": schema.country,
-                "status": schema.status,
-                "version": schema.version,
-                "created_at": schema.created_at.isoformat(),
-                "updated_at": schema.updated_at.isoformat(),
-                "schema": schema.document_schema
-            })
+        schema = await DocumentSchema.get(schema_id)
+        if not schema:
+            raise HTTPException(status_code=404, detail="Schema not found")
 
         return JSONResponse(
             status_code=200,
-            content={
-                "schemas": schema_list,
-                "total_count": len(schema_list)
-            }
+            content=serialize_schema_document(
+                schema.model_dump(by_alias=True, mode="python"))
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
-            status_code=500, detail=f"Failed to retrieve schemas: {e}")
+            status_code=500, detail=f"Failed to retrieve schema: {e}")
 
 
 @app.put("/schemas/{schema_id}/approve")
@@ -284,21 +417,25 @@ async def approve_schema(schema_id: str) -> JSONResponse:
         })
 
         deprecated_schema_info = None
-        if existing_active:
-            existing_active.status = SchemaStatus.DEPRECATED
-            existing_active.updated_at = datetime.now(timezone.utc)
-            await existing_active.save()
-            deprecated_schema_info = {
-                "id": str(existing_active.id),
-                "version": existing_active.version
-            }
+        try:
+            if existing_active:
+                existing_active.status = SchemaStatus.DEPRECATED
+                existing_active.updated_at = datetime.now(timezone.utc)
+                await existing_active.save()
+                deprecated_schema_info = {
+                    "id": str(existing_active.id),
+                    "version": existing_active.version
+                }
 
-        schema.status = SchemaStatus.ACTIVE
-        schema.updated_at = datetime.now(timezone.utc)
-        if existing_active:
-            schema.version = existing_active.version + 1
+            schema.status = SchemaStatus.ACTIVE
+            schema.updated_at = datetime.now(timezone.utc)
+            if existing_active:
+                schema.version = existing_active.version + 1
 
-        await schema.save()
+            await schema.save()
+        finally:
+            # Also after a partial write, so no cache keeps the old status.
+            await schema_registry.invalidate()
 
         return JSONResponse(
             status_code=200,
@@ -362,10 +499,6 @@ async def modify_schema(schema_id: str, request: SchemaModificationRequest) -> J
         modification_metadata = get_modification_metadata(
             changes, request.change_description)
 
-        schema.status = SchemaStatus.DEPRECATED
-        schema.updated_at = datetime.now(timezone.utc)
-        await schema.save()
-
         new_schema = DocumentSchema(
             document_type=schema.document_type,
             country=schema.country,
@@ -376,7 +509,13 @@ async def modify_schema(schema_id: str, request: SchemaModificationRequest) -> J
             version=next_version
         )
 
-        await new_schema.insert()
+        schema.status = SchemaStatus.DEPRECATED
+        schema.updated_at = datetime.now(timezone.utc)
+        try:
+            await schema.save()
+            await new_schema.insert()
+        finally:
+            await schema_registry.invalidate()
 
         response = SchemaModificationResponse(
             schema_id=str(new_schema.id),
@@ -424,14 +563,4 @@ async def health_check():
 
 
 if __name__ == "__main__":
-    import uvicorn
-    port = int(os.environ.get("PORT", 8005))
-    uvicorn.run(
-        app,
-        host="0.0.0.0",
-        port=port,
-        workers=1,
-        loop="asyncio",
-        access_log=False,
-        log_level="info"
-    )
+    run_server("main:app", default_port=8005, loop="asyncio", access_log=False, log_level="info")
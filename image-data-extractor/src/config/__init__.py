@@ -1,12 +1,36 @@
+import os
+
 MIN_CLASSIFICATION_CONFIDENCE = 0.8
 MAX_RETRY_ATTEMPTS = 3
 EXTRACTION_RETRY_ATTEMPTS = 2
 SCHEMA_GENERATION_RETRY_ATTEMPTS = 3
+FIELD_DISCOVERY_GRACE_SECONDS = 30.0
+SCHEMA_REGISTRY_REFRESH_SECONDS = 5.0
+SLOW_QUERY_PLAN_MS = 50
+SCHEMA_GENERATION_LEASE_SECONDS = 60
+SCHEMA_GENERATION_POLL_SECONDS = 2.0
+# How long a request waits for a schema another request is generating before
+# answering that generation is still in progress.
+SCHEMA_GENERATION_WAIT_SECONDS = float(os.getenv("SCHEMA_GENERATION_WAIT_SECONDS", "60"))
+SCHEMA_LIST_DEFAULT_LIMIT = 100
+SCHEMA_LIST_MAX_LIMIT = 500
 
 SUPPORTED_IMAGE_TYPES = ["image/jpeg", "image/png", "image/jpg"]
 SUPPORTED_PDF_TYPES = ["application/pdf"]
 SUPPORTED_DOCUMENT_TYPES = SUPPORTED_IMAGE_TYPES + SUPPORTED_PDF_TYPES
 
+IMAGE_STAGE_MAX_PIXELS = {
+    "classification": 1_000_000,
+    "schema_generation": 4_000_000,
+    "extraction": 4_000_000
+}
+IMAGE_JPEG_QUALITY = 85
+IMAGE_PROCESSING_WORKERS = 4
+IMAGE_CROP_MIN_AREA_RATIO = 0.2
+# Decoded uploads kept for the later stages of a request, about 12 MB each.
+IMAGE_CACHE_SIZE = 4
+PDF_CLASSIFICATION_MAX_PAGES = 2
+
 DOCUMENT_FORMAT_MAPPING = {
     "image/jpeg": "jpeg",
     "image/jpg": "jpeg",
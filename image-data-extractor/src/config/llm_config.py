@@ -25,7 +25,7 @@ async def _init_google_genai_async(model: str, temperature: float, api_key: str)
     )
 
 
-async def get_llm(model_name: str, model_provider: str, temperature: float, structured_schema: type = None):
+async def get_llm(model_name: str, model_provider: str, temperature: float, structured_schema: type = None, include_raw: bool = False):
     load_dotenv()
 
     api_key = os.getenv("GOOGLE_API_KEY")
@@ -47,5 +47,7 @@ async def get_llm(model_name: str, model_provider: str, temperature: float, stru
         )
 
     if structured_schema:
+        if include_raw:
+            return await asyncio.to_thread(llm.with_structured_output, structured_schema, include_raw=True)
         return await asyncio.to_thread(llm.with_structured_output, structured_schema)
     return llm
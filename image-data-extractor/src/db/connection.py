@@ -2,6 +2,7 @@ import os
 from pymongo import AsyncMongoClient
 from beanie import init_beanie
 from .models import DocumentSchema
+from .migrations import migrate_document_schemas
 
 
 class Database:
@@ -20,9 +21,10 @@ async def connect_to_mongo():
         mongodb_url,
     )
 
-    database_name = "image_extractor"
+    database_name = os.getenv("MONGODB_DATABASE", "image_extractor")
     db.database = db.client[database_name]
 
+    await migrate_document_schemas(db.database)
     await init_beanie(
         database=db.database,
         document_models=[DocumentSchema]
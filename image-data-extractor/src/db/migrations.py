@@ -0,0 +1,54 @@
+import logging
+from datetime import datetime, timezone
+
+from .models import DocumentSchema, SchemaStatus
+from .registry_version import bump_registry_version
+
+
+# Plain (document_type, country) index declared by earlier versions of the
+# model. It has the same keys as the partial unique index that replaced it, so
+# it must go before init_beanie creates the new one.
+LEGACY_INDEX_KEYS = [("document_type", 1), ("country", 1)]
+
+logger = logging.getLogger(__name__)
+
+
+async def drop_legacy_indexes(collection) -> None:
+    for name, index in (await collection.index_information()).items():
+        if list(index["key"]) == LEGACY_INDEX_KEYS and "partialFilterExpression" not in index:
+            await collection.drop_index(name)
+            logger.info("Dropped legacy index %s on %s", name, collection.name)
+
+
+async def deprecate_duplicate_active_schemas(collection) -> int:
+    cursor = await collection.aggregate([
+        {"$match": {"status": SchemaStatus.ACTIVE.value}},
+        {"$sort": {"version": -1, "updated_at": -1}},
+        {"$group": {
+            "_id": {"document_type": "$document_type", "country": "$country"},
+            "ids": {"$push": "$_id"},
+        }},
+        {"$match": {"ids.1": {"$exists": True}}},
+    ])
+    deprecated = 0
+    async for group in cursor:
+        # Keep the highest version active; the rest would break the unique
+        # index on ACTIVE schemas.
+        extra_ids = group["ids"][1:]
+        result = await collection.update_many(
+            {"_id": {"$in": extra_ids}},
+            {"$set": {"status": SchemaStatus.DEPRECATED.value, "updated_at": datetime.now(timezone.utc)}}
+        )
+        deprecated += result.modified_count
+        logger.warning(
+            "Deprecated %d duplicate ACTIVE schema(s) for %s/%s",
+            result.modified_count, group["_id"]["document_type"], group["_id"]["country"]
+        )
+    return deprecated
+
+
+async def migrate_document_schemas(database) -> None:
+    collection = database[DocumentSchema.Settings.name]
+    await drop_legacy_indexes(collection)
+    if await deprecate_duplicate_active_schemas(collection):
+        await bump_registry_version(database)
@@ -1,6 +1,7 @@
 from datetime import datetime, timezone
 from typing import Dict, Any, Optional, List
 from beanie import Document
+from pymongo import IndexModel, ASCENDING, DESCENDING
 from pydantic import BaseModel, Field
 from enum import Enum
 
@@ -82,5 +83,19 @@ class DocumentSchema(Document):
     class Settings:
         name = "document_schemas"
         indexes = [
-            [("document_type", 1), ("country", 1)],
+            [("country", 1), ("document_type", 1)],
+            IndexModel(
+                [("document_type", ASCENDING), ("country", ASCENDING), ("status", ASCENDING)],
+                name="document_type_country_status"
+            ),
+            IndexModel(
+                [("document_type", ASCENDING), ("country", ASCENDING), ("version", DESCENDING)],
+                name="document_type_country_version_desc"
+            ),
+            IndexModel(
+                [("document_type", ASCENDING), ("country", ASCENDING)],
+                name="single_active_schema",
+                unique=True,
+                partialFilterExpression={"status": SchemaStatus.ACTIVE.value}
+            ),
         ]
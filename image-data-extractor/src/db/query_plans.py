@@ -0,0 +1,73 @@
+import logging
+from typing import Any, Dict, List
+
+from .connection import db
+from .models import DocumentSchema, SchemaStatus
+from ..config import SLOW_QUERY_PLAN_MS
+
+
+SAMPLE_DOCUMENT_TYPE = "passport"
+SAMPLE_COUNTRY = "IN"
+SLOW_PLAN_STAGES = {"COLLSCAN", "SORT"}
+
+logger = logging.getLogger(__name__)
+
+
+def get_hot_queries(collection: str) -> Dict[str, Dict[str, Any]]:
+    key_filter = {"document_type": SAMPLE_DOCUMENT_TYPE, "country": SAMPLE_COUNTRY}
+    return {
+        "find_schema_by_status": {
+            "find": collection,
+            "filter": {**key_filter, "status": SchemaStatus.ACTIVE.value},
+            "limit": 1
+        },
+        "find_latest_schema_version": {
+            "find": collection,
+            "filter": key_filter,
+            "sort": {"version": -1},
+            "limit": 1
+        },
+        "get_existing_document_types": {
+            "distinct": collection,
+            "key": "document_type",
+            "query": {"country": SAMPLE_COUNTRY}
+        },
+    }
+
+
+def collect_plan_stages(plan: Dict[str, Any]) -> List[str]:
+    stages = []
+    if "stage" in plan:
+        stages.append(plan["stage"])
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages.extend(collect_plan_stages(plan[key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(collect_plan_stages(child))
+    return stages
+
+
+async def report_slow_query_plans() -> None:
+    collection = DocumentSchema.get_collection_name()
+
+    for query_name, command in get_hot_queries(collection).items():
+        try:
+            explain = await db.database.command({
+                "explain": command,
+                "verbosity": "executionStats"
+            })
+        except Exception as e:
+            logger.warning("Query plan check skipped for %s: %s", query_name, e)
+            continue
+
+        stages = collect_plan_stages(explain["queryPlanner"]["winningPlan"])
+        execution_stats = explain.get("executionStats", {})
+        execution_ms = execution_stats.get("executionTimeMillis", 0)
+
+        slow_stages = sorted(SLOW_PLAN_STAGES.intersection(stages))
+        if slow_stages or execution_ms >= SLOW_QUERY_PLAN_MS:
+            logger.warning(
+                "Slow query plan for %s: stages=%s, time=%sms, docs_examined=%s, returned=%s",
+                query_name, " -> ".join(stages), execution_ms,
+                execution_stats.get("totalDocsExamined"), execution_stats.get("nReturned")
+            )
@@ -0,0 +1,116 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from .connection import db
+from .models import DocumentSchema, SchemaStatus
+from .registry_version import bump_registry_version, read_registry_version
+from ..config import SCHEMA_REGISTRY_REFRESH_SECONDS
+from ..extractors.type_matcher import DocumentTypeMatcher
+
+
+CACHED_STATUSES = [SchemaStatus.ACTIVE, SchemaStatus.IN_REVIEW]
+
+SchemaKey = Tuple[str, str, SchemaStatus]
+
+logger = logging.getLogger(__name__)
+
+
+# Every schema write bumps a version counter in MongoDB; each process polls it
+# and reloads its cache when it changes, so reads never hit the database.
+class SchemaRegistry:
+    def __init__(self, refresh_interval: float = SCHEMA_REGISTRY_REFRESH_SECONDS):
+        self.refresh_interval = refresh_interval
+        self.version: Optional[int] = None
+        self._schemas: Dict[SchemaKey, DocumentSchema] = {}
+        self._types_by_country: Dict[str, List[str]] = {}
+        self._matchers: Dict[str, DocumentTypeMatcher] = {}
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.version is not None
+
+    async def read_version(self) -> int:
+        return await read_registry_version(db.database)
+
+    async def load(self) -> None:
+        async with self._lock:
+            version = await self.read_version()
+            schemas = await DocumentSchema.find(
+                {"status": {"$in": CACHED_STATUSES}}
+            ).to_list()
+
+            # Document types of every status, DEPRECATED included, as
+            # get_existing_document_types has always returned them.
+            type_pairs = await DocumentSchema.aggregate([
+                {"$group": {"_id": {"country": "$country", "document_type": "$document_type"}}}
+            ]).to_list()
+
+            index: Dict[SchemaKey, DocumentSchema] = {}
+            for schema in schemas:
+                index.setdefault(
+                    (schema.document_type, schema.country, schema.status), schema)
+            types_by_country: Dict[str, set] = {}
+            for pair in type_pairs:
+                types_by_country.setdefault(pair["_id"]["country"], set()).add(pair["_id"]["document_type"])
+
+            self._schemas = index
+            self._types_by_country = {
+                country: sorted(types) for country, types in types_by_country.items()
+            }
+            self._matchers = {
+                country: DocumentTypeMatcher(types) for country, types in self._types_by_country.items()
+            }
+            self.version = version
+
+    async def start(self) -> None:
+        await self.load()
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._watch())
+
+    async def stop(self) -> None:
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                if await self.read_version() != self.version:
+                    await self.load()
+            except Exception as e:
+                logger.warning("Schema registry refresh failed: %s", e)
+
+    async def invalidate(self) -> None:
+        await bump_registry_version(db.database)
+        await self.load()
+
+    async def find(self, document_type: str, country: str, status: SchemaStatus) -> Optional[DocumentSchema]:
+        if self.loaded:
+            return self._schemas.get((document_type, country, status))
+
+        return await DocumentSchema.find_one({
+            "document_type": document_type,
+            "country": country,
+            "status": status
+        })
+
+    def document_types(self, country: str) -> Optional[List[str]]:
+        if not self.loaded:
+            return None
+        return list(self._types_by_country.get(country, []))
+
+    def type_matcher(self, country: str) -> Optional[DocumentTypeMatcher]:
+        if not self.loaded:
+            return None
+        return self._matchers.get(country) or DocumentTypeMatcher([])
+
+
+schema_registry = SchemaRegistry()
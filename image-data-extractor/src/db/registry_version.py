@@ -0,0 +1,18 @@
+# Every schema write bumps this counter. Schema registries reload when it
+# changes, and the /schemas ETag is derived from it, so a write that skips the
+# bump leaves stale schemas cached in every process and in clients.
+REGISTRY_META_COLLECTION = "schema_registry_meta"
+REGISTRY_VERSION_ID = "document_schemas"
+
+
+async def read_registry_version(database) -> int:
+    meta = await database[REGISTRY_META_COLLECTION].find_one({"_id": REGISTRY_VERSION_ID})
+    return meta["version"] if meta else 0
+
+
+async def bump_registry_version(database) -> None:
+    await database[REGISTRY_META_COLLECTION].update_one(
+        {"_id": REGISTRY_VERSION_ID},
+        {"$inc": {"version": 1}},
+        upsert=True
+    )
@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from pymongo.errors import DuplicateKeyError
+
+from .connection import db
+from .models import DocumentSchema, SchemaStatus
+from ..config import (
+    SCHEMA_GENERATION_LEASE_SECONDS,
+    SCHEMA_GENERATION_POLL_SECONDS,
+    SCHEMA_GENERATION_WAIT_SECONDS
+)
+
+
+LEASE_COLLECTION = "schema_generation_leases"
+
+GenerationResult = Tuple[Optional[DocumentSchema], Any]
+
+logger = logging.getLogger(__name__)
+
+
+class SchemaGenerationInProgress(Exception):
+    pass
+
+
+# Only one generation runs per (document_type, country): callers in the same
+# process share an in-flight future, and other processes are held off by a
+# lease document in MongoDB until the IN_REVIEW schema shows up.
+class SchemaGenerationCoordinator:
+    def __init__(self):
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+
+    @staticmethod
+    def _lease_id(document_type: str, country: str) -> str:
+        return f"{document_type}:{country}"
+
+    async def _acquire_lease(self, document_type: str, country: str) -> bool:
+        now = datetime.now(timezone.utc)
+        try:
+            await db.database[LEASE_COLLECTION].update_one(
+                {
+                    "_id": self._lease_id(document_type, country),
+                    "$or": [{"expires_at": {"$lt": now}}, {"owner": self.owner}]
+                },
+                {"$set": {
+                    "owner": self.owner,
+                    "expires_at": now + timedelta(seconds=SCHEMA_GENERATION_LEASE_SECONDS)
+                }},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    async def _renew_lease(self, document_type: str, country: str) -> bool:
+        result = await db.database[LEASE_COLLECTION].update_one(
+            {"_id": self._lease_id(document_type, country), "owner": self.owner},
+            {"$set": {
+                "expires_at": datetime.now(timezone.utc) + timedelta(seconds=SCHEMA_GENERATION_LEASE_SECONDS)
+            }}
+        )
+        return result.matched_count == 1
+
+    async def _keep_lease_alive(self, document_type: str, country: str, generation: asyncio.Task) -> None:
+        # Without the lease another process may start generating the same
+        # schema, so a lost lease (or one that can no longer be renewed)
+        # stops this generation before it writes a duplicate.
+        while True:
+            await asyncio.sleep(SCHEMA_GENERATION_LEASE_SECONDS / 3)
+            try:
+                renewed = await self._renew_lease(document_type, country)
+            except Exception as e:
+                logger.warning("Schema generation lease renewal failed for %s/%s: %s", document_type, country, e)
+                renewed = False
+            if not renewed:
+                logger.warning("Lost schema generation lease for %s/%s, stopping generation", document_type, country)
+                generation.cancel()
+                return
+
+    async def _release_lease(self, document_type: str, country: str) -> None:
+        await db.database[LEASE_COLLECTION].delete_one({
+            "_id": self._lease_id(document_type, country),
+            "owner": self.owner
+        })
+
+    @staticmethod
+    async def _find_in_review(document_type: str, country: str) -> Optional[DocumentSchema]:
+        return await DocumentSchema.find_one({
+            "document_type": document_type,
+            "country": country,
+            "status": SchemaStatus.IN_REVIEW
+        })
+
+    async def _run_with_lease(
+        self,
+        document_type: str,
+        country: str,
+        generate: Callable[[], Awaitable[GenerationResult]]
+    ) -> Tuple[GenerationResult, bool]:
+        deadline = asyncio.get_running_loop().time() + SCHEMA_GENERATION_WAIT_SECONDS
+        while True:
+            existing = await self._find_in_review(document_type, country)
+            if existing:
+                return (existing, None), False
+
+            if await self._acquire_lease(document_type, country):
+                existing = await self._find_in_review(document_type, country)
+                if existing:
+                    await self._release_lease(document_type, country)
+                    return (existing, None), False
+
+                generation = asyncio.ensure_future(generate())
+                heartbeat = asyncio.create_task(self._keep_lease_alive(document_type, country, generation))
+                try:
+                    return await generation, True
+                except asyncio.CancelledError:
+                    if not heartbeat.done() or asyncio.current_task().cancelling():
+                        raise
+                    # The lease was lost: wait for whoever holds it now.
+                finally:
+                    heartbeat.cancel()
+                    generation.cancel()
+                    await self._release_lease(document_type, country)
+
+            if asyncio.get_running_loop().time() > deadline:
+                raise SchemaGenerationInProgress(
+                    f"Schema generation for {document_type}/{country} is still running in another request")
+            await asyncio.sleep(SCHEMA_GENERATION_POLL_SECONDS)
+
+    async def run(
+        self,
+        document_type: str,
+        country: str,
+        generate: Callable[[], Awaitable[GenerationResult]]
+    ) -> Tuple[GenerationResult, bool]:
+        key = (document_type, country)
+        if key in self._inflight:
+            result, _ = await asyncio.shield(self._inflight[key])
+            return result, False
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            outcome = await self._run_with_lease(document_type, country, generate)
+            future.set_result(outcome)
+            return outcome
+        except BaseException as e:
+            error = e if isinstance(e, Exception) else RuntimeError("Schema generation was cancelled")
+            future.set_exception(error)
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+
+schema_generation_coordinator = SchemaGenerationCoordinator()
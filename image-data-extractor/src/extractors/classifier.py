@@ -1,55 +1,34 @@
-import base64
 from pathlib import Path
 from typing import Optional, List
 from langchain_core.messages import HumanMessage
 from dotenv import load_dotenv
-import aiofiles
-from difflib import SequenceMatcher
 from ..db.models import DocumentTypeClassification, DocumentSchema
+from ..db.registry import schema_registry
+from .type_matcher import DocumentTypeMatcher
 from ..config.llm_config import get_llm
-
-
-def calculate_similarity(a: str, b: str) -> float:
-    return SequenceMatcher(None, a.lower(), b.lower()).ratio()
+from ..utils.document_parts import build_document_parts
+from ..utils.timing import span
 
 
 async def get_existing_document_types(country: str) -> List[str]:
+    cached_types = schema_registry.document_types(country)
+    if cached_types is not None:
+        return cached_types
+
     try:
-        existing_schemas = await DocumentSchema.find(
-            DocumentSchema.country == country
-        ).to_list()
-        
-        document_types = list(set(schema.document_type for schema in existing_schemas))
-        return document_types
+        return await DocumentSchema.distinct(
+            "document_type", {"country": country}
+        )
     except Exception as e:
         return []
 
 
-def find_best_matching_document_type(classified_type: str, existing_types: List[str], threshold: float = 0.8) -> Optional[str]:
-    if not existing_types:
-        return None
-    
-    best_match = None
-    best_score = 0.0
-    
-    classified_lower = classified_type.lower().strip()
-    
-    for existing_type in existing_types:
-        existing_lower = existing_type.lower().strip()
-        
-        if classified_lower == existing_lower:
-            return existing_type
-        
-        similarity = calculate_similarity(classified_lower, existing_lower)
-        
-        if (classified_lower in existing_lower or existing_lower in classified_lower):
-            similarity = max(similarity, 0.85)
-        
-        if similarity > best_score and similarity >= threshold:
-            best_score = similarity
-            best_match = existing_type
-    
-    return best_match
+async def get_document_type_matcher(country: str) -> DocumentTypeMatcher:
+    matcher = schema_registry.type_matcher(country)
+    if matcher is not None:
+        return matcher
+
+    return DocumentTypeMatcher(await get_existing_document_types(country))
 
 
 async def classify_document_type(
@@ -62,32 +41,10 @@ async def classify_document_type(
     if not document_paths or len(document_paths) == 0:
         return None
 
-    try:
-        document_parts = []
-        
-        for doc_path, content_type in zip(document_paths, content_types):
-            if not doc_path.exists():
-                continue
-                
-            async with aiofiles.open(doc_path, "rb") as doc_file:
-                document_data = base64.b64encode(await doc_file.read()).decode("utf-8")
-
-            if content_type == "application/pdf":
-                document_parts.append({
-                    "type": "media",
-                    "mime_type": "application/pdf",
-                    "data": document_data
-                })
-            else:
-                document_parts.append({
-                    "type": "image_url",
-                    "image_url": f"data:{content_type};base64,{document_data}",
-                })
-
-        if not document_parts:
-            return None
-
-    except IOError as e:
+    document_parts = await build_document_parts(
+        document_paths, content_types, stage="classification")
+
+    if not document_parts:
         return None
 
     classification_prompt = """
@@ -158,18 +115,15 @@ async def classify_document_type(
 
     for attempt in range(max_retries):
         try:
-            response = await llm.ainvoke([message])
+            with span("classification_llm"):
+                response = await llm.ainvoke([message])
 
             if not response.document_type:
                 continue
 
-            existing_types = await get_existing_document_types(response.country)
-            
-            matched_type = find_best_matching_document_type(
-                response.document_type, 
-                existing_types,
-                threshold=0.8
-            )
+            matcher = await get_document_type_matcher(response.country)
+
+            matched_type = matcher.match(response.document_type, threshold=0.8)
             
             final_document_type = matched_type if matched_type else response.document_type
             
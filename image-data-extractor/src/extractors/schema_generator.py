@@ -1,14 +1,30 @@
 import asyncio
-import base64
+import logging
+import re
 from pathlib import Path
-from typing import Optional, Dict, Any, List, Union
+from typing import Optional, Dict, Any, List, Union, Tuple
 from langchain_core.messages import HumanMessage
-import aiofiles
+from langchain_google_genai.chat_models import ChatGoogleGenerativeAIError
 from pydantic import BaseModel, Field
 
 from ..config.llm_config import get_llm
-from ..config import SCHEMA_GENERATION_RETRY_ATTEMPTS
-from ..utils.parsing import parse_llm_string_to_dict
+from ..config import SCHEMA_GENERATION_RETRY_ATTEMPTS, FIELD_DISCOVERY_GRACE_SECONDS
+from ..utils.parsing import parse_llm_string_to_dict, StreamingObjectMembers
+from ..utils.schema_operations import validate_schema_modifications
+from ..utils.document_parts import build_document_parts
+from ..utils.timing import span
+
+try:
+    from google.api_core.exceptions import GoogleAPIError
+except ImportError:
+    # Newer langchain-google-genai releases no longer depend on google-api-core.
+    GoogleAPIError = ChatGoogleGenerativeAIError
+
+# Failures of one LLM call that are worth retrying. Anything else is a bug and
+# propagates.
+LLM_CALL_ERRORS = (asyncio.TimeoutError, ValueError, OSError, GoogleAPIError, ChatGoogleGenerativeAIError)
+
+logger = logging.getLogger(__name__)
 
 
 class ExtractedFields(BaseModel):
@@ -41,40 +57,11 @@ class GeneratedSchema(BaseModel):
                               description="Confidence in schema generation")
 
 
-async def get_field_list_from_documents(
-    document_paths: List[Path],
-    document_types: List[str],
+async def discover_field_names(
+    document_parts: List[Dict[str, Any]],
     document_type: str,
     country: str
 ) -> Optional[List[str]]:
-    try:
-        document_parts = []
-        
-        for doc_path, content_type in zip(document_paths, document_types):
-            if not doc_path.exists():
-                continue
-                
-            async with aiofiles.open(doc_path, "rb") as doc_file:
-                document_data = base64.b64encode(await doc_file.read()).decode("utf-8")
-
-            if content_type == "application/pdf":
-                document_parts.append({
-                    "type": "media",
-                    "mime_type": "application/pdf",
-                    "data": document_data
-                })
-            else:
-                document_parts.append({
-                    "type": "image_url", 
-                    "image_url": f"data:{content_type};base64,{document_data}"
-                })
-
-        if not document_parts:
-            return None
-
-    except IOError as e:
-        return None
-
     prompt = f"""
     Analyze the provided document(s) (images and/or PDFs) for a {document_type} from {country}.
     Identify every distinct field and label present in the document(s).
@@ -105,61 +92,16 @@ async def get_field_list_from_documents(
         content=[{"type": "text", "text": prompt}, *document_parts])
 
     try:
-        validated_data = await llm.ainvoke([message])
+        with span("field_discovery_llm"):
+            validated_data = await llm.ainvoke([message])
         return validated_data.field_names
     except Exception as e:
         return None
 
 
-async def generate_schema_from_documents(
-    document_paths: List[Path],
-    document_types: List[str],
-    document_type: str,
-    country: str
-) -> Optional[GeneratedSchema]:
-    try:
-        field_extraction_task = get_field_list_from_documents(
-            document_paths, document_types, document_type, country
-        )
-
-        document_reading_tasks = []
-
-        async def read_document_data():
-            document_parts = []
-            for doc_path, content_type in zip(document_paths, document_types):
-                if not doc_path.exists():
-                    continue
-                    
-                async with aiofiles.open(doc_path, "rb") as doc_file:
-                    document_data = base64.b64encode(await doc_file.read()).decode("utf-8")
-
-                if content_type == "application/pdf":
-                    document_parts.append({
-                        "type": "media",
-                        "mime_type": "application/pdf",
-                        "data": document_data
-                    })
-                else:
-                    document_parts.append({
-                        "type": "image_url",
-                        "image_url": f"data:{content_type};base64,{document_data}",
-                    })
-            return document_parts
-
-        document_reading_tasks.append(read_document_data())
-
-        results = await asyncio.gather(field_extraction_task, *document_reading_tasks)
-        field_names = results[0]
-        document_parts = results[1]
-
-        if not field_names or not document_parts:
-            return None
-
-    except IOError as e:
-        return None
-
-    generation_prompt = f"""
-    CRITICAL INSTRUCTION: You MUST analyze this {document_type} document and generate a detailed schema for the following fields: {", ".join(field_names)}.
+def build_generation_prompt(document_type: str, country: str) -> str:
+    return f"""
+    CRITICAL INSTRUCTION: You MUST analyze this {document_type} document and generate a detailed schema for every field and visual element visible in it.
     Return a GeneratedSchema object with the EXACT format specified below.
 
     STRICT FORMAT REQUIREMENTS:
@@ -259,9 +201,154 @@ async def generate_schema_from_documents(
     - Return a proper JSON object
 
     Document to analyze: {document_type} from {country}
-    Fields to process: {", ".join(field_names)}
     """
 
+
+def validate_field_definition(field_name: str, field_definition: Any) -> Optional[str]:
+    if field_definition is None:
+        return f"Field '{field_name}' has no definition"
+
+    is_valid, error_message = validate_schema_modifications({field_name: field_definition})
+    if not is_valid:
+        return error_message
+
+    pattern = field_definition.get("pattern")
+    if pattern:
+        try:
+            re.compile(pattern)
+        except (re.error, TypeError) as e:
+            return f"Field '{field_name}' has an invalid regex pattern: {e}"
+
+    return None
+
+
+def _chunk_text(chunk: Any) -> str:
+    content = chunk.content
+    if isinstance(content, str):
+        return content
+    return "".join(
+        part.get("text", "") if isinstance(part, dict) else str(part) for part in content
+    )
+
+
+async def stream_schema_fields(
+    llm,
+    message: HumanMessage,
+    schema_fields: Dict[str, Dict[str, Any]],
+    failed_fields: Dict[str, str]
+) -> Dict[str, Any]:
+    members = StreamingObjectMembers("document_schema")
+
+    async for chunk in llm.astream([message]):
+        for field_name, raw_definition in members.feed(_chunk_text(chunk)):
+            try:
+                field_definition = parse_llm_string_to_dict(raw_definition)
+            except ValueError as e:
+                failed_fields[field_name] = f"Field '{field_name}' definition is not valid JSON"
+                continue
+
+            error_message = validate_field_definition(field_name, field_definition)
+            if error_message:
+                failed_fields[field_name] = error_message
+            else:
+                schema_fields[field_name] = field_definition
+                failed_fields.pop(field_name, None)
+
+    try:
+        parsed_dict = parse_llm_string_to_dict(members.text)
+    except ValueError:
+        return {}
+
+    document_schema = parsed_dict.get("document_schema")
+    if not isinstance(document_schema, dict):
+        return parsed_dict
+
+    for field_name, field_definition in document_schema.items():
+        if field_name in schema_fields:
+            continue
+        error_message = validate_field_definition(field_name, field_definition)
+        if error_message:
+            failed_fields[field_name] = error_message
+        else:
+            schema_fields[field_name] = field_definition
+            failed_fields.pop(field_name, None)
+
+    return parsed_dict
+
+
+async def regenerate_fields(
+    llm,
+    document_parts: List[Dict[str, Any]],
+    document_type: str,
+    country: str,
+    pending_fields: Dict[str, str]
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+    field_issues = "\n".join(
+        f"    - {field_name}: {issue}" for field_name, issue in pending_fields.items()
+    )
+    prompt = f"""
+    You previously generated a schema for this {document_type} document from {country}.
+    The following field definitions were missing or invalid:
+{field_issues}
+
+    Return ONLY a JSON object mapping each of these field names to its definition:
+    {{
+        "field_name": {{
+            "type": "string" | "integer" | "date" | "boolean",
+            "description": "Clear description of the field",
+            "required": false,
+            "example": "Example value",
+            "pattern": "Regex pattern (optional, escape backslashes)"
+        }}
+    }}
+    """
+
+    message = HumanMessage(
+        content=[{"type": "text", "text": prompt}, *document_parts])
+
+    with span("field_regeneration_llm"):
+        response = await asyncio.wait_for(llm.ainvoke([message]), timeout=240.0)
+    parsed_dict = parse_llm_string_to_dict(response.content)
+
+    repaired_fields = {}
+    still_pending = {}
+    for field_name, issue in pending_fields.items():
+        field_definition = parsed_dict.get(field_name)
+        error_message = validate_field_definition(field_name, field_definition) if field_definition is not None else issue
+        if error_message:
+            still_pending[field_name] = error_message
+        else:
+            repaired_fields[field_name] = field_definition
+
+    return repaired_fields, still_pending
+
+
+async def _collect_discovered_fields(discovery_task: asyncio.Task) -> List[str]:
+    try:
+        field_names = await asyncio.wait_for(discovery_task, timeout=FIELD_DISCOVERY_GRACE_SECONDS)
+        return field_names or []
+    except asyncio.TimeoutError:
+        logger.warning("Field discovery did not finish within %.0fs, skipping it", FIELD_DISCOVERY_GRACE_SECONDS)
+        return []
+
+
+async def generate_schema_from_documents(
+    document_paths: List[Path],
+    document_types: List[str],
+    document_type: str,
+    country: str
+) -> Optional[GeneratedSchema]:
+    try:
+        document_parts = await build_document_parts(
+            document_paths, document_types, stage="schema_generation")
+        if not document_parts:
+            return None
+    except IOError as e:
+        return None
+
+    discovery_task = asyncio.create_task(
+        discover_field_names(document_parts, document_type, country))
+
     llm = await get_llm(
         model_name="gemini-2.5-flash",
         model_provider="google_genai",
@@ -270,28 +357,59 @@ async def generate_schema_from_documents(
 
     message = HumanMessage(
         content=[
-            {"type": "text", "text": generation_prompt},
+            {"type": "text", "text": build_generation_prompt(document_type, country)},
             *document_parts,
         ]
     )
 
+    schema_fields: Dict[str, Dict[str, Any]] = {}
+    failed_fields: Dict[str, str] = {}
+    schema_header: Dict[str, Any] = {}
+
     for attempt in range(SCHEMA_GENERATION_RETRY_ATTEMPTS):
         try:
-            response = await asyncio.wait_for(llm.ainvoke([message]), timeout=240.0)
-
-            llm_output_str = response.content
-            parsed_dict = parse_llm_string_to_dict(llm_output_str)
-            generated_schema = GeneratedSchema(**parsed_dict)
-            return generated_schema
-
-        except asyncio.TimeoutError:
-            if attempt == SCHEMA_GENERATION_RETRY_ATTEMPTS - 1:
-                return None
-
-        except Exception as e:
-            if attempt == SCHEMA_GENERATION_RETRY_ATTEMPTS - 1:
-                return None
+            with span("schema_generation_llm"):
+                schema_header = await asyncio.wait_for(
+                    stream_schema_fields(llm, message, schema_fields, failed_fields),
+                    timeout=240.0
+                )
+        except LLM_CALL_ERRORS as e:
+            logger.warning(
+                "Schema generation attempt %d for %s/%s failed: %r", attempt + 1, document_type, country, e)
+
+        if schema_fields:
+            break
 
         if attempt < SCHEMA_GENERATION_RETRY_ATTEMPTS - 1:
             wait_time = 2 ** attempt
             await asyncio.sleep(wait_time)
+
+    if not schema_fields:
+        discovery_task.cancel()
+        return None
+
+    for field_name in await _collect_discovered_fields(discovery_task):
+        if field_name not in schema_fields and field_name not in failed_fields:
+            failed_fields[field_name] = f"Field '{field_name}' is missing from the generated schema"
+
+    for attempt in range(SCHEMA_GENERATION_RETRY_ATTEMPTS):
+        if not failed_fields:
+            break
+        try:
+            repaired_fields, failed_fields = await regenerate_fields(
+                llm, document_parts, document_type, country, failed_fields)
+            schema_fields.update(repaired_fields)
+        except LLM_CALL_ERRORS as e:
+            logger.warning(
+                "Field regeneration attempt %d for %s/%s failed: %r", attempt + 1, document_type, country, e)
+
+    try:
+        confidence = float(schema_header.get("confidence", 0.0))
+        return GeneratedSchema(
+            document_type=schema_header.get("document_type", document_type),
+            country=schema_header.get("country", country),
+            document_schema=schema_fields,
+            confidence=min(max(confidence, 0.0), 1.0)
+        )
+    except (TypeError, ValueError) as e:
+        return None
@@ -0,0 +1,99 @@
+import heapq
+import re
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Set
+
+
+TOKEN_ALIASES = {
+    "aadhaar": "aadhar",
+    "licence": "license",
+    "driving": "driver",
+    "drivers": "driver",
+    "identity": "id",
+    "identification": "id",
+    "cert": "certificate",
+}
+NGRAM_SIZE = 3
+MAX_CANDIDATES = 20
+
+
+def normalize_document_type(document_type: str) -> str:
+    tokens = re.findall(r"[a-z0-9]+", document_type.lower())
+    return "_".join(TOKEN_ALIASES.get(token, token) for token in tokens)
+
+
+def char_ngrams(text: str, size: int = NGRAM_SIZE) -> Set[str]:
+    padded = f" {text} "
+    return {padded[i:i + size] for i in range(max(len(padded) - size + 1, 1))}
+
+
+def similarity_score(classified_lower: str, existing_lower: str) -> float:
+    similarity = SequenceMatcher(None, classified_lower, existing_lower).ratio()
+    if classified_lower in existing_lower or existing_lower in classified_lower:
+        similarity = max(similarity, 0.85)
+    return similarity
+
+
+# Exact and alias hits are dictionary lookups; everything else is narrowed to
+# the few types sharing the most character trigrams before the SequenceMatcher
+# rescoring that document type matching has always used.
+class DocumentTypeMatcher:
+    def __init__(self, document_types: List[str]):
+        self.document_types = list(document_types)
+        self._lowered = [document_type.lower().strip() for document_type in self.document_types]
+        self._exact: Dict[str, int] = {}
+        self._aliases: Dict[str, int] = {}
+        self._ngram_counts: List[int] = []
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+
+        for idx, document_type in enumerate(self.document_types):
+            self._exact.setdefault(self._lowered[idx], idx)
+
+            normalized = normalize_document_type(document_type)
+            self._aliases.setdefault(normalized, idx)
+            self._aliases.setdefault("_".join(sorted(normalized.split("_"))), idx)
+
+            ngrams = char_ngrams(normalized)
+            self._ngram_counts.append(len(ngrams))
+            for ngram in ngrams:
+                self._postings[ngram].append(idx)
+
+    def _candidates(self, normalized: str) -> List[int]:
+        query_ngrams = char_ngrams(normalized)
+        overlap = Counter()
+        for ngram in query_ngrams:
+            overlap.update(self._postings.get(ngram, ()))
+
+        query_count = len(query_ngrams)
+        return heapq.nlargest(
+            MAX_CANDIDATES,
+            overlap,
+            key=lambda idx: 2 * overlap[idx] / (query_count + self._ngram_counts[idx])
+        )
+
+    def match(self, classified_type: str, threshold: float = 0.8) -> Optional[str]:
+        if not self.document_types:
+            return None
+
+        classified_lower = classified_type.lower().strip()
+        if classified_lower in self._exact:
+            return self.document_types[self._exact[classified_lower]]
+
+        normalized = normalize_document_type(classified_type)
+        if not normalized:
+            return None
+
+        for alias in (normalized, "_".join(sorted(normalized.split("_")))):
+            if alias in self._aliases:
+                return self.document_types[self._aliases[alias]]
+
+        best_match = None
+        best_score = 0.0
+        for idx in sorted(self._candidates(normalized)):
+            similarity = similarity_score(classified_lower, self._lowered[idx])
+            if similarity > best_score and similarity >= threshold:
+                best_score = similarity
+                best_match = self.document_types[idx]
+
+        return best_match
@@ -1,15 +1,18 @@
 import asyncio
-import base64
+import re
 from pathlib import Path
-from typing import Optional, List
+from typing import Optional, List, Dict, Any, Tuple, Type
 from langchain_core.messages import HumanMessage
-import aiofiles
+from pydantic import BaseModel, ValidationError
 
 from ..config.llm_config import get_llm
 
 from .schema_converter import convert_db_schema_to_pydantic
 from ..config import EXTRACTION_RETRY_ATTEMPTS
 from ..db.models import DocumentSchema
+from ..utils.parsing import parse_llm_string_to_dict
+from ..utils.document_parts import build_document_parts
+from ..utils.timing import span
 
 
 def detect_document_format(document_path: Path, content_type: str) -> str:
@@ -31,43 +34,18 @@ async def extract_with_db_schema(
     document_types: List[str],
     document_schema: DocumentSchema,
     attempt: int = 0
-) -> Optional[str]:
-    try:
-        document_parts = []
-        
-        for doc_path, content_type in zip(document_paths, document_types):
-            if not doc_path.exists():
-                continue
-                
-            try:
-                async with aiofiles.open(doc_path, "rb") as doc_file:
-                    document_data = base64.b64encode(await doc_file.read()).decode("utf-8")
-
-                if content_type == "application/pdf":
-                    document_parts.append({
-                        "type": "media",
-                        "mime_type": "application/pdf",
-                        "data": document_data
-                    })
-                else:
-                    doc_format = detect_document_format(doc_path, content_type)
-                    document_parts.append({
-                        "type": "image_url",
-                        "image_url": f"data:{content_type};base64,{document_data}",
-                    })
-            except IOError as e:
-                continue
-
-        if not document_parts:
-            return None
-
-    except Exception as e:
+) -> Optional[Tuple[str, Dict[str, str]]]:
+    document_parts = await build_document_parts(
+        document_paths, document_types, stage="extraction")
+
+    if not document_parts:
         return None
 
-    pydantic_model = convert_db_schema_to_pydantic(
-        document_schema.document_schema,
-        document_schema.document_type
-    )
+    with span("model_compile"):
+        pydantic_model = convert_db_schema_to_pydantic(
+            document_schema.document_schema,
+            document_schema.document_type
+        )
 
     schema_fields = list(document_schema.document_schema.keys())
 
@@ -119,7 +97,8 @@ async def extract_with_db_schema(
         model_name="gemini-2.5-flash",
         model_provider="google_genai",
         temperature=0.0,
-        structured_schema=pydantic_model
+        structured_schema=pydantic_model,
+        include_raw=True
     )
 
     message = HumanMessage(
@@ -131,9 +110,10 @@ async def extract_with_db_schema(
 
     for retry_attempt in range(EXTRACTION_RETRY_ATTEMPTS + 1):
         try:
-            validated_data = await llm.ainvoke([message])
-
-            return validated_data.model_dump_json(indent=2)
+            with span("extraction_llm"):
+                response = await llm.ainvoke([message])
+            extracted_data = _structured_response_to_dict(response)
+            break
         except Exception as e:
             if retry_attempt == EXTRACTION_RETRY_ATTEMPTS:
                 raise
@@ -141,6 +121,148 @@ async def extract_with_db_schema(
             wait_time = 2 ** retry_attempt
             await asyncio.sleep(wait_time)
 
+    invalid_fields = find_invalid_fields(
+        document_schema.document_schema, pydantic_model, extracted_data)
+
+    for retry_attempt in range(EXTRACTION_RETRY_ATTEMPTS):
+        if not invalid_fields:
+            break
+
+        try:
+            reextracted_data = await reextract_fields(
+                document_parts, document_schema, extracted_data, invalid_fields)
+            extracted_data.update(reextracted_data)
+        except Exception as e:
+            wait_time = 2 ** retry_attempt
+            await asyncio.sleep(wait_time)
+            continue
+
+        invalid_fields = find_invalid_fields(
+            document_schema.document_schema, pydantic_model, extracted_data)
+
+    return _validate_extracted_data(document_schema, pydantic_model, extracted_data)
+
+
+def _structured_response_to_dict(response: Dict[str, Any]) -> Dict[str, Any]:
+    if response.get("parsed") is not None:
+        return response["parsed"].model_dump()
+
+    raw = response.get("raw")
+    tool_calls = getattr(raw, "tool_calls", None)
+    if tool_calls:
+        return dict(tool_calls[0]["args"])
+    if raw is not None and isinstance(raw.content, str) and raw.content.strip():
+        return parse_llm_string_to_dict(raw.content)
+
+    raise response.get("parsing_error") or ValueError("Extraction returned no data")
+
+
+def find_invalid_fields(
+    field_schema: Dict[str, Any],
+    pydantic_model: Type[BaseModel],
+    extracted_data: Dict[str, Any]
+) -> Dict[str, str]:
+    invalid_fields = {}
+    try:
+        pydantic_model.model_validate(extracted_data)
+    except ValidationError as e:
+        for error in e.errors():
+            if error["loc"]:
+                invalid_fields[str(error["loc"][0])] = error["msg"]
+
+    for field_name, field_definition in field_schema.items():
+        value = extracted_data.get(field_name)
+        pattern = field_definition.get("pattern")
+        if field_name in invalid_fields or not pattern or not isinstance(value, str) or not value:
+            continue
+        try:
+            if not re.search(pattern, value):
+                invalid_fields[field_name] = f"Value does not match pattern {pattern}"
+        except re.error:
+            continue
+
+    return invalid_fields
+
+
+async def reextract_fields(
+    document_parts: List[Dict[str, Any]],
+    document_schema: DocumentSchema,
+    extracted_data: Dict[str, Any],
+    invalid_fields: Dict[str, str]
+) -> Dict[str, Any]:
+    field_schema = {
+        field_name: document_schema.document_schema[field_name]
+        for field_name in invalid_fields
+        if field_name in document_schema.document_schema
+    }
+    if not field_schema:
+        return {}
+
+    field_lines = []
+    for field_name, field_def in field_schema.items():
+        field_lines.append(
+            f"- {field_name} ({field_def.get('type', 'string')}): {field_def.get('description', 'No description')}\n"
+            f"  Previous value: {extracted_data.get(field_name)!r}. Problem: {invalid_fields[field_name]}"
+            + (f"\n  Must match pattern: {field_def['pattern']}" if field_def.get("pattern") else "")
+        )
+
+    prompt = f"""
+    Re-check the following fields in this {document_schema.document_type} document(s).
+    The previous extraction for these fields was invalid. Extract ONLY these fields again,
+    exactly as they appear in the document. If a field is not visible, leave it as null.
+
+{chr(10).join(field_lines)}
+    """
+
+    llm = await get_llm(
+        model_name="gemini-2.5-flash",
+        model_provider="google_genai",
+        temperature=0.0,
+        structured_schema=convert_db_schema_to_pydantic(field_schema, document_schema.document_type),
+        include_raw=True
+    )
+
+    message = HumanMessage(
+        content=[
+            {"type": "text", "text": prompt},
+            *document_parts,
+        ]
+    )
+
+    with span("reextraction_llm"):
+        response = await llm.ainvoke([message])
+    reextracted_data = _structured_response_to_dict(response)
+    return {field_name: reextracted_data.get(field_name) for field_name in field_schema}
+
+
+def _validate_extracted_data(
+    document_schema: DocumentSchema,
+    pydantic_model: Type[BaseModel],
+    extracted_data: Dict[str, Any]
+) -> Tuple[str, Dict[str, str]]:
+    # Fields still invalid after the re-extraction rounds are returned to the
+    # client with the reason. A value of the wrong type is dropped (null), and
+    # required fields are relaxed so that a missing value does not fail the
+    # whole extraction. A value that only misses its pattern is kept as read.
+    invalid_fields = find_invalid_fields(document_schema.document_schema, pydantic_model, extracted_data)
+    try:
+        return pydantic_model.model_validate(extracted_data).model_dump_json(indent=2), invalid_fields
+    except ValidationError as e:
+        errors = e.errors()
+
+    cleaned_data = dict(extracted_data)
+    for error in errors:
+        if error["loc"]:
+            cleaned_data.pop(str(error["loc"][0]), None)
+    relaxed_model = convert_db_schema_to_pydantic(
+        {
+            field_name: {**field_definition, "required": False}
+            for field_name, field_definition in document_schema.document_schema.items()
+        },
+        document_schema.document_type
+    )
+    return relaxed_model.model_validate(cleaned_data).model_dump_json(indent=2), invalid_fields
+
 
 async def extract_with_schema(
     front_image_path: Path,
@@ -8,6 +8,13 @@ from .schema_operations import (
     get_modification_metadata,
     find_latest_schema_version
 )
+from .schema_listing import (
+    build_schema_filter,
+    compute_schemas_etag,
+    count_schemas,
+    serialize_schema_document,
+    stream_schema_page
+)
 
 __all__ = [
     'parse_llm_string_to_dict',
@@ -17,5 +24,10 @@ __all__ = [
     'generate_change_summary',
     'validate_schema_modifications',
     'get_modification_metadata',
-    'find_latest_schema_version'
+    'find_latest_schema_version',
+    'build_schema_filter',
+    'compute_schemas_etag',
+    'count_schemas',
+    'serialize_schema_document',
+    'stream_schema_page'
 ]
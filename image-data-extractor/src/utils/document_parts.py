@@ -0,0 +1,59 @@
+import asyncio
+import base64
+import logging
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import aiofiles
+
+from .image_processing import prepare_image_async
+from .timing import span, record_size
+from ..config import SUPPORTED_IMAGE_TYPES
+
+
+logger = logging.getLogger(__name__)
+
+
+async def _read_document_bytes(doc_path: Path, content_type: str, stage: str) -> Optional[tuple]:
+    if content_type in SUPPORTED_IMAGE_TYPES:
+        try:
+            return await prepare_image_async(doc_path, content_type, stage)
+        except Exception as e:
+            logger.warning("Image pre-processing failed for %s, sending original: %s", doc_path.name, e)
+
+    async with aiofiles.open(doc_path, "rb") as doc_file:
+        return await doc_file.read(), content_type
+
+
+async def _build_document_part(doc_path: Path, content_type: str, stage: str) -> Optional[Dict[str, Any]]:
+    if not doc_path.exists():
+        return None
+
+    try:
+        document_bytes, content_type = await _read_document_bytes(doc_path, content_type, stage)
+    except IOError as e:
+        return None
+
+    document_data = base64.b64encode(document_bytes).decode("utf-8")
+
+    if content_type == "application/pdf":
+        return {
+            "type": "media",
+            "mime_type": "application/pdf",
+            "data": document_data
+        }
+    return {
+        "type": "image_url",
+        "image_url": f"data:{content_type};base64,{document_data}",
+    }
+
+
+async def build_document_parts(document_paths: List[Path], content_types: List[str], stage: str) -> List[Dict[str, Any]]:
+    with span(f"{stage}_encode"):
+        document_parts = await asyncio.gather(*(
+            _build_document_part(doc_path, content_type, stage)
+            for doc_path, content_type in zip(document_paths, content_types)
+        ))
+    document_parts = [part for part in document_parts if part]
+    record_size(f"{stage}_payload", sum(len(part.get("data") or part.get("image_url", "")) for part in document_parts))
+    return document_parts
@@ -0,0 +1,134 @@
+import asyncio
+import hashlib
+import io
+import math
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Tuple
+
+from PIL import Image, ImageChops, ImageFilter, ImageOps
+
+from ..config import (
+    IMAGE_STAGE_MAX_PIXELS,
+    IMAGE_JPEG_QUALITY,
+    IMAGE_PROCESSING_WORKERS,
+    IMAGE_CROP_MIN_AREA_RATIO,
+    IMAGE_CACHE_SIZE
+)
+
+
+CROP_PREVIEW_SIZE = 512
+
+_executor = ThreadPoolExecutor(max_workers=IMAGE_PROCESSING_WORKERS, thread_name_prefix="image-processing")
+_images: "OrderedDict[bytes, Image.Image]" = OrderedDict()
+_images_lock = threading.Lock()
+
+
+def _scaled_size(size: Tuple[int, int], max_pixels: int) -> Tuple[int, int]:
+    width, height = size
+    if width * height <= max_pixels:
+        return width, height
+    scale = math.sqrt(max_pixels / (width * height))
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+def find_document_bbox(image: Image.Image) -> Optional[Tuple[int, int, int, int]]:
+    grayscale = image.convert("L")
+    width, height = grayscale.size
+    border = [
+        grayscale.getpixel((x, y))
+        for x, y in ((0, 0), (width - 1, 0), (0, height - 1), (width - 1, height - 1),
+                     (width // 2, 0), (width // 2, height - 1), (0, height // 2), (width - 1, height // 2))
+    ]
+    background = sorted(border)[len(border) // 2]
+
+    difference = ImageChops.difference(grayscale, Image.new("L", grayscale.size, background))
+    mask = difference.filter(ImageFilter.MedianFilter(5)).point(lambda value: 255 if value > 40 else 0)
+    bbox = mask.getbbox()
+    if not bbox:
+        return None
+
+    left, top, right, bottom = bbox
+    if (right - left) * (bottom - top) < IMAGE_CROP_MIN_AREA_RATIO * width * height:
+        return None
+
+    margin_x = int((right - left) * 0.02)
+    margin_y = int((bottom - top) * 0.02)
+    return (
+        max(0, left - margin_x),
+        max(0, top - margin_y),
+        min(width, right + margin_x),
+        min(height, bottom + margin_y)
+    )
+
+
+def _decode_document_image(data: bytes) -> Image.Image:
+    max_pixels = max(IMAGE_STAGE_MAX_PIXELS.values())
+    with Image.open(io.BytesIO(data)) as source:
+        source.draft("RGB", _scaled_size(source.size, max_pixels * 4))
+        image = ImageOps.exif_transpose(source)
+    if image.mode not in ("RGB", "RGBA", "L"):
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+    preview = image.copy()
+    preview.thumbnail((CROP_PREVIEW_SIZE, CROP_PREVIEW_SIZE))
+    bbox = find_document_bbox(preview)
+    if bbox:
+        scale_x = image.width / preview.width
+        scale_y = image.height / preview.height
+        left, top, right, bottom = bbox
+        image = image.crop((
+            int(left * scale_x),
+            int(top * scale_y),
+            min(image.width, math.ceil(right * scale_x)),
+            min(image.height, math.ceil(bottom * scale_y))
+        ))
+
+    if image.width * image.height > max_pixels:
+        image = image.resize(_scaled_size(image.size, max_pixels), Image.Resampling.LANCZOS)
+    return image
+
+
+# Decoded and cropped images are cached by content at the largest stage
+# budget, so classification, schema generation and extraction of one upload
+# decode it once. Every caller gets its own copy.
+def load_document_image(data: bytes) -> Image.Image:
+    key = hashlib.sha256(data).digest()
+    with _images_lock:
+        image = _images.get(key)
+        if image is not None:
+            _images.move_to_end(key)
+            return image.copy()
+
+    image = _decode_document_image(data)
+    with _images_lock:
+        _images[key] = image
+        while len(_images) > IMAGE_CACHE_SIZE:
+            _images.popitem(last=False)
+    return image.copy()
+
+
+def prepare_image(path: Path, content_type: str, stage: str) -> Tuple[bytes, str]:
+    data = path.read_bytes()
+    image = load_document_image(data)
+    if image.width * image.height > IMAGE_STAGE_MAX_PIXELS[stage]:
+        image = image.resize(_scaled_size(image.size, IMAGE_STAGE_MAX_PIXELS[stage]), Image.Resampling.LANCZOS)
+
+    buffer = io.BytesIO()
+    if image.mode == "RGBA":
+        image.save(buffer, format="PNG", optimize=True)
+        encoded, encoded_type = buffer.getvalue(), "image/png"
+    else:
+        image.convert("RGB").save(buffer, format="JPEG", quality=IMAGE_JPEG_QUALITY, optimize=True)
+        encoded, encoded_type = buffer.getvalue(), "image/jpeg"
+
+    if len(encoded) >= len(data):
+        return data, content_type
+    return encoded, encoded_type
+
+
+async def prepare_image_async(path: Path, content_type: str, stage: str) -> Tuple[bytes, str]:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, prepare_image, path, content_type, stage)
@@ -1,45 +1,136 @@
 import json
 import re
 import ast
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Callable, List, Tuple
 import yaml
 
 
-def parse_llm_string_to_dict(llm_output: str) -> Dict[str, Any]:
-    s = llm_output.strip()
+def find_object_end(s: str, start: int) -> Optional[int]:
+    depth = 0
+    quote = None
+    escaped = False
+    for i in range(start, len(s)):
+        char = s[i]
+        if quote:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == quote:
+                quote = None
+        elif char in ('"', "'"):
+            quote = char
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return i
+    return None
+
+
+def find_json_object_span(s: str) -> Optional[str]:
+    start = s.find("{")
+    if start == -1:
+        return None
+
+    end = find_object_end(s, start)
+    if end is None:
+        end = s.rfind("}")
+    return s[start:end + 1] if end > start else None
+
+
+MEMBER_CLOSING_PATTERN = re.compile(r'[\s,]*\}')
+OBJECT_MEMBER_PATTERN = re.compile(r'[\s,]*(["\'])((?:\\.|(?!\1).)*)\1\s*:\s*(?=\{)', re.DOTALL)
+
+
+# Incrementally pulls complete `"name": {...}` members out of the object stored
+# under `container_key` while the LLM output is still being streamed.
+class StreamingObjectMembers:
+    def __init__(self, container_key: str):
+        self.container_key = container_key
+        self.text = ""
+        self.finished = False
+        self._position: Optional[int] = None
+
+    def _locate_container(self) -> None:
+        key_match = re.search(rf'["\']{re.escape(self.container_key)}["\']\s*:\s*\{{', self.text)
+        if key_match:
+            self._position = key_match.end()
+
+    def feed(self, chunk: str) -> List[Tuple[str, str]]:
+        self.text += chunk
+        if self._position is None:
+            self._locate_container()
+            if self._position is None:
+                return []
+
+        members = []
+        while not self.finished:
+            if MEMBER_CLOSING_PATTERN.match(self.text, self._position):
+                self.finished = True
+                break
+
+            member_match = OBJECT_MEMBER_PATTERN.match(self.text, self._position)
+            if not member_match:
+                break
+
+            value_start = member_match.end()
+            value_end = find_object_end(self.text, value_start)
+            if value_end is None:
+                break
+
+            members.append((member_match.group(2), self.text[value_start:value_end + 1]))
+            self._position = value_end + 1
+
+        return members
 
-    json_match = re.search(r'\{.*\}', s, re.DOTALL)
-    if json_match:
-        s = json_match.group(0)
-    else:
+
+def _repair_json(s: str) -> str:
+    # This regex finds single backslashes that are followed by common regex characters (d,s,w,D,S,W)
+    # but are NOT already escaped (not preceded by another backslash)
+    # It replaces them with double backslashes to properly escape them for JSON parsing.
+    s = re.sub(r'(?<!\\)\\(?=[dswDSW])', r'\\\\', s)
+    return re.sub(r',\s*([}\]])', r'\1', s)
+
+
+def _parse_strict_json(s: str) -> Any:
+    return json.loads(s)
+
+
+def _parse_repaired_json(s: str) -> Any:
+    return json.loads(_repair_json(s))
+
+
+def _parse_python_literal(s: str) -> Any:
+    return ast.literal_eval(s)
+
+
+def _parse_yaml(s: str) -> Any:
+    return yaml.safe_load(s)
+
+
+PARSING_STRATEGIES: List[Callable[[str], Any]] = [
+    _parse_strict_json,
+    _parse_repaired_json,
+    _parse_python_literal,
+    _parse_yaml,
+]
+
+
+def parse_llm_string_to_dict(llm_output: str) -> Dict[str, Any]:
+    s = find_json_object_span(llm_output.strip())
+    if s is None:
         raise ValueError("No JSON object found in the LLM output")
 
-    s = s.strip()
-
-    try:
-        loaded = yaml.safe_load(s)
-        if isinstance(loaded, dict):
-            return loaded
-    except Exception:
-        pass
-
-    try:
-        loaded = ast.literal_eval(s)
-        if isinstance(loaded, dict):
-            return loaded
-    except (ValueError, SyntaxError):
-        pass
-
-    try:
-        # This regex finds single backslashes that are followed by common regex characters (d,s,w,D,S,W)
-        # but are NOT already escaped (not preceded by another backslash)
-        # It replaces them with double backslashes to properly escape them for JSON parsing.
-        s_fixed = re.sub(r'(?<!\\)\\(?=[dswDSW])', r'\\\\', s)
-        loaded = json.loads(s_fixed)
-        if isinstance(loaded, dict):
-            return loaded
-    except json.JSONDecodeError as e:
-        raise ValueError(
-            "Failed to parse LLM output string into a dictionary") from e
-
-    raise ValueError("All parsing strategies failed")
+    last_error = None
+    for strategy in PARSING_STRATEGIES:
+        try:
+            loaded = strategy(s)
+            if isinstance(loaded, dict):
+                return loaded
+        except Exception as e:
+            last_error = e
+
+    raise ValueError(
+        "Failed to parse LLM output string into a dictionary") from last_error
@@ -0,0 +1,130 @@
+import asyncio
+import logging
+import re
+import uuid
+from pathlib import Path
+from typing import List, Optional
+
+from pypdf import PdfReader, PdfWriter
+
+from ..extractors.type_matcher import TOKEN_ALIASES
+from ..config import SUPPORTED_PDF_TYPES
+
+
+GENERIC_DOCUMENT_TOKENS = {"card", "id", "document", "of", "the", "and", "front", "back"}
+# Pages with less extracted text than this are treated as scans. They have no
+# text layer to match against, and are often the document itself.
+MIN_PAGE_TEXT_CHARS = 50
+
+logger = logging.getLogger(__name__)
+
+
+def parse_page_selection(pages: str) -> List[int]:
+    page_indices = []
+    for part in pages.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        match = re.fullmatch(r"(\d+)\s*(?:-\s*(\d+))?", part)
+        if not match:
+            raise ValueError(f"Invalid page selection: '{part}'")
+        first = int(match.group(1))
+        last = int(match.group(2) or first)
+        if first < 1 or last < first:
+            raise ValueError(f"Invalid page range: '{part}'")
+        page_indices.extend(range(first - 1, last))
+    if not page_indices:
+        raise ValueError("Page selection is empty")
+    return sorted(set(page_indices))
+
+
+def get_document_type_terms(document_type: str) -> List[str]:
+    terms = set()
+    for token in re.findall(r"[a-z0-9]+", document_type.lower()):
+        if len(token) < 3 or token in GENERIC_DOCUMENT_TOKENS:
+            continue
+        terms.add(token)
+        terms.update(alias for alias, canonical in TOKEN_ALIASES.items() if canonical == token)
+        terms.add(TOKEN_ALIASES.get(token, token))
+    return sorted(terms)
+
+
+def find_relevant_pages(pdf_path: Path, terms: List[str]) -> List[int]:
+    if not terms:
+        return []
+    term_pattern = re.compile(r"\b(" + "|".join(re.escape(term) for term in terms) + r")\b", re.IGNORECASE)
+    reader = PdfReader(pdf_path)
+    page_indices = []
+    has_match = False
+    for page_index, page in enumerate(reader.pages):
+        text = page.extract_text() or ""
+        if term_pattern.search(text):
+            has_match = True
+            page_indices.append(page_index)
+        elif len(text.strip()) < MIN_PAGE_TEXT_CHARS:
+            page_indices.append(page_index)
+    return page_indices if has_match else []
+
+
+def write_pdf_subset(pdf_path: Path, page_indices: List[int], output_dir: Path) -> Path:
+    reader = PdfReader(pdf_path)
+    selected = [page_index for page_index in page_indices if page_index < len(reader.pages)]
+    if not selected or len(selected) == len(reader.pages):
+        return pdf_path
+
+    writer = PdfWriter()
+    for page_index in selected:
+        writer.add_page(reader.pages[page_index])
+
+    output_path = output_dir / f"{pdf_path.stem}_pages_{uuid.uuid4().hex[:8]}.pdf"
+    with open(output_path, "wb") as output_file:
+        writer.write(output_file)
+    return output_path
+
+
+def _select_relevant_pages(pdf_path: Path, document_type: str, output_dir: Path) -> Path:
+    page_indices = find_relevant_pages(pdf_path, get_document_type_terms(document_type))
+    if not page_indices:
+        return pdf_path
+    return write_pdf_subset(pdf_path, page_indices, output_dir)
+
+
+async def _subset_or_original(doc_path: Path, page_indices: List[int], output_dir: Path) -> Path:
+    try:
+        return await asyncio.to_thread(write_pdf_subset, doc_path, page_indices, output_dir)
+    except Exception as e:
+        logger.warning("Page subset failed for %s, sending all pages: %s", doc_path.name, e)
+        return doc_path
+
+
+async def subset_pdf_documents(
+    document_paths: List[Path],
+    content_types: List[str],
+    page_indices: List[int],
+    output_dir: Path
+) -> List[Path]:
+    return list(await asyncio.gather(*(
+        _subset_or_original(doc_path, page_indices, output_dir)
+        if content_type in SUPPORTED_PDF_TYPES else asyncio.sleep(0, result=doc_path)
+        for doc_path, content_type in zip(document_paths, content_types)
+    )))
+
+
+async def select_pages_for_document_type(
+    document_paths: List[Path],
+    content_types: List[str],
+    document_type: str,
+    output_dir: Path
+) -> List[Path]:
+    async def select(doc_path: Path, content_type: str) -> Path:
+        if content_type not in SUPPORTED_PDF_TYPES:
+            return doc_path
+        try:
+            return await asyncio.to_thread(_select_relevant_pages, doc_path, document_type, output_dir)
+        except Exception as e:
+            logger.warning("Page selection failed for %s, sending all pages: %s", doc_path.name, e)
+            return doc_path
+
+    return list(await asyncio.gather(*(
+        select(doc_path, content_type) for doc_path, content_type in zip(document_paths, content_types)
+    )))
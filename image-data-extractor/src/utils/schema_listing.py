@@ -0,0 +1,105 @@
+import hashlib
+import json
+from datetime import datetime
+from typing import Dict, Any, Optional, AsyncIterator
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from ..db.models import DocumentSchema, SchemaStatus
+
+
+SUMMARY_PROJECTION = {
+    "document_type": 1,
+    "country": 1,
+    "status": 1,
+    "version": 1,
+    "created_at": 1,
+    "updated_at": 1,
+}
+
+
+def build_schema_filter(
+    status: Optional[SchemaStatus] = None,
+    document_type: Optional[str] = None,
+    country: Optional[str] = None,
+    cursor: Optional[str] = None
+) -> Dict[str, Any]:
+    query = {}
+    if status:
+        query["status"] = status.value
+    if document_type:
+        query["document_type"] = document_type
+    if country:
+        query["country"] = country
+    if cursor:
+        try:
+            query["_id"] = {"$gt": ObjectId(cursor)}
+        except InvalidId:
+            raise ValueError(f"Invalid cursor: {cursor}")
+    return query
+
+
+def compute_schemas_etag(registry_version: int, **params: Any) -> str:
+    key = json.dumps({"version": registry_version, **params}, sort_keys=True, default=str)
+    return f'W/"{hashlib.sha1(key.encode("utf-8")).hexdigest()}"'
+
+
+def serialize_schema_document(document: Dict[str, Any]) -> Dict[str, Any]:
+    item = {
+        "id": str(document["_id"]),
+        "document_type": document["document_type"],
+        "country": document["country"],
+        "status": document["status"],
+        "version": document["version"],
+        "created_at": document["created_at"].isoformat(),
+        "updated_at": document["updated_at"].isoformat(),
+    }
+    if "document_schema" in document:
+        item["schema"] = document["document_schema"]
+    return item
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+async def count_schemas(query: Dict[str, Any]) -> int:
+    # The total ignores the cursor, so it stays the same on every page.
+    query = {key: value for key, value in query.items() if key != "_id"}
+    return await DocumentSchema.get_pymongo_collection().count_documents(query)
+
+
+async def stream_schema_page(
+    query: Dict[str, Any],
+    limit: int,
+    include_schema: bool,
+    total_count: int
+) -> AsyncIterator[bytes]:
+    # A limit of 0 streams every matching schema in one response.
+    projection = None if include_schema else SUMMARY_PROJECTION
+    documents = DocumentSchema.get_pymongo_collection().find(query, projection).sort("_id", 1)
+    if limit:
+        documents = documents.limit(limit + 1)
+
+    yield b'{"schemas":['
+    count = 0
+    last_id = None
+    has_more = False
+    async for document in documents:
+        if limit and count == limit:
+            has_more = True
+            break
+        prefix = b"," if count else b""
+        yield prefix + json.dumps(serialize_schema_document(document), default=_json_default).encode("utf-8")
+        count += 1
+        last_id = document["_id"]
+    await documents.close()
+
+    next_cursor = str(last_id) if has_more else None
+    yield (f'],"count":{count},"total_count":{total_count},'
+           f'"next_cursor":{json.dumps(next_cursor)}}}').encode("utf-8")
@@ -0,0 +1,69 @@
+import sys
+from pathlib import Path
+
+import mongomock
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+class AsyncCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def sort(self, *args):
+        self._cursor = self._cursor.sort(*args)
+        return self
+
+    def limit(self, count):
+        self._cursor = self._cursor.limit(count)
+        return self
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._cursor)
+        except StopIteration:
+            raise StopAsyncIteration
+
+    async def to_list(self, length=None):
+        return list(self._cursor)
+
+    async def close(self):
+        pass
+
+
+# The subset of pymongo's async collection API the service uses, backed by
+# mongomock so tests need no MongoDB server.
+class AsyncCollection:
+    def __init__(self, collection):
+        self._collection = collection
+        self.name = collection.name
+
+    def find(self, *args, **kwargs):
+        return AsyncCursor(self._collection.find(*args, **kwargs))
+
+    async def aggregate(self, pipeline):
+        return AsyncCursor(iter(list(self._collection.aggregate(pipeline))))
+
+    def __getattr__(self, name):
+        method = getattr(self._collection, name)
+
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+        return call
+
+
+class AsyncDatabase:
+    def __init__(self):
+        self._database = mongomock.MongoClient().db
+
+    def __getitem__(self, name):
+        return AsyncCollection(self._database[name])
+
+
+@pytest.fixture
+def database():
+    return AsyncDatabase()
@@ -0,0 +1,89 @@
+import io
+
+import pytest
+from PIL import Image, ImageDraw
+
+from src.utils import image_processing
+from src.utils.image_processing import _scaled_size, find_document_bbox, load_document_image, prepare_image
+
+
+def photo_of_card(size=(2000, 1500), card=(500, 400, 1500, 1100)) -> Image.Image:
+    image = Image.new("RGB", size, (240, 240, 240))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle(card, fill=(30, 60, 120))
+    draw.text((card[0] + 40, card[1] + 40), "RESIDENCE CARD", fill=(255, 255, 255))
+    return image
+
+
+def encode(image: Image.Image, image_format="PNG") -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    image_processing._images.clear()
+    yield
+    image_processing._images.clear()
+
+
+def test_scaled_size_keeps_aspect_ratio_within_budget():
+    assert _scaled_size((1000, 500), 1_000_000) == (1000, 500)
+    width, height = _scaled_size((4000, 3000), 1_000_000)
+    assert width * height <= 1_000_000
+    assert abs(width / height - 4 / 3) < 0.01
+
+
+def test_finds_the_card_on_a_plain_background():
+    left, top, right, bottom = find_document_bbox(photo_of_card())
+    assert (left, top) <= (500, 400) and (right, bottom) >= (1500, 1100)
+    assert right - left < 1100
+
+
+def test_no_crop_when_the_document_fills_the_frame():
+    assert find_document_bbox(Image.new("RGB", (400, 300), (255, 255, 255))) is None
+
+
+def test_load_crops_and_returns_a_copy_per_caller():
+    data = encode(photo_of_card())
+    first = load_document_image(data)
+    second = load_document_image(data)
+
+    assert first.size == second.size
+    assert first.width < 1200
+    assert first is not second
+    first.paste((255, 0, 0), (0, 0, 10, 10))
+    assert second.getpixel((0, 0)) != (255, 0, 0)
+
+
+def test_cache_is_keyed_on_content_and_bounded(monkeypatch):
+    decoded = []
+    decode = image_processing._decode_document_image
+    monkeypatch.setattr(image_processing, "_decode_document_image", lambda data: decoded.append(1) or decode(data))
+    monkeypatch.setattr(image_processing, "IMAGE_CACHE_SIZE", 2)
+
+    images = [encode(Image.new("RGB", (50, 50), (shade, 0, 0))) for shade in (10, 20, 30)]
+    for data in images + [images[2]]:
+        load_document_image(data)
+
+    assert len(decoded) == 3
+    assert len(image_processing._images) == 2
+
+
+def test_prepare_image_downscales_per_stage(tmp_path, monkeypatch):
+    monkeypatch.setitem(image_processing.IMAGE_STAGE_MAX_PIXELS, "classification", 100_000)
+    path = tmp_path / "upload.png"
+    path.write_bytes(encode(photo_of_card()))
+
+    data, content_type = prepare_image(path, "image/png", "classification")
+
+    assert content_type == "image/jpeg"
+    with Image.open(io.BytesIO(data)) as prepared:
+        assert prepared.width * prepared.height <= 100_000
+
+
+def test_prepare_image_keeps_the_original_when_it_is_smaller(tmp_path):
+    path = tmp_path / "small.png"
+    path.write_bytes(encode(Image.new("L", (8, 8), 128)))
+    assert prepare_image(path, "image/png", "extraction") == (path.read_bytes(), "image/png")
@@ -0,0 +1,43 @@
+import asyncio
+from datetime import datetime, timezone
+
+from src.db.migrations import migrate_document_schemas
+from src.db.models import DocumentSchema
+from src.db.registry_version import read_registry_version
+
+
+def insert(collection, document_type, version, status="active"):
+    now = datetime.now(timezone.utc)
+    return collection._collection.insert_one({
+        "document_type": document_type, "country": "IN", "status": status, "version": version,
+        "document_schema": {}, "created_at": now, "updated_at": now,
+    }).inserted_id
+
+
+def test_keeps_only_the_newest_active_schema_and_bumps_the_registry(database):
+    collection = database[DocumentSchema.Settings.name]
+    old = insert(collection, "passport", 1)
+    new = insert(collection, "passport", 2)
+    other = insert(collection, "pan_card", 1)
+
+    asyncio.run(migrate_document_schemas(database))
+
+    statuses = {document["_id"]: document["status"] for document in collection._collection.find()}
+    assert statuses == {old: "deprecated", new: "active", other: "active"}
+    assert asyncio.run(read_registry_version(database)) == 1
+
+
+def test_no_duplicates_leaves_the_registry_version(database):
+    insert(database[DocumentSchema.Settings.name], "passport", 1)
+    asyncio.run(migrate_document_schemas(database))
+    assert asyncio.run(read_registry_version(database)) == 0
+
+
+def test_drops_only_the_legacy_index(database):
+    collection = database[DocumentSchema.Settings.name]._collection
+    collection.create_index([("document_type", 1), ("country", 1)], name="document_type_1_country_1")
+    collection.create_index([("country", 1), ("document_type", 1)], name="country_1_document_type_1")
+
+    asyncio.run(migrate_document_schemas(database))
+
+    assert set(collection.index_information()) == {"_id_", "country_1_document_type_1"}
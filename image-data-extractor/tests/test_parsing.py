@@ -0,0 +1,49 @@
+import pytest
+
+from src.utils.parsing import StreamingObjectMembers, find_json_object_span, parse_llm_string_to_dict
+
+
+def test_parses_json_wrapped_in_prose_and_code_fences():
+    output = 'Here is the schema:\n```json\n{"name": {"type": "string"}, "age": 3}\n```\nDone.'
+    assert parse_llm_string_to_dict(output) == {"name": {"type": "string"}, "age": 3}
+
+
+def test_span_ignores_braces_inside_strings():
+    assert find_json_object_span('x {"pattern": "a{2}}", "b": 1} trailing }') == '{"pattern": "a{2}}", "b": 1}'
+
+
+def test_repairs_trailing_commas_and_unescaped_regex():
+    assert parse_llm_string_to_dict('{"pattern": "\\d{4}", "items": [1, 2,],}') == {"pattern": "\\d{4}", "items": [1, 2]}
+
+
+def test_falls_back_to_python_literals():
+    assert parse_llm_string_to_dict("{'required': True, 'value': None}") == {"required": True, "value": None}
+
+
+def test_rejects_output_without_an_object():
+    with pytest.raises(ValueError, match="No JSON object"):
+        parse_llm_string_to_dict("no schema here")
+
+
+def test_rejects_unparseable_object():
+    with pytest.raises(ValueError, match="Failed to parse"):
+        parse_llm_string_to_dict("{\"a\": [1, 2}")
+
+
+def test_streaming_members_are_returned_once_complete():
+    members = StreamingObjectMembers("fields")
+    document = '{"fields": {"name": {"type": "string"}, "dob": {"type": "date", "note": "a } b"}}}'
+
+    found = []
+    for i in range(0, len(document), 7):
+        found.extend(members.feed(document[i:i + 7]))
+
+    assert found == [("name", '{"type": "string"}'), ("dob", '{"type": "date", "note": "a } b"}')]
+    assert members.finished
+
+
+def test_streaming_waits_for_the_container_key():
+    members = StreamingObjectMembers("fields")
+    assert members.feed('{"document_type": "passport", ') == []
+    assert members.feed('"fields": {"number": {"type": "string"}') == [("number", '{"type": "string"}')]
+    assert not members.finished
@@ -0,0 +1,86 @@
+import io
+from typing import List
+
+import pytest
+from pypdf import PdfReader
+
+from src.utils.pdf_pages import find_relevant_pages, get_document_type_terms, parse_page_selection, write_pdf_subset
+
+
+def build_pdf(pages: List[str]) -> bytes:
+    # One line of Helvetica text per page; an empty string gives a page
+    # without a text layer, like a scan.
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", b"", b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for text in pages:
+        stream = f"BT /F1 10 Tf 50 750 Td ({text}) Tj ET".encode() if text else b""
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>".encode()
+        )
+        page_ids.append(len(objects))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {len(page_ids)} >>".encode()
+
+    output = io.BytesIO()
+    output.write(b"%PDF-1.4\n")
+    offsets = []
+    for object_id, body in enumerate(objects, start=1):
+        offsets.append(output.tell())
+        output.write(b"%d 0 obj\n" % object_id + body + b"\nendobj\n")
+    xref_offset = output.tell()
+    output.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        output.write(b"%010d 00000 n \n" % offset)
+    output.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset))
+    return output.getvalue()
+
+
+FILLER = "Quarterly figures for the regional office, prepared for the annual board review meeting."
+
+
+@pytest.fixture
+def write_pdf(tmp_path):
+    def write(pages: List[str]):
+        path = tmp_path / "document.pdf"
+        path.write_bytes(build_pdf(pages))
+        return path
+    return write
+
+
+def test_parse_page_selection_ranges_and_duplicates():
+    assert parse_page_selection("3, 1-2,2 - 4") == [0, 1, 2, 3]
+
+
+@pytest.mark.parametrize("selection", ["", " , ", "0", "3-1", "a-b", "1-2-3"])
+def test_parse_page_selection_rejects_invalid(selection):
+    with pytest.raises(ValueError):
+        parse_page_selection(selection)
+
+
+def test_document_type_terms_include_aliases():
+    assert get_document_type_terms("Driving Licence") == ["driver", "driving", "licence", "license"]
+    assert get_document_type_terms("ID card") == []
+
+
+def test_keeps_matching_and_scanned_pages(write_pdf):
+    path = write_pdf([FILLER, "RESIDENCE PERMIT issued to the holder named below " + FILLER, "", FILLER])
+    assert find_relevant_pages(path, ["residence"]) == [1, 2]
+
+
+def test_matches_whole_words_only(write_pdf):
+    path = write_pdf(["Payment to the taxation office " + FILLER, "Tax return " + FILLER])
+    assert find_relevant_pages(path, ["tax"]) == [1]
+
+
+def test_no_match_selects_all_pages(write_pdf):
+    path = write_pdf([FILLER, ""])
+    assert find_relevant_pages(path, ["passport"]) == []
+    assert find_relevant_pages(path, []) == []
+
+
+def test_write_pdf_subset(write_pdf, tmp_path):
+    path = write_pdf(["first " + FILLER, "second " + FILLER, "third " + FILLER])
+    subset = write_pdf_subset(path, [0, 2], tmp_path)
+    texts = [page.extract_text() for page in PdfReader(subset).pages]
+    assert [text.split()[0] for text in texts] == ["first", "third"]
@@ -0,0 +1,89 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.db import registry as registry_module
+from src.db.models import DocumentSchema, SchemaStatus
+from src.db.registry import SchemaRegistry
+from src.db.registry_version import bump_registry_version
+
+
+class FakeQuery:
+    def __init__(self, items):
+        self.items = items
+
+    async def to_list(self):
+        return list(self.items)
+
+
+@pytest.fixture
+def stored(database, monkeypatch):
+    schemas = []
+
+    def find(query):
+        return FakeQuery(schema for schema in schemas if schema.status in query["status"]["$in"])
+
+    def aggregate(pipeline):
+        pairs = {(schema.country, schema.document_type) for schema in schemas}
+        return FakeQuery({"_id": {"country": country, "document_type": document_type}} for country, document_type in pairs)
+
+    monkeypatch.setattr(registry_module.db, "database", database)
+    monkeypatch.setattr(DocumentSchema, "find", find)
+    monkeypatch.setattr(DocumentSchema, "aggregate", aggregate)
+    return schemas
+
+
+def schema(document_type, status, country="IN"):
+    return SimpleNamespace(document_type=document_type, country=country, status=status)
+
+
+def test_load_caches_active_and_in_review_schemas(stored):
+    active = schema("passport", SchemaStatus.ACTIVE)
+    stored.extend([active, schema("pan_card", SchemaStatus.DEPRECATED)])
+    registry = SchemaRegistry()
+
+    asyncio.run(registry.load())
+
+    assert asyncio.run(registry.find("passport", "IN", SchemaStatus.ACTIVE)) is active
+    assert asyncio.run(registry.find("pan_card", "IN", SchemaStatus.DEPRECATED)) is None
+    assert registry.document_types("IN") == ["pan_card", "passport"]
+    assert registry.type_matcher("IN").match("Passport") == "passport"
+    assert registry.type_matcher("US").match("passport") is None
+
+
+def test_invalidate_bumps_the_version_and_reloads(stored, database):
+    registry = SchemaRegistry()
+    asyncio.run(registry.load())
+    assert registry.version == 0
+
+    stored.append(schema("passport", SchemaStatus.IN_REVIEW))
+    asyncio.run(registry.invalidate())
+
+    assert registry.version == 1
+    assert registry.document_types("IN") == ["passport"]
+
+
+def test_watch_reloads_after_a_write_in_another_process(stored, database):
+    async def scenario():
+        registry = SchemaRegistry(refresh_interval=0.01)
+        await registry.start()
+        stored.append(schema("voter_id", SchemaStatus.ACTIVE))
+        await bump_registry_version(database)
+        await asyncio.sleep(0.1)
+        await registry.stop()
+        return registry
+
+    registry = asyncio.run(scenario())
+    assert registry.version == 1
+    assert registry.document_types("IN") == ["voter_id"]
+
+
+def test_unloaded_registry_reads_from_the_database(monkeypatch):
+    async def find_one(query):
+        return ("queried", query["document_type"])
+    monkeypatch.setattr(DocumentSchema, "find_one", find_one)
+    registry = SchemaRegistry()
+
+    assert registry.document_types("IN") is None
+    assert asyncio.run(registry.find("passport", "IN", SchemaStatus.ACTIVE)) == ("queried", "passport")
@@ -0,0 +1,98 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.db import schema_generation
+from src.db.schema_generation import LEASE_COLLECTION, SchemaGenerationCoordinator, SchemaGenerationInProgress
+
+
+@pytest.fixture
+def leases(database, monkeypatch):
+    monkeypatch.setattr(schema_generation.db, "database", database)
+    monkeypatch.setattr(schema_generation, "SCHEMA_GENERATION_LEASE_SECONDS", 0.3)
+    monkeypatch.setattr(schema_generation, "SCHEMA_GENERATION_POLL_SECONDS", 0.02)
+    monkeypatch.setattr(schema_generation, "SCHEMA_GENERATION_WAIT_SECONDS", 0.3)
+    return database[LEASE_COLLECTION]._collection
+
+
+@pytest.fixture
+def in_review(monkeypatch):
+    found = []
+
+    async def find_in_review(document_type, country):
+        return found[0] if found else None
+    monkeypatch.setattr(SchemaGenerationCoordinator, "_find_in_review", staticmethod(find_in_review))
+    return found
+
+
+def hold_lease(leases, owner="other-process"):
+    leases.insert_one({"_id": "passport:IN", "owner": owner,
+                       "expires_at": datetime.now(timezone.utc) + timedelta(minutes=5)})
+
+
+def test_concurrent_callers_share_one_generation(leases, in_review):
+    calls = []
+
+    async def generate():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "schema", "generated"
+
+    async def scenario():
+        coordinator = SchemaGenerationCoordinator()
+        return await asyncio.gather(*(coordinator.run("passport", "IN", generate) for _ in range(3)))
+
+    results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert [generated_here for _, generated_here in results] == [True, False, False]
+    assert all(result == ("schema", "generated") for result, _ in results)
+    assert leases.count_documents({}) == 0
+
+
+def test_waits_for_the_schema_another_process_generates(leases, in_review):
+    hold_lease(leases)
+
+    async def publish_later():
+        await asyncio.sleep(0.1)
+        in_review.append("their schema")
+
+    async def scenario():
+        publisher = asyncio.create_task(publish_later())
+        result = await SchemaGenerationCoordinator().run("passport", "IN", pytest.fail)
+        await publisher
+        return result
+
+    assert asyncio.run(scenario()) == (("their schema", None), False)
+
+
+def test_gives_up_waiting_after_the_deadline(leases, in_review):
+    hold_lease(leases)
+    with pytest.raises(SchemaGenerationInProgress):
+        asyncio.run(SchemaGenerationCoordinator().run("passport", "IN", pytest.fail))
+
+
+def test_expired_lease_is_taken_over(leases, in_review):
+    leases.insert_one({"_id": "passport:IN", "owner": "crashed",
+                       "expires_at": datetime.now(timezone.utc) - timedelta(seconds=1)})
+
+    async def generate():
+        return "schema", None
+
+    assert asyncio.run(SchemaGenerationCoordinator().run("passport", "IN", generate)) == (("schema", None), True)
+
+
+def test_lost_lease_stops_generation(leases, in_review):
+    written = []
+
+    async def generate():
+        leases.update_one({"_id": "passport:IN"}, {"$set": {
+            "owner": "other-process", "expires_at": datetime.now(timezone.utc) + timedelta(minutes=5)}})
+        await asyncio.sleep(1)
+        written.append("schema")
+        return "schema", None
+
+    with pytest.raises(SchemaGenerationInProgress):
+        asyncio.run(SchemaGenerationCoordinator().run("passport", "IN", generate))
+    assert written == []
+    assert leases.find_one({"_id": "passport:IN"})["owner"] == "other-process"
@@ -0,0 +1,86 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from src.extractors import schema_generator
+from src.extractors.schema_generator import generate_schema_from_documents, validate_field_definition
+
+GENERATED = {
+    "document_type": "passport",
+    "country": "IN",
+    "document_schema": {
+        "name": {"type": "string", "description": "Holder name"},
+        "date_of_birth": None,
+        "number": {"type": "text", "description": "Passport number"},
+    },
+    "confidence": 0.9,
+}
+
+
+def definition(field_name):
+    return {"type": "string", "description": f"The {field_name}"}
+
+
+class FakeLLM:
+    def __init__(self, repairs):
+        self.repairs = repairs
+        self.prompts = []
+
+    async def astream(self, messages):
+        text = json.dumps(GENERATED)
+        for i in range(0, len(text), 16):
+            yield SimpleNamespace(content=text[i:i + 16])
+
+    async def ainvoke(self, messages):
+        prompt = messages[0].content[0]["text"]
+        self.prompts.append(prompt)
+        return SimpleNamespace(content=json.dumps(
+            {field_name: definition(field_name) for field_name in self.repairs if f"- {field_name}:" in prompt}))
+
+
+@pytest.fixture
+def generate(monkeypatch):
+    async def document_parts(paths, types, stage):
+        return [{"type": "text", "text": "document"}]
+
+    async def discover(parts, document_type, country):
+        return ["name", "date_of_birth", "address"]
+
+    monkeypatch.setattr(schema_generator, "build_document_parts", document_parts)
+    monkeypatch.setattr(schema_generator, "discover_field_names", discover)
+
+    def run(llm):
+        async def get_llm(**kwargs):
+            return llm
+        monkeypatch.setattr(schema_generator, "get_llm", get_llm)
+        return asyncio.run(generate_schema_from_documents([], [], "passport", "IN"))
+    return run
+
+
+def test_validate_field_definition():
+    assert validate_field_definition("name", definition("name")) is None
+    assert validate_field_definition("name", None) == "Field 'name' has no definition"
+    assert "invalid type" in validate_field_definition("name", {"type": "text", "description": "x"})
+    assert "invalid regex" in validate_field_definition("name", {**definition("name"), "pattern": "("})
+
+
+def test_all_failing_and_missing_fields_are_repaired_in_one_call(generate):
+    llm = FakeLLM(repairs=["date_of_birth", "number", "address"])
+    schema = generate(llm)
+
+    assert len(llm.prompts) == 1
+    assert all(f"- {field_name}:" in llm.prompts[0] for field_name in ("date_of_birth", "number", "address"))
+    assert "- name:" not in llm.prompts[0]
+    assert set(schema.document_schema) == {"name", "date_of_birth", "number", "address"}
+    assert schema.confidence == 0.9
+
+
+def test_only_still_failing_fields_are_retried(generate):
+    llm = FakeLLM(repairs=["date_of_birth", "number"])
+    schema = generate(llm)
+
+    assert len(llm.prompts) == schema_generator.SCHEMA_GENERATION_RETRY_ATTEMPTS
+    assert all("- address:" in prompt and "- number:" not in prompt for prompt in llm.prompts[1:])
+    assert set(schema.document_schema) == {"name", "date_of_birth", "number"}
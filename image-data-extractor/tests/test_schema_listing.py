@@ -0,0 +1,108 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+
+import main
+from src.db.models import DocumentSchema, SchemaStatus
+from src.utils.schema_listing import build_schema_filter, compute_schemas_etag, count_schemas, stream_schema_page
+
+
+@pytest.fixture
+def schemas(database, monkeypatch):
+    collection = database["document_schemas"]
+    now = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for index in range(5):
+        collection._collection.insert_one({
+            "document_type": "passport" if index % 2 else "pan_card",
+            "country": "IN",
+            "status": SchemaStatus.ACTIVE.value if index < 3 else SchemaStatus.DEPRECATED.value,
+            "version": index + 1,
+            "document_schema": {"number": {"type": "string"}},
+            "created_at": now,
+            "updated_at": now,
+        })
+    monkeypatch.setattr(DocumentSchema, "get_pymongo_collection", classmethod(lambda cls: collection))
+    return collection
+
+
+def read_page(query, limit, include_schema=True):
+    async def collect():
+        total_count = await count_schemas(query)
+        return b"".join([chunk async for chunk in stream_schema_page(query, limit, include_schema, total_count)])
+    return json.loads(asyncio.run(collect()))
+
+
+def test_filter_from_query_parameters():
+    cursor = str(ObjectId())
+    assert build_schema_filter(SchemaStatus.ACTIVE, "passport", "IN", cursor) == {
+        "status": "active", "document_type": "passport", "country": "IN", "_id": {"$gt": ObjectId(cursor)}}
+    assert build_schema_filter() == {}
+
+
+def test_filter_rejects_invalid_cursor():
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        build_schema_filter(cursor="not-an-id")
+
+
+def test_etag_changes_with_version_and_parameters():
+    etag = compute_schemas_etag(3, status=None, limit=100)
+    assert etag.startswith('W/"')
+    assert etag == compute_schemas_etag(3, limit=100, status=None)
+    assert etag != compute_schemas_etag(4, status=None, limit=100)
+    assert etag != compute_schemas_etag(3, status=None, limit=50)
+
+
+def test_pages_follow_the_cursor_and_keep_the_total(schemas):
+    first = read_page({}, 2)
+    assert (first["count"], first["total_count"]) == (2, 5)
+
+    seen = [schema["id"] for schema in first["schemas"]]
+    cursor = first["next_cursor"]
+    while cursor:
+        page = read_page(build_schema_filter(cursor=cursor), 2)
+        assert page["total_count"] == 5
+        seen.extend(schema["id"] for schema in page["schemas"])
+        cursor = page["next_cursor"]
+
+    assert seen == [str(document["_id"]) for document in schemas._collection.find().sort("_id", 1)]
+
+
+def test_limit_zero_returns_every_schema(schemas):
+    page = read_page({"status": "active"}, 0)
+    assert (page["count"], page["total_count"], page["next_cursor"]) == (3, 3, None)
+
+
+def test_summary_leaves_out_the_schema_body(schemas):
+    page = read_page({}, 1, include_schema=False)
+    assert "schema" not in page["schemas"][0]
+    assert page["schemas"][0]["created_at"].startswith("2024-01-01T00:00:00")
+
+
+@pytest.fixture
+def client(schemas, monkeypatch):
+    async def read_version():
+        return 7
+    monkeypatch.setattr(main.schema_registry, "read_version", read_version)
+    return TestClient(main.app)
+
+
+def test_list_endpoint_returns_304_for_matching_etag(client):
+    response = client.get("/schemas", params={"limit": 2})
+    assert response.status_code == 200
+    assert response.json()["total_count"] == 5
+
+    cached = client.get("/schemas", params={"limit": 2}, headers={"If-None-Match": response.headers["ETag"]})
+    assert cached.status_code == 304
+
+
+def test_get_schema_errors(client, monkeypatch):
+    async def missing(schema_id):
+        return None
+    monkeypatch.setattr(DocumentSchema, "get", missing)
+
+    assert client.get("/schemas/not-an-id").status_code == 400
+    assert client.get(f"/schemas/{ObjectId()}").status_code == 404
@@ -0,0 +1,34 @@
+from src.extractors.type_matcher import DocumentTypeMatcher, normalize_document_type
+
+DOCUMENT_TYPES = ["aadhar_card", "driver_license", "pan_card", "residence_permit", "voter_id"]
+
+
+def test_normalizes_aliases_and_separators():
+    assert normalize_document_type("Driving Licence") == "driver_license"
+    assert normalize_document_type("Aadhaar-Card") == "aadhar_card"
+
+
+def test_exact_match_ignores_case_and_whitespace():
+    assert DocumentTypeMatcher(DOCUMENT_TYPES).match("  PAN_Card ") == "pan_card"
+
+
+def test_alias_and_word_order_matches():
+    matcher = DocumentTypeMatcher(DOCUMENT_TYPES)
+    assert matcher.match("Driving Licence") == "driver_license"
+    assert matcher.match("license driver") == "driver_license"
+    assert matcher.match("Aadhaar Card") == "aadhar_card"
+
+
+def test_fuzzy_match_above_threshold():
+    assert DocumentTypeMatcher(DOCUMENT_TYPES).match("residence_permits") == "residence_permit"
+
+
+def test_no_match_below_threshold():
+    matcher = DocumentTypeMatcher(DOCUMENT_TYPES)
+    assert matcher.match("birth_certificate") is None
+    assert matcher.match("residence_permits", threshold=0.99) is None
+
+
+def test_empty_registry_and_empty_query():
+    assert DocumentTypeMatcher([]).match("pan_card") is None
+    assert DocumentTypeMatcher(DOCUMENT_TYPES).match("  --  ") is None
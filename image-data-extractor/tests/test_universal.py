@@ -0,0 +1,84 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from src.extractors import universal
+from src.extractors.schema_converter import convert_db_schema_to_pydantic
+from src.extractors.universal import _validate_extracted_data, extract_with_db_schema, find_invalid_fields
+
+FIELDS = {
+    "number": {"type": "string", "description": "Passport number", "required": True, "pattern": "^[A-Z][0-9]{7}$"},
+    "age": {"type": "integer", "description": "Holder age", "required": True},
+    "name": {"type": "string", "description": "Holder name", "required": False},
+}
+SCHEMA = SimpleNamespace(document_schema=FIELDS, document_type="passport", country="IN")
+MODEL = convert_db_schema_to_pydantic(FIELDS, "passport")
+
+
+def tool_call_response(args):
+    return {"parsed": None, "raw": SimpleNamespace(tool_calls=[{"args": args}], content="")}
+
+
+class FakeLLM:
+    def __init__(self, first, repairs):
+        self.first = first
+        self.repairs = repairs
+        self.prompts = []
+
+    async def ainvoke(self, messages):
+        prompt = messages[0].content[0]["text"]
+        self.prompts.append(prompt)
+        if len(self.prompts) == 1:
+            return tool_call_response(self.first)
+        return tool_call_response({name: value for name, value in self.repairs.items() if f"- {name} (" in prompt})
+
+
+@pytest.fixture
+def extract(monkeypatch):
+    async def document_parts(paths, types, stage):
+        return [{"type": "text", "text": "document"}]
+    monkeypatch.setattr(universal, "build_document_parts", document_parts)
+
+    def run(llm):
+        async def get_llm(**kwargs):
+            return llm
+        monkeypatch.setattr(universal, "get_llm", get_llm)
+        data_json, invalid_fields = asyncio.run(extract_with_db_schema([], [], SCHEMA))
+        return json.loads(data_json), invalid_fields
+    return run
+
+
+def test_find_invalid_fields_reports_type_and_pattern_errors():
+    invalid = find_invalid_fields(FIELDS, MODEL, {"number": "12345", "age": "old", "name": None})
+    assert set(invalid) == {"number", "age"}
+    assert invalid["number"].startswith("Value does not match pattern")
+
+
+def test_only_invalid_fields_are_reextracted(extract):
+    llm = FakeLLM(first={"number": "X123", "age": 40, "name": "A B"}, repairs={"number": "P1234567"})
+    data, invalid_fields = extract(llm)
+
+    assert len(llm.prompts) == 2
+    assert "- number (" in llm.prompts[1] and "- age (" not in llm.prompts[1]
+    assert data["number"] == "P1234567"
+    assert invalid_fields == {}
+
+
+def test_unrecoverable_fields_are_reported_not_raised(extract):
+    llm = FakeLLM(first={"number": "X123", "age": "unknown"}, repairs={"number": "X123", "age": "still unknown"})
+    data, invalid_fields = extract(llm)
+
+    assert len(llm.prompts) == 1 + universal.EXTRACTION_RETRY_ATTEMPTS
+    assert data["age"] is None
+    assert data["number"] == "X123"
+    assert set(invalid_fields) == {"number", "age"}
+    assert data["is_document_correct"] is True
+
+
+def test_missing_required_field_is_null_and_reported():
+    data_json, invalid_fields = _validate_extracted_data(SCHEMA, MODEL, {"number": "P1234567", "is_document_correct": None})
+    data = json.loads(data_json)
+    assert data["age"] is None and data["is_document_correct"] is True
+    assert set(invalid_fields) == {"age", "is_document_correct"}
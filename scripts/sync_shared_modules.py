@@ -0,0 +1,64 @@
+import argparse
+import sys
+from pathlib import Path
+from typing import List
+
+ROOT = Path(__file__).resolve().parent.parent
+SHARED_DIR = ROOT / "shared"
+SHARED_MODULES = ("timing.py", "server.py")
+# Each service is built from its own directory, so it gets its own copy of the
+# shared modules instead of importing them from outside its build context.
+SERVICE_MODULE_DIRS = (
+    "analyzer/src/utils",
+    "sentiment/src/utils",
+    "summarizer/src/utils",
+    "image-data-extractor/src/utils",
+    "doc-classify/src",
+)
+HEADER = (
+    "# Generated from shared/{module} by scripts/sync_shared_modules.py.\n"
+    "# Edit shared/{module} and re-run the script instead of changing this copy.\n\n"
+)
+
+
+def expected_copy(module: str) -> str:
+    return HEADER.format(module=module) + (SHARED_DIR / module).read_text()
+
+
+def outdated_copies() -> List[Path]:
+    outdated = []
+    for module in SHARED_MODULES:
+        expected = expected_copy(module)
+        for module_dir in SERVICE_MODULE_DIRS:
+            path = ROOT / module_dir / module
+            if not path.exists() or path.read_text() != expected:
+                outdated.append(path)
+    return outdated
+
+
+def write_copies() -> None:
+    for module in SHARED_MODULES:
+        expected = expected_copy(module)
+        for module_dir in SERVICE_MODULE_DIRS:
+            (ROOT / module_dir / module).write_text(expected)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Copy the shared service modules into every service")
+    parser.add_argument("--check", action="store_true", help="only report copies that differ from shared/, exit 1 if any")
+    args = parser.parse_args()
+
+    if not args.check:
+        write_copies()
+        return 0
+
+    outdated = outdated_copies()
+    for path in outdated:
+        print(f"{path.relative_to(ROOT)} differs from shared/{path.name}")
+    if outdated:
+        print("Run python scripts/sync_shared_modules.py to update the copies.")
+    return 1 if outdated else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
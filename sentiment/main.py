@@ -17,6 +17,8 @@ from src.utils.sentiment import (
     analyze_pdf_sentiment_text_based
 )
 from src.utils.utils import _validate_file_async, _save_uploaded_file_async, _cleanup_temp_files_async
+from src.utils.timing import instrument_app
+from src.utils.server import run_server
 
 load_dotenv()
 
@@ -34,6 +36,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+instrument_app(app, service="sentiment")
+
 
 @app.post("/sentiment-pdf", response_model=SentimentAnalysisResponse)
 async def analyze_pdf_sentiment_endpoint(
@@ -93,12 +97,4 @@ async def root() -> HealthResponse:
     )
 
 if __name__ == "__main__":
-    import uvicorn
-    port = int(os.environ.get("PORT", 8002))
-    uvicorn.run(
-        app,
-        host="0.0.0.0",
-        port=port,
-        reload=True,
-        loop="asyncio"
-    )
+    run_server("main:app", default_port=8002, reload=True, loop="asyncio")
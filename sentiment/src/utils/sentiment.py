@@ -13,6 +13,7 @@ from src.config.llm_config import get_llm
 
 from src.config.prompts import get_multimodal_sentiment_prompt, get_text_sentiment_prompt
 from src.schemas.llm_response_models import LLMSentimentResponse
+from src.utils.timing import span, record_size
 
 
 async def load_pdf_async(pdf_path: str) -> List[Document]:
@@ -20,7 +21,8 @@ async def load_pdf_async(pdf_path: str) -> List[Document]:
         loader = PyPDFLoader(pdf_path)
         return loader.load()
 
-    return await asyncio.to_thread(_load_pdf)
+    with span("pdf_load"):
+        return await asyncio.to_thread(_load_pdf)
 
 
 async def analyze_text_sentiment(text: str) -> Optional[dict]:
@@ -36,7 +38,9 @@ async def analyze_text_sentiment(text: str) -> Optional[dict]:
     )
 
     try:
-        response = await structured_llm.ainvoke(prompt)
+        record_size("text_prompt", len(prompt))
+        with span("text_llm"):
+            response = await structured_llm.ainvoke(prompt)
         return {
             "sentiment": response.sentiment,
             "score": response.score,
@@ -57,8 +61,10 @@ async def analyze_pdf_sentiment_multimodal(pdf_path: Path) -> Optional[dict]:
     try:
         async with aiofiles.open(pdf_path, "rb") as pdf_file:
             pdf_bytes = await pdf_file.read()
+        with span("pdf_encode"):
             pdf_base64 = await asyncio.to_thread(base64.b64encode, pdf_bytes)
             pdf_base64_str = await asyncio.to_thread(pdf_base64.decode, "utf-8")
+        record_size("pdf_payload", len(pdf_base64_str))
 
         system_prompt = get_multimodal_sentiment_prompt()
         user_prompt = """Analyze the sentiment of this PDF document."""
@@ -88,7 +94,8 @@ async def analyze_pdf_sentiment_multimodal(pdf_path: Path) -> Optional[dict]:
             ),
         ]
 
-        response = await llm.ainvoke(messages)
+        with span("multimodal_llm"):
+            response = await llm.ainvoke(messages)
         return {
             "sentiment": response.sentiment,
             "score": response.score,
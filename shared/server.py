@@ -0,0 +1,74 @@
+import math
+import os
+import tempfile
+from pathlib import Path
+
+import uvicorn
+
+from .timing import METRICS_DIR_ENV, clear_snapshots
+
+# Every worker loads its own models and LLM clients, so the default stays
+# small even when the container may use many CPUs.
+MAX_DEFAULT_WORKERS = 4
+
+
+def _cgroup_cpu_limit() -> float:
+    # cgroup v2 exposes "<quota> <period>" in cpu.max, v1 two separate files.
+    try:
+        quota, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()
+        return float("inf") if quota == "max" else int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        quota = int(Path("/sys/fs/cgroup/cpu/cpu.cfs_quota_us").read_text())
+        period = int(Path("/sys/fs/cgroup/cpu/cpu.cfs_period_us").read_text())
+        return float("inf") if quota <= 0 else quota / period
+    except (OSError, ValueError):
+        return float("inf")
+
+
+def available_cpus() -> int:
+    # os.cpu_count() reports the host's CPUs inside a container; the CPU
+    # affinity mask and the cgroup quota are what the process may actually use.
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    limit = _cgroup_cpu_limit()
+    if limit != float("inf"):
+        cpus = min(cpus, math.ceil(limit))
+    return max(1, cpus)
+
+
+def get_worker_count() -> int:
+    workers = os.environ.get("WEB_CONCURRENCY")
+    return max(1, int(workers)) if workers else min(available_cpus(), MAX_DEFAULT_WORKERS)
+
+
+# SERVER_MODE=production runs WEB_CONCURRENCY worker processes (default: one
+# per available CPU, at most 4) on uvloop/httptools without the reloader.
+# Anything else keeps the single-process development settings passed in by
+# main.py.
+def run_server(app_path: str, default_port: int, **development_options) -> None:
+    host = os.environ.get("HOST", "0.0.0.0")
+    port = int(os.environ.get("PORT", default_port))
+
+    if os.environ.get("SERVER_MODE", "development") != "production":
+        uvicorn.run(app_path, host=host, port=port, **development_options)
+        return
+
+    workers = get_worker_count()
+    if workers > 1:
+        if os.environ.get(METRICS_DIR_ENV):
+            # Left over from an earlier run of the server.
+            clear_snapshots(os.environ[METRICS_DIR_ENV])
+        else:
+            os.environ[METRICS_DIR_ENV] = tempfile.mkdtemp(prefix="metrics-")
+
+    uvicorn.run(
+        app_path,
+        host=host,
+        port=port,
+        workers=workers,
+        loop="uvloop",
+        http="httptools",
+        access_log=False,
+        log_level="info"
+    )
@@ -0,0 +1,104 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import timing
+from timing import Histogram, format_server_timing, instrument_app, record_size, span
+
+
+def metric_value(text: str, line_start: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(line_start):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("work_seconds", "Work.", ("stage",), (0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value, "parse")
+
+    lines = histogram.render({"service": 'a"b'}, [histogram.snapshot()])
+
+    assert 'work_seconds_bucket{service="a\\"b",stage="parse",le="0.1"} 1' in lines
+    assert 'work_seconds_bucket{service="a\\"b",stage="parse",le="1.0"} 3' in lines
+    assert 'work_seconds_bucket{service="a\\"b",stage="parse",le="+Inf"} 4' in lines
+    assert 'work_seconds_count{service="a\\"b",stage="parse"} 4' in lines
+
+
+def test_histogram_merges_worker_snapshots():
+    histogram = Histogram("work_seconds", "Work.", ("stage",), (1.0,))
+    histogram.observe(0.5, "parse")
+    other_worker = [[["parse"], [2, 1], 4.0]]
+
+    lines = histogram.render({}, [histogram.snapshot(), other_worker])
+
+    assert 'work_seconds_count{stage="parse"} 4' in lines
+    assert 'work_seconds_sum{stage="parse"} 4.5' in lines
+
+
+def test_format_server_timing():
+    assert format_server_timing([("dur", "parse", 0.0123), ("bytes", "upload", 2048)]) == \
+        'parse;dur=12.3, upload;desc="2048 bytes"'
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.delenv(timing.METRICS_DIR_ENV, raising=False)
+    app = FastAPI()
+    instrument_app(app, service="test-service")
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: str):
+        with span("lookup"):
+            record_size("item", 100)
+        return {"id": item_id}
+
+    return TestClient(app)
+
+
+def test_debug_header_returns_server_timing(client):
+    assert "Server-Timing" not in client.get("/items/1").headers
+
+    header = client.get("/items/1", headers={timing.DEBUG_TIMING_HEADER: "1"}).headers["Server-Timing"]
+    entries = [entry.split(";")[0] for entry in header.split(", ")]
+    assert entries == ["item", "lookup", "total"]
+
+
+def test_metrics_label_requests_by_route_template(client):
+    series = 'http_request_duration_seconds_count{service="test-service",method="GET",route="/items/{item_id}",status="200"}'
+    before = metric_value(client.get("/metrics").text, series)
+
+    client.get("/items/1")
+    client.get("/items/2")
+    client.get("/missing")
+    metrics = client.get("/metrics")
+
+    assert metrics.headers["content-type"] == timing.METRICS_CONTENT_TYPE
+    assert metric_value(metrics.text, series) == before + 2
+    assert 'route="unmatched",status="404"' in metrics.text
+    assert 'stage_duration_seconds_count{service="test-service",stage="lookup"}' in metrics.text
+
+
+def test_metrics_sum_live_workers_and_drop_dead_ones(tmp_path, monkeypatch):
+    monkeypatch.setenv(timing.METRICS_DIR_ENV, str(tmp_path))
+    snapshot = {"stage_duration_seconds": [[["from_other_worker"], [1] + [0] * len(timing.DURATION_BUCKETS), 0.001]]}
+
+    live = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    dead = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True, text=True)
+    try:
+        (tmp_path / f"{live.pid}.json").write_text(json.dumps(snapshot))
+        (tmp_path / f"{dead.stdout.strip()}.json").write_text(json.dumps(snapshot))
+
+        text = timing.render_metrics("test-service")
+    finally:
+        live.kill()
+        live.wait()
+
+    assert metric_value(text, 'stage_duration_seconds_count{service="test-service",stage="from_other_worker"}') == 1
+    assert sorted(os.listdir(tmp_path)) == [f"{live.pid}.json"]
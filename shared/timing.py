@@ -0,0 +1,235 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
+
+
+DEBUG_TIMING_HEADER = "X-Debug-Timing"
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+METRICS_DIR_ENV = "METRICS_MULTIPROCESS_DIR"
+METRICS_FLUSH_SECONDS = 1.0
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+SIZE_BUCKETS = tuple(float(1024 * 4 ** exponent) for exponent in range(10))
+
+logger = logging.getLogger(__name__)
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+# Minimal Prometheus histogram. Observations can come from worker threads
+# (asyncio.to_thread), so every update happens under a lock.
+class Histogram:
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets) + (float("inf"),)
+        self._series: Dict[Tuple[str, ...], List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        bucket_index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0]
+            series[0][bucket_index] += 1
+            series[1] += value
+
+    def snapshot(self) -> List[list]:
+        with self._lock:
+            return [[list(labels), list(counts), total] for labels, (counts, total) in self._series.items()]
+
+    def render(self, constant_labels: Dict[str, str], snapshots: List[List[list]]) -> List[str]:
+        merged: Dict[Tuple[str, ...], List] = {}
+        for snapshot in snapshots:
+            for label_values, counts, total in snapshot:
+                series = merged.setdefault(tuple(label_values), [[0] * len(self.buckets), 0.0])
+                series[0] = [merged_count + count for merged_count, count in zip(series[0], counts)]
+                series[1] += total
+
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for label_values, (counts, total) in sorted(merged.items()):
+            labels = {**constant_labels, **dict(zip(self.label_names, label_values))}
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': _format_bound(bound)})} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Time spent handling HTTP requests.",
+    ("method", "route", "status"), DURATION_BUCKETS)
+STAGE_DURATION = Histogram(
+    "stage_duration_seconds", "Time spent in a named processing stage.",
+    ("stage",), DURATION_BUCKETS)
+STAGE_PAYLOAD = Histogram(
+    "stage_payload_bytes", "Size of the payload handled by a named processing stage.",
+    ("stage",), SIZE_BUCKETS)
+HISTOGRAMS = (REQUEST_DURATION, STAGE_DURATION, STAGE_PAYLOAD)
+
+_request_timings: ContextVar[Optional[List[Tuple[str, str, float]]]] = ContextVar("request_timings", default=None)
+
+
+def _remember(kind: str, stage: str, value: float) -> None:
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((kind, stage, value))
+
+
+def record_duration(stage: str, seconds: float) -> None:
+    STAGE_DURATION.observe(seconds, stage)
+    _remember("dur", stage, seconds)
+
+
+def record_size(stage: str, size_bytes: int) -> None:
+    STAGE_PAYLOAD.observe(float(size_bytes), stage)
+    _remember("bytes", stage, size_bytes)
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_duration(stage, time.perf_counter() - start)
+
+
+def format_server_timing(timings: List[Tuple[str, str, float]]) -> str:
+    entries = []
+    for kind, stage, value in timings:
+        if kind == "dur":
+            entries.append(f"{stage};dur={value * 1000:.1f}")
+        else:
+            entries.append(f'{stage};desc="{int(value)} bytes"')
+    return ", ".join(entries)
+
+
+# With several worker processes, each one writes its histograms to
+# METRICS_MULTIPROCESS_DIR and /metrics sums the files of all workers.
+def _snapshot_path(metrics_dir: str) -> Path:
+    return Path(metrics_dir) / f"{os.getpid()}.json"
+
+
+def _write_snapshot(metrics_dir: str) -> None:
+    path = _snapshot_path(metrics_dir)
+    temp_path = path.with_suffix(".tmp")
+    temp_path.write_text(json.dumps({histogram.name: histogram.snapshot() for histogram in HISTOGRAMS}))
+    os.replace(temp_path, path)
+
+
+def _remove_snapshot(metrics_dir: str) -> None:
+    _snapshot_path(metrics_dir).unlink(missing_ok=True)
+
+
+def _process_exists(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def clear_snapshots(metrics_dir: str) -> None:
+    for path in Path(metrics_dir).glob("*.json"):
+        path.unlink(missing_ok=True)
+
+
+def _flush_snapshots(metrics_dir: str) -> None:
+    while True:
+        time.sleep(METRICS_FLUSH_SECONDS)
+        try:
+            _write_snapshot(metrics_dir)
+        except OSError as e:
+            logger.warning("Failed to write metrics snapshot: %s", e)
+
+
+def _collect_snapshots() -> Dict[str, List[List[list]]]:
+    snapshots = {histogram.name: [histogram.snapshot()] for histogram in HISTOGRAMS}
+    metrics_dir = os.environ.get(METRICS_DIR_ENV)
+    if not metrics_dir:
+        return snapshots
+
+    own_path = _snapshot_path(metrics_dir)
+    for path in Path(metrics_dir).glob("*.json"):
+        if path == own_path:
+            continue
+        if path.stem.isdigit() and not _process_exists(int(path.stem)):
+            # A worker that was killed before it could remove its own file.
+            path.unlink(missing_ok=True)
+            continue
+        try:
+            worker_snapshots = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        for name, snapshot in worker_snapshots.items():
+            snapshots.setdefault(name, []).append(snapshot)
+    return snapshots
+
+
+def render_metrics(service: str) -> str:
+    constant_labels = {"service": service}
+    snapshots = _collect_snapshots()
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render(constant_labels, snapshots.get(histogram.name, [])))
+    return "\n".join(lines) + "\n"
+
+
+def instrument_app(app: FastAPI, service: str) -> None:
+    metrics_dir = os.environ.get(METRICS_DIR_ENV)
+    if metrics_dir:
+        threading.Thread(target=_flush_snapshots, args=(metrics_dir,), name="metrics-flush", daemon=True).start()
+        atexit.register(_remove_snapshot, metrics_dir)
+
+    @app.middleware("http")
+    async def record_request_timing(request: Request, call_next):
+        timings: List[Tuple[str, str, float]] = []
+        token = _request_timings.set(timings)
+        start = time.perf_counter()
+        status = "500"
+        try:
+            response = await call_next(request)
+            status = str(response.status_code)
+        finally:
+            _request_timings.reset(token)
+            elapsed = time.perf_counter() - start
+            route = getattr(request.scope.get("route"), "path", "unmatched")
+            REQUEST_DURATION.observe(elapsed, request.method, route, status)
+
+        if request.headers.get(DEBUG_TIMING_HEADER, "").lower() in ("1", "true", "yes"):
+            response.headers["Server-Timing"] = format_server_timing(timings + [("dur", "total", elapsed)])
+        return response
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics() -> PlainTextResponse:
+        return PlainTextResponse(render_metrics(service), media_type=METRICS_CONTENT_TYPE)
@@ -9,6 +9,8 @@ from fastapi.middleware.cors import CORSMiddleware
 from src.schemas.response_models import SummaryResponse, HealthResponse, AnalysisMode
 from src.utils.summarizer import summarize_pdf
 from src.utils.utils import _validate_file_async, _save_uploaded_file_async, _cleanup_temp_files_async
+from src.utils.timing import instrument_app
+from src.utils.server import run_server
 
 load_dotenv()
 
@@ -27,6 +29,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+instrument_app(app, service="summarizer")
+
 
 @app.post("/summarize", response_model=SummaryResponse)
 async def summarize_pdf_endpoint(
@@ -85,12 +89,4 @@ async def root() -> HealthResponse:
 
 
 if __name__ == "__main__":
-    import uvicorn
-    port = int(os.environ.get("PORT", 8003))
-    uvicorn.run(
-        app,
-        host="0.0.0.0",
-        port=port,
-        reload=True,
-        loop="asyncio"
-    )
+    run_server("main:app", default_port=8003, reload=True, loop="asyncio")
@@ -13,18 +13,21 @@ from langchain_core.messages import HumanMessage, SystemMessage
 from ..config.llm_config import get_llm
 from ..config.prompts import get_summarization_prompt
 from ..schemas.llm_response_models import LLMSummaryResponse
+from .timing import span, record_size
 
 
 async def _load_pdf_async(file_path: str) -> List[Document]:
     try:
         loader = PyPDFLoader(file_path)
-        return await asyncio.to_thread(loader.load)
+        with span("pdf_load"):
+            return await asyncio.to_thread(loader.load)
     except Exception as e:
         raise FileNotFoundError(f"Failed to load PDF: {str(e)}")
 
 
 async def _split_documents_async(pages: List[Document], text_splitter: RecursiveCharacterTextSplitter) -> List[Document]:
-    return await asyncio.to_thread(text_splitter.split_documents, pages)
+    with span("text_split"):
+        return await asyncio.to_thread(text_splitter.split_documents, pages)
 
 
 async def _read_file_async(file_path: str) -> bytes:
@@ -42,8 +45,10 @@ async def summarize_pdf_multimodal(file_path: str, summary_type: str = "comprehe
         raise FileNotFoundError("File not found")
 
     pdf_bytes = await _read_file_async(file_path)
-    pdf_base64 = await asyncio.to_thread(base64.b64encode, pdf_bytes)
-    pdf_base64_str = await asyncio.to_thread(pdf_base64.decode, "utf-8")
+    with span("pdf_encode"):
+        pdf_base64 = await asyncio.to_thread(base64.b64encode, pdf_bytes)
+        pdf_base64_str = await asyncio.to_thread(pdf_base64.decode, "utf-8")
+    record_size("pdf_payload", len(pdf_base64_str))
 
     system_prompt = get_summarization_prompt()
 
@@ -77,7 +82,8 @@ async def summarize_pdf_multimodal(file_path: str, summary_type: str = "comprehe
     ]
 
     try:
-        structured_response = await llm.ainvoke(messages)
+        with span("multimodal_llm"):
+            structured_response = await llm.ainvoke(messages)
         return {
             "summary": structured_response.summary,
             "summary_type": structured_response.summary_type,
@@ -122,7 +128,9 @@ async def summarize_pdf_text_based(file_path: str, summary_type: str = "comprehe
         HumanMessage(content=prompt)
     ]
     
-    structured_response = await llm.ainvoke(messages)
+    record_size("text_prompt", len(prompt))
+    with span("text_llm"):
+        structured_response = await llm.ainvoke(messages)
 
     return {
         "summary": structured_response.summary,
@@ -459,10 +459,30 @@ def display_document_extraction():
         or "all_schemas" not in st.session_state
     ):
         try:
-            resp = requests.get("http://localhost:8005/schemas", timeout=240)
-            resp.raise_for_status()
-            schemas_data = resp.json()
-            st.session_state.all_schemas = schemas_data.get("schemas", [])
+            headers = {}
+            if st.session_state.get("all_schemas") and st.session_state.get("all_schemas_etag"):
+                headers["If-None-Match"] = st.session_state.all_schemas_etag
+            params = {"include_schema": "false"}
+            resp = requests.get(
+                "http://localhost:8005/schemas", params=params, headers=headers, timeout=240
+            )
+            if resp.status_code != 304:
+                resp.raise_for_status()
+                st.session_state.all_schemas_etag = resp.headers.get("ETag")
+                st.session_state.schema_bodies = {}
+                schemas = []
+                while True:
+                    schemas_data = resp.json()
+                    schemas.extend(schemas_data.get("schemas", []))
+                    if not schemas_data.get("next_cursor"):
+                        break
+                    resp = requests.get(
+                        "http://localhost:8005/schemas",
+                        params={**params, "cursor": schemas_data["next_cursor"]},
+                        timeout=240,
+                    )
+                    resp.raise_for_status()
+                st.session_state.all_schemas = schemas
         except Exception as e:
             st.error(f"Failed to fetch schemas: {str(e)}")
             st.session_state.all_schemas = []
@@ -480,6 +500,17 @@ def display_document_extraction():
             key="schema_selectbox"
         )
         schema = all_schemas[selected_idx]
+        schema_bodies = st.session_state.setdefault("schema_bodies", {})
+        if schema["id"] not in schema_bodies:
+            try:
+                resp = requests.get(
+                    f"http://localhost:8005/schemas/{schema['id']}", timeout=240
+                )
+                resp.raise_for_status()
+                schema_bodies[schema["id"]] = resp.json().get("schema", {})
+            except Exception as e:
+                st.error(f"Failed to fetch schema details: {str(e)}")
+        schema = {**schema, "schema": schema_bodies.get(schema["id"], {})}
         schema_fields = schema.get("schema", {})
         with st.expander(schema_labels[selected_idx], expanded=True):
             for field, props in schema_fields.items():